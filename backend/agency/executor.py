@@ -1,9 +1,53 @@
-from backend.agency.graph import app_graph
+import time
+import asyncio
 import logging
 
+from backend.agency import graph
+from backend.agency.graph import app_graph
+from backend.config import AGENTIC_MODE
+from backend.services.cycle_runner import Histogram, DURATION_BUCKETS
+
 logger = logging.getLogger("AgenticExecutor")
 
 class AgenticExecutor:
+    """
+    Long-lived front end to the compiled agent graph.
+
+    One instance serves every bot cycle. warm() loads the expensive pieces
+    up front - the sentinel (LLM client + sentiment cache), the bandit's
+    arm table and, in AGENTIC_MODE, the Brain MCP tool list - so a cycle
+    only pays for the decision logic itself. stats() reports per-node and
+    whole-run timings.
+    """
+
+    def __init__(self, compiled_graph=None):
+        self.graph = compiled_graph if compiled_graph is not None else app_graph
+        self.runs = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.warmed_ms: float | None = None
+
+    async def warm(self):
+        start = time.perf_counter()
+        try:
+            graph._get_sentinel()
+        except Exception as e:  # noqa: BLE001 - warm-up is best effort; the first cycle retries
+            logger.warning(f"Sentinel not warmed, will retry on first cycle: {e}")
+        try:
+            await asyncio.to_thread(graph.refresh_bandit)
+        except Exception as e:  # noqa: BLE001 - warm-up is best effort; the first cycle retries
+            logger.warning(f"Bandit not warmed, will retry on first cycle: {e}")
+        if AGENTIC_MODE:
+            await graph._ensure_mcp_tools()
+        self.warmed_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Agent warmed in {self.warmed_ms}ms")
+
+    async def close(self):
+        await graph.close_mcp_tools()
+
+    def record_reward(self, params: dict, reward: float):
+        """Keeps the warm bandit in step with a reward its caller has already persisted."""
+        graph.record_reward(params, reward)
+
     async def run(self, market_context: dict):
         """
         Runs the full agentic flow and returns the final state.
@@ -15,6 +59,20 @@ class AgenticExecutor:
             "risk_shield_status": "SAFE",
             "decision_reasoning": ""
         }
-        
-        final_state = await app_graph.ainvoke(initial_state)
-        return final_state
+
+        start = time.perf_counter()
+        try:
+            return await self.graph.ainvoke(initial_state)
+        finally:
+            self.runs += 1
+            self.duration.observe(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "warmed_ms": self.warmed_ms,
+            "run_duration_sec": self.duration.snapshot(),
+            "nodes": {name: hist.snapshot() for name, hist in graph.node_timings.items()},
+            "bandit": graph.bandit_info(),
+            "mcp_tools": len(graph._mcp_tools),
+        }
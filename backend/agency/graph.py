@@ -1,4 +1,10 @@
+import os
+import json
+import time
+import asyncio
 import logging
+import functools
+import threading
 from typing import Literal
 from langgraph.graph import StateGraph, END
 from backend.agency.state import AgentState
@@ -6,27 +12,97 @@ from backend.agency.sentinel import SentinelShield
 from backend.learning import EpsilonGreedyBandit
 from backend.db import SessionLocal
 from backend.config import TRADED_SYMBOLS, AGENTIC_MODE
+from backend.services.cycle_runner import Histogram, DURATION_BUCKETS
 
 logger = logging.getLogger("AgentGraph")
 
 # Lazily created on first use so tests can import graph.py without a GOOGLE_API_KEY.
 # The single instance is reused across bot cycles so the sentiment cache persists.
 _sentinel: "SentinelShield | None" = None
+_market_provider = None
+
+
+def use_market_provider(provider) -> None:
+    """Shares the app's MarketDataProvider with the sentinel instead of it building its own."""
+    global _market_provider
+    _market_provider = provider
+    if _sentinel is not None and _sentinel.provider is None:
+        _sentinel.provider = provider
 
 
 def _get_sentinel() -> SentinelShield:
     global _sentinel
     if _sentinel is None:
-        _sentinel = SentinelShield()
+        _sentinel = SentinelShield(provider=_market_provider)
     return _sentinel
 
 
+# Warm, read-only bandit replica for strategy_node. It is loaded from
+# BanditState once and then kept current in memory via record_reward();
+# every AGENT_BANDIT_REFRESH_SEC it is reloaded to pick up writes made
+# elsewhere (backtests, other processes). Rewards are persisted by their
+# own writers, never by this replica.
+_bandit: "EpsilonGreedyBandit | None" = None
+_bandit_loaded_at: float | None = None
+_bandit_lock = threading.Lock()
+BANDIT_REFRESH_SEC = float(os.getenv("AGENT_BANDIT_REFRESH_SEC", "300"))
+
+
+def refresh_bandit() -> EpsilonGreedyBandit:
+    """(Re)loads the bandit replica from the DB and swaps it in."""
+    global _bandit, _bandit_loaded_at
+    db = SessionLocal()
+    try:
+        bandit = EpsilonGreedyBandit(db, flush_every=0)
+    finally:
+        db.close()
+    with _bandit_lock:
+        _bandit, _bandit_loaded_at = bandit, time.monotonic()
+    return bandit
+
+
+def _get_bandit() -> EpsilonGreedyBandit:
+    if _bandit is None or time.monotonic() - _bandit_loaded_at > BANDIT_REFRESH_SEC:
+        return refresh_bandit()
+    return _bandit
+
+
+def record_reward(params: dict, reward: float) -> None:
+    """Mirrors a reward that was just persisted into the warm bandit."""
+    with _bandit_lock:
+        if _bandit is not None:
+            _bandit.observe(params, reward)
+
+
+def bandit_info() -> dict:
+    if _bandit is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "arms": len(_bandit.arms),
+        "age_sec": round(time.monotonic() - _bandit_loaded_at, 1),
+        "refresh_sec": BANDIT_REFRESH_SEC,
+    }
+
+
 # --- Optional MCP tools for agentic mode ---
 _mcp_tools_loaded = False
 _mcp_tools = []
 _mcp_manager = None
 
 
+async def close_mcp_tools():
+    """Closes the Brain MCP sessions opened by _ensure_mcp_tools."""
+    global _mcp_tools_loaded, _mcp_tools, _mcp_manager
+    manager, _mcp_manager = _mcp_manager, None
+    _mcp_tools_loaded, _mcp_tools = False, []
+    if manager is not None:
+        try:
+            await manager.__aexit__(None, None, None)
+        except Exception as e:  # noqa: BLE001 - shutdown must not fail on a broken MCP session
+            logger.warning(f"AGENTIC_MODE: error closing MCP sessions: {e}")
+
+
 async def _ensure_mcp_tools():
     """Lazily initialise MCP Brain tools the first time they are needed."""
     global _mcp_tools_loaded, _mcp_tools, _mcp_manager
@@ -81,8 +157,16 @@ async def introspection_node(state: AgentState):
     """
     tools = await _ensure_mcp_tools()
     extra_context = []
+    wanted = ("brain_get_portfolio_snapshot", "brain_get_bandit_analysis", "brain_get_risk_status")
+    snapshot = state["market_context"].get("snapshot")
+    if snapshot is not None:
+        # Account, positions and VIX are already in this cycle's snapshot; only
+        # the bandit analysis needs a Brain round-trip.
+        local = {**snapshot.summary(), "risk_shield_status": state["risk_shield_status"]}
+        extra_context.append(f"[cycle_snapshot] {json.dumps(local, default=str)}")
+        wanted = ("brain_get_bandit_analysis",)
     for tool in tools:
-        if tool.name in ("brain_get_portfolio_snapshot", "brain_get_bandit_analysis", "brain_get_risk_status"):
+        if tool.name in wanted:
             try:
                 result = await tool.ainvoke({})
                 extra_context.append(f"[{tool.name}] {result}")
@@ -115,24 +199,22 @@ def strategy_node(state: AgentState):
             "decision_reasoning": state["decision_reasoning"] + f" [Strategy] Dry run params {dry_params}.",
         }
 
-    db = SessionLocal()
-    try:
-        eps = float(state["market_context"].get("epsilon", 0.2))
-        bandit = EpsilonGreedyBandit(db, epsilon=eps)
+    eps = float(state["market_context"].get("epsilon", 0.2))
+    bandit = _get_bandit()
+    with _bandit_lock:
+        bandit.epsilon = eps
         selected_arm = bandit.choose_arm() if eps > 0 else bandit.get_best_arm()
 
-        proposal = {
-            "action": "TRADE",
-            "params": selected_arm,
-            "reason": f"Bandit epsilon={eps:.2f}",
-        }
+    proposal = {
+        "action": "TRADE",
+        "params": selected_arm,
+        "reason": f"Bandit epsilon={eps:.2f}",
+    }
 
-        return {
-            "trade_proposal": proposal,
-            "decision_reasoning": state["decision_reasoning"] + f" [Strategy] Selected {selected_arm} (epsilon={eps:.2f}).",
-        }
-    finally:
-        db.close()
+    return {
+        "trade_proposal": proposal,
+        "decision_reasoning": state["decision_reasoning"] + f" [Strategy] Selected {selected_arm} (epsilon={eps:.2f}).",
+    }
 
 
 def executor_node(state: AgentState):
@@ -169,16 +251,45 @@ def after_sentinel(state: AgentState) -> Literal["introspection", "strategy", "e
     return "strategy"
 
 
+# --- Per-node timing ---
+
+# Wall time (seconds) of every node run, keyed by node name.
+node_timings: dict[str, Histogram] = {}
+
+
+def _timed(name: str, fn):
+    hist = node_timings.setdefault(name, Histogram(DURATION_BUCKETS))
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def timed_async(state: AgentState):
+            start = time.perf_counter()
+            try:
+                return await fn(state)
+            finally:
+                hist.observe(time.perf_counter() - start)
+        return timed_async
+
+    @functools.wraps(fn)
+    def timed_sync(state: AgentState):
+        start = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            hist.observe(time.perf_counter() - start)
+    return timed_sync
+
+
 # --- Graph Definition ---
 
 workflow = StateGraph(AgentState)
 
-workflow.add_node("sentinel", sentinel_node)
-workflow.add_node("strategy", strategy_node)
-workflow.add_node("executor", executor_node)
+workflow.add_node("sentinel", _timed("sentinel", sentinel_node))
+workflow.add_node("strategy", _timed("strategy", strategy_node))
+workflow.add_node("executor", _timed("executor", executor_node))
 
 if AGENTIC_MODE:
-    workflow.add_node("introspection", introspection_node)
+    workflow.add_node("introspection", _timed("introspection", introspection_node))
 
 workflow.set_entry_point("sentinel")
 
@@ -1,10 +1,11 @@
 import os
 import time
+import asyncio
 import logging
-from typing import List
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from backend.market_data import MarketDataProvider
+from backend.services.sentiment_cache import SentimentStore
 
 logger = logging.getLogger("Sentinel")
 
@@ -14,17 +15,33 @@ _SENTIMENT_TTL = int(os.getenv("SENTINEL_TTL_SECONDS", "300"))
 _VIX_DELTA_THRESHOLD = float(os.getenv("SENTINEL_VIX_DELTA", "1.5"))
 
 
+def _articles(news) -> list:
+    if news is None:
+        return []
+    # NewsSet stores articles under .data["news"]; fall back to
+    # iterating directly if a list/raw dict was returned instead.
+    if hasattr(news, "data") and isinstance(news.data, dict):
+        return news.data.get("news", [])
+    if isinstance(news, dict):
+        return news.get("news", [])
+    return list(news) if news else []
+
+
 class SentinelShield:
-    def __init__(self):
+    def __init__(self, provider: MarketDataProvider | None = None, store: SentimentStore | None = None):
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-flash-lite-latest",
             google_api_key=os.getenv("GOOGLE_API_KEY"),
             temperature=0.0
         )
-        self.provider = MarketDataProvider()
+        # Pass the app's provider to share its clients; one is built on first news fetch otherwise.
+        self.provider = provider
+        # Verdicts shared with other processes / restarts through the DB.
+        self.store = store if store is not None else SentimentStore()
         self._init_cache()
 
-    def analyze_vix_regime(self, vix_price: float) -> str:
+    @staticmethod
+    def analyze_vix_regime(vix_price: float) -> str:
         """Detect risk regime based on VIX."""
         if vix_price >= 30:
             return "CRISIS"
@@ -37,6 +54,7 @@ class SentinelShield:
         self._cached_score: float = 0.0
         self._last_vix: float = -999.0
         self._last_called: float = 0.0
+        self._headline_ids: frozenset | None = None
 
     def _update_cache(self, score: float, vix: float) -> None:
         self._cached_score = score
@@ -44,13 +62,44 @@ class SentinelShield:
         self._last_called = time.monotonic()
         logger.info(f"Sentinel cache updated: score={score:.2f}, vix={vix:.2f}")
 
-    async def analyze_sentiment(self, symbols: List[str], vix: float = 0.0) -> float:
+    async def _fetch_headlines(self, symbols: list[str]) -> tuple[list[tuple[str, str]], bool]:
+        """
+        Latest headlines for every symbol, fetched concurrently.
+        Returns (article id, "[SYMBOL] headline") pairs, where a failed symbol
+        is skipped, and whether every symbol's fetch failed.
+        """
+        if self.provider is None:
+            self.provider = MarketDataProvider()
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.provider.get_news, [symbol], limit=5) for symbol in symbols),
+            return_exceptions=True,
+        )
+        headlines = []
+        failed = 0
+        for symbol, news in zip(symbols, results):
+            if isinstance(news, Exception):
+                logger.warning(f"News fetch failed for {symbol}: {news}")
+                failed += 1
+                continue
+            for item in _articles(news):
+                if isinstance(item, dict):
+                    headline, article_id = item.get("headline", ""), item.get("id")
+                else:
+                    headline, article_id = getattr(item, "headline", "") or "", getattr(item, "id", None)
+                if headline:
+                    key = f"{symbol}:{article_id if article_id is not None else headline}"
+                    headlines.append((key, f"[{symbol}] {headline}"))
+        return headlines, bool(symbols) and failed == len(symbols)
+
+    async def analyze_sentiment(self, symbols: list[str], vix: float = 0.0) -> float:
         """
         Fetches news and returns a sentiment score from -1.0 (very bearish) to 1.0 (very bullish).
 
         Results are cached for up to SENTINEL_TTL_SECONDS (default 300s) and
         only refreshed when VIX moves more than SENTINEL_VIX_DELTA (default 1.5)
-        points, to stay within free-tier Gemini quota limits.
+        points, to stay within free-tier Gemini quota limits. A refresh only
+        calls the LLM if the set of headlines differs from the last scored one
+        and no other process has already scored it (see SentimentStore).
         """
         now = time.monotonic()
         last_vix = getattr(self, "_last_vix", -999.0)
@@ -67,32 +116,33 @@ class SentinelShield:
             return cached_score
 
         try:
-            headlines = []
-            for symbol in symbols:
-                news = self.provider.get_news([symbol], limit=5)
-                if news is None:
-                    continue
-                # NewsSet stores articles under .data["news"]; fall back to
-                # iterating directly if a list/raw dict was returned instead.
-                if hasattr(news, "data") and isinstance(news.data, dict):
-                    articles = news.data.get("news", [])
-                elif isinstance(news, dict):
-                    articles = news.get("news", [])
-                else:
-                    articles = list(news) if news else []
+            headlines, all_failed = await self._fetch_headlines(symbols)
+            if all_failed:
+                # No news at all is not "no news": keep the last verdict and retry next call.
+                logger.warning(f"All news fetches failed; serving stale sentiment {cached_score:.2f}")
+                return cached_score
+            headline_ids = frozenset(key for key, _ in headlines)
 
-                for item in articles:
-                    if isinstance(item, dict):
-                        headline = item.get("headline", "")
-                    else:
-                        headline = getattr(item, "headline", "") or ""
-                    if headline:
-                        headlines.append(f"[{symbol}] {headline}")
+            # Same headlines as the last scored set: the LLM would return the same verdict.
+            if headline_ids == getattr(self, "_headline_ids", None):
+                logger.debug(f"Sentinel headlines unchanged ({len(headline_ids)}) → {cached_score:.2f}")
+                self._update_cache(cached_score, vix)
+                return cached_score
 
             if not headlines:
+                self._headline_ids = headline_ids
                 self._update_cache(0.0, vix)
                 return 0.0  # Neutral if no news
 
+            store = getattr(self, "store", None)
+            if store is not None:
+                shared = await asyncio.to_thread(store.get, headline_ids, vix)
+                if shared is not None:
+                    logger.info(f"Sentinel verdict reused from shared cache → {shared:.2f}")
+                    self._headline_ids = headline_ids
+                    self._update_cache(shared, vix)
+                    return shared
+
             prompt = PromptTemplate.from_template("""
             You are a Financial Sentiment Analyzer. 
             Analyze the following headlines and provide a combined sentiment score between -1.0 (extremely bearish) and 1.0 (extremely bullish).
@@ -103,7 +153,7 @@ class SentinelShield:
             """)
 
             chain = prompt | self.llm
-            response = await chain.ainvoke({"headlines": "\n".join(headlines)})
+            response = await chain.ainvoke({"headlines": "\n".join(text for _, text in headlines)})
 
             # Newer langchain-google-genai returns structured content as a
             # list of parts (e.g. [{"type": "text", "text": "0.35", ...}]).
@@ -125,7 +175,10 @@ class SentinelShield:
                 return cached_score
             try:
                 score = max(-1.0, min(1.0, float(match.group(0))))
+                self._headline_ids = headline_ids
                 self._update_cache(score, vix)
+                if store is not None:
+                    await asyncio.to_thread(store.put, headline_ids, vix, score)
                 return score
             except ValueError:
                 logger.warning(f"Failed to parse sentiment score from: {raw_content!r}")
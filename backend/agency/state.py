@@ -1,4 +1,4 @@
-from typing import Annotated, Sequence, TypedDict
+from typing import Annotated, Any, Sequence, TypedDict
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 from typing_extensions import NotRequired
@@ -11,6 +11,8 @@ class MarketContext(TypedDict):
     epsilon: NotRequired[float]
     risk_override: NotRequired[str | None]
     sentiment: NotRequired[float]
+    # Cycle-scoped MarketSnapshot (backend.services.market_snapshot); read-only.
+    snapshot: NotRequired[Any]
 
 class AgentState(TypedDict):
     """The state of the PaperPilot agentic flow."""
@@ -0,0 +1,35 @@
+"""add sentiment_cache table
+
+Revision ID: b7e41c9d2f10
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'b7e41c9d2f10'
+down_revision: str | Sequence[str] | None = 'a1b2c3d4e5f6'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table('sentiment_cache',
+    sa.Column('cache_key', sa.String(), nullable=False),
+    sa.Column('headline_hash', sa.String(), nullable=False),
+    sa.Column('vix_bucket', sa.Integer(), nullable=False),
+    sa.Column('headline_count', sa.Integer(), nullable=True),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_sentiment_cache_expires_at'), 'sentiment_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sentiment_cache_expires_at'), table_name='sentiment_cache')
+    op.drop_table('sentiment_cache')
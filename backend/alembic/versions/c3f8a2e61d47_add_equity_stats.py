@@ -0,0 +1,36 @@
+"""add equity_stats running aggregates and daily_equity (source, date) index
+
+Revision ID: c3f8a2e61d47
+Revises: b7e41c9d2f10
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'c3f8a2e61d47'
+down_revision: str | Sequence[str] | None = 'b7e41c9d2f10'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Rows are (re)built from daily_equity by MetricsService on first use.
+    op.create_table('equity_stats',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('high_water_mark', sa.Float(), nullable=True),
+    sa.Column('max_drawdown_pct', sa.Float(), nullable=False),
+    sa.Column('last_equity', sa.Float(), nullable=True),
+    sa.Column('first_date', sa.DateTime(), nullable=True),
+    sa.Column('last_date', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source')
+    )
+    op.create_index('ix_daily_equity_source_date', 'daily_equity', ['source', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_equity_source_date', table_name='daily_equity')
+    op.drop_table('equity_stats')
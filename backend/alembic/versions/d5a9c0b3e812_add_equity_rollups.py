@@ -0,0 +1,39 @@
+"""add equity_rollups (minute / hour / day OHLC of live equity)
+
+Revision ID: d5a9c0b3e812
+Revises: c3f8a2e61d47
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'd5a9c0b3e812'
+down_revision: str | Sequence[str] | None = 'c3f8a2e61d47'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table('equity_rollups',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('resolution', sa.String(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('drawdown_max', sa.Float(), nullable=False),
+    sa.Column('drawdown_close', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('source', 'resolution', 'bucket_start')
+    )
+    # Dropping the running stats makes MetricsService rebuild them together
+    # with the rollups from daily_equity on first use.
+    op.execute("DELETE FROM equity_stats")
+
+
+def downgrade() -> None:
+    op.drop_table('equity_rollups')
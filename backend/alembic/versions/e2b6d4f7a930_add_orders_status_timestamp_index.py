@@ -0,0 +1,23 @@
+"""add orders (status, timestamp) index for trade history
+
+Revision ID: e2b6d4f7a930
+Revises: d5a9c0b3e812
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = 'e2b6d4f7a930'
+down_revision: str | Sequence[str] | None = 'd5a9c0b3e812'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_status_timestamp', 'orders', ['status', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_timestamp', table_name='orders')
@@ -1,40 +1,49 @@
 import json as _json
 import os
-import time
 import uuid
 import logging
 import logging.handlers
 import asyncio
-from typing import List
+import threading
+from dataclasses import asdict
+from functools import partial
+from typing import Annotated, List
 from datetime import datetime
 import pytz
 from contextlib import asynccontextmanager
-import pandas as pd
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import select, func, or_, and_
 
 from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import MarketOrderRequest, TakeProfitRequest, StopLossRequest, GetOrdersRequest
-from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass, QueryOrderStatus
+from alpaca.trading.requests import MarketOrderRequest, TakeProfitRequest, StopLossRequest
+from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 from backend.market_data import MarketDataProvider
-from backend.strategy.ts_mom import compute_signal
-from backend.strategy.risk import compute_volatility, size_position
+from backend.strategy.incremental import IncrementalSignalEngine
+from backend.strategy.risk import size_position
 from backend.config import TRADED_SYMBOLS
 from backend.services.execution import calculate_orders
 from backend.services.logging import LoggingService
 from backend.services.metrics import MetricsService
+from backend.services.monte_carlo import run_monte_carlo, BOOTSTRAP_METHODS
 from backend.db import Base, engine, SessionLocal
 from backend.models import Decision, Order
 from backend.learning import EpsilonGreedyBandit
 from backend.backtest import run_backtest
 from backend.services.streaming import AlpacaStreamingService
+from backend.services.broker import AsyncBroker
+from backend.services.order_dispatch import OrderAckTracker, OrderDispatcher
+from backend.services.cycle_runner import CycleRunner
+from backend.services.market_snapshot import capture_snapshot, timed_call
+from backend.services.dashboard import DashboardService, etag_matches
 from backend.agency.executor import AgenticExecutor
+from backend.agency.graph import use_market_provider
 
 load_dotenv()
 
@@ -94,13 +103,22 @@ if not API_KEY or not API_SECRET:
 
 trading_client = TradingClient(API_KEY, API_SECRET, paper=PAPER)
 market_provider = MarketDataProvider()
+use_market_provider(market_provider)
+# Rolling MA / vol state for the live 1-minute cycle, kept across cycles.
+signal_engine = IncrementalSignalEngine(timeframe="1m")
+# Blocking broker / data calls from async code go through this thread pool.
+broker = AsyncBroker()
+# Trade-stream events wake up order dispatches waiting on cancel acks.
+order_acks = OrderAckTracker()
+# One agent for the app's lifetime: warm sentinel, bandit and MCP tools.
+agent = AgenticExecutor()
 
 # --- Runtime Overrides (settable via API) ---
 risk_override: str | None = None  # None = use auto-detection, or "SAFE"/"SHIELD_ACTIVE"/"CRISIS"
 bandit_epsilon_override: float | None = None  # None = use default from EpsilonGreedyBandit
 
 def _patch_missing_columns():
-    """Idempotently add columns that exist in the SQLAlchemy models but are
+    """Idempotently add columns and indexes that exist in the SQLAlchemy models but are
     missing from the live database. Production was originally bootstrapped via
     ``Base.metadata.create_all`` (not Alembic), so newly added columns on
     existing tables never reach the persistent SQLite without a one-off patch.
@@ -131,6 +149,11 @@ def _patch_missing_columns():
                 )
                 logger.warning(f"Schema patch: {ddl}")
                 conn.execute(text(ddl))
+            db_indexes = {i["name"] for i in inspector.get_indexes(table_name)}
+            for index in table.indexes:
+                if index.name not in db_indexes:
+                    logger.warning(f"Schema patch: CREATE INDEX {index.name} ON {table_name}")
+                    index.create(bind=conn)
 
 
 @asynccontextmanager
@@ -141,12 +164,18 @@ async def lifespan(app: FastAPI):
     
     # Initialize Streaming Service
     # We pass BOTH price trigger and trade update handlers
-    stream_svc = AlpacaStreamingService(execute_bot_cycle, handle_trade_update)
+    stream_svc = AlpacaStreamingService(run_triggered_cycle, handle_trade_update)
     
     # Start stream in the background
     asyncio.create_task(stream_svc.start())
     logger.info(" Real-Time 'Alpha-Stream' + 'Learning-Loop' Connected.")
 
+    # Load the agent's sentinel, bandit and MCP tools once, not per cycle
+    await agent.warm()
+
+    # Rebuild the dashboard snapshot in the background
+    dashboard.start()
+
     # Start Scheduler for EOD Liquidation
     scheduler.add_job(liquidate_all_positions, 'cron', day_of_week='mon-fri', hour=15, minute=53)
     scheduler.start()
@@ -156,6 +185,9 @@ async def lifespan(app: FastAPI):
     
     scheduler.shutdown()
     await stream_svc.stop()
+    await dashboard.stop()
+    await agent.close()
+    broker.shutdown()
     logger.info(" Shutting down...")
 
 async def handle_trade_update(data):
@@ -164,8 +196,13 @@ async def handle_trade_update(data):
     Updates the bandit based on PnL of closed trades.
     Retries on SQLite lock errors.
     """
+    try:
+        order_acks.resolve(data.order.id, data.event)
+    except Exception as e:  # noqa: BLE001 - a broken waiter must not kill the trade stream or skip the DB update
+        logger.error(f"Error resolving order ack: {e}")
     for attempt in range(3):
         db = SessionLocal()
+        reward = None
         try:
             event = data.event
             order = data.order
@@ -195,12 +232,14 @@ async def handle_trade_update(data):
                             
                             decision = db.query(Decision).filter(Decision.run_id == db_order.run_id).first()
                             if decision:
-                                bandit = EpsilonGreedyBandit(db)
-                                bandit.update_arm(decision.params_used, pnl_pct)
+                                EpsilonGreedyBandit.add_reward(db, decision.params_used, pnl_pct)
                                 decision.reward = (decision.reward or 0) + pnl_pct
+                                reward = (decision.params_used, pnl_pct)
                                 logger.info(f" PROFIT TAKEN: {symbol} PnL: {pnl_pct:.2%}. Bandit Optimized.")
                 
                 db.commit()
+                if reward:
+                    agent.record_reward(*reward)
             return
         except Exception as e:
             db.rollback()
@@ -232,51 +271,40 @@ scheduler = BackgroundScheduler(timezone="America/New_York")
 def liquidate_all_positions():
     """
     Called at 3:53 PM ET to exit all positions before market close.
+    Runs on the scheduler thread; returns the per-symbol liquidation timeline.
     """
     logger.info(" END OF DAY PROTOCOL INITIATED: LIQUIDATING ALL POSITIONS")
     try:
-        # 1. Cancel all open orders for ALL managed symbols (Free up "held" shares)
-        # Using the robust method (Get Open -> Cancel ID)
-        for symbol in TRADED_SYMBOLS:
-            try:
-                open_orders = trading_client.get_orders(GetOrdersRequest(
-                    status=QueryOrderStatus.OPEN, 
-                    symbols=[symbol]
-                ))
-                for o in open_orders:
-                    trading_client.cancel_order_by_id(o.id)
-                
-                # Wait for Alpaca to process cancellations
-                if open_orders:
-                    time.sleep(1.0) 
-            except Exception as e:
-                logger.error(f"Failed to cancel open orders for {symbol}: {e}")
-        
-        # 2. Close all positions (handle both long and short)
-        positions = trading_client.get_all_positions()
-        for p in positions:
-            if p.symbol in TRADED_SYMBOLS:
-                qty = abs(float(p.qty))
-                side = OrderSide.SELL if float(p.qty) > 0 else OrderSide.BUY
-                logger.info(f"Closing {p.qty} of {p.symbol} ({side.value}) for EOD...")
-                try:
-                    trading_client.submit_order(MarketOrderRequest(
-                        symbol=p.symbol,
-                        qty=qty,
-                        side=side,
-                        time_in_force=TimeInForce.DAY
-                    ))
-                except Exception as e:
-                    logger.error(f"Failed to liquidate {p.symbol}: {e}")
-                    
+        # Cancel open orders (freeing "held" shares) and close positions, all symbols in parallel.
+        dispatcher = OrderDispatcher(broker, trading_client, order_acks)
+        timeline = asyncio.run(dispatcher.liquidate(TRADED_SYMBOLS))
+        for step in timeline:
+            if step["status"] != "no_position":
+                logger.info(
+                    f"EOD {step['symbol']}: {step['status']} | released {step['released_ms']}ms "
+                    f"| submitted {step['submitted_ms']}ms | filled {step['filled_ms']}ms"
+                )
         logger.info(" EOD Liquidation Complete. Sleep well.")
+        return timeline
     except Exception as e:
         logger.error(f"EOD Liquidation Error: {e}")
+        return []
 
 # --- Logic Core ---
-async def execute_bot_cycle(dry_run: bool = False):
+async def execute_bot_cycle(dry_run: bool = False, symbols: list[str] | None = None):
+    """
+    One decide-and-trade cycle. `symbols` limits data fetches and orders to
+    those symbols (e.g. the ones whose prices just moved); None means the
+    whole TRADED_SYMBOLS universe. Budgeting always covers the full universe.
+    """
     run_id = str(uuid.uuid4())
-    logger.info(f"--- Starting Cycle {run_id} (Dry Run: {dry_run}) ---")
+    if symbols is None:
+        symbols = list(TRADED_SYMBOLS)
+    else:
+        requested = set(symbols)
+        symbols = [s for s in TRADED_SYMBOLS if s in requested]
+    scope = "all symbols" if len(symbols) == len(TRADED_SYMBOLS) else ", ".join(symbols)
+    logger.info(f"--- Starting Cycle {run_id} (Dry Run: {dry_run}, {scope}) ---")
     db = SessionLocal()
     try:
         # Time Check: Stop entries after 3:40 PM ET
@@ -286,85 +314,48 @@ async def execute_bot_cycle(dry_run: bool = False):
              logger.info(f" Market Closing Soon ({now_ny.strftime('%H:%M')}). Skipping new entries.")
              return
 
-        symbols = TRADED_SYMBOLS
+        if not symbols:
+            return {"run_id": run_id, "status": "skipped", "reason": "no traded symbols requested"}
         # Switch to 1-Minute bars + Live Injection for "Sliding Window" logic
         tf = TimeFrame(1, TimeFrameUnit.Minute)
-        bars = market_provider.get_bars(symbols, lookback_days=2, timeframe=tf)
+
+        # One concurrent fetch of everything this cycle needs; every later step
+        # (agent, sizing, execution) reads from this snapshot instead of refetching.
+        snapshot = await capture_snapshot(broker, trading_client, market_provider, symbols, tf)
         
         # --- LIVE DATA INJECTION ---
-        # Get the absolute latest trades to append as the "current partial bar"
-        latest_trades = market_provider.get_latest_trades(symbols)
-        
-        new_rows = []
-        now_ts = pd.Timestamp.now(tz='UTC')
-        
-        for symbol, trade in latest_trades.items():
-            # Append a row with current price as close/high/low/open to influence MA instantly
-            new_rows.append({
-                "symbol": symbol,
-                "timestamp": now_ts,
-                "open": trade.price,
-                "high": trade.price,
-                "low": trade.price, 
-                "close": trade.price, 
-                "volume": 0
-            })
-        
-        if new_rows:
-            live_df = pd.DataFrame(new_rows).set_index(["symbol", "timestamp"])
-            # Concatenate and resort
-            bars = pd.concat([bars, live_df])
-            bars = bars.sort_index()
-            
-        acct = trading_client.get_account()
+        # The absolute latest trades act as the "current partial bar": they move
+        # the MAs / vol for this cycle only and are never committed to signal_engine.
+        now_ts = snapshot.taken_at
+        live_prices = dict(snapshot.live_prices)
         
         # --- BUDGETING & PORTFOLIO CONTROL ---
         # Calculate 'Strategy Budget' = Cash + Value of Holdings in Strategy
         # This prevents the bot from seeing the whole account equity (which includes manual positions)
-        alpaca_positions = trading_client.get_all_positions()
-        
-        # 1. Calculate value of current managed positions
-        managed_equity = 0.0
-        current_positions = []
-        for p in alpaca_positions:
-            if p.symbol in symbols:
-                managed_equity += float(p.market_value)
-            
-            # Save for execution step later (keep all for now, we filter in calculate_orders)
-            current_positions.append({"symbol": p.symbol, "qty": float(p.qty)})
-            
-        # 2. Get available cash (use non_marginable_buying_power for 1x leverage safety, or strictly cash)
-        # Note: 'buying_power' can be 4x equity. We prefer using real cash + managed equity.
-        # Fallback to equity if cash is weird, but try cash.
-        try:
-            available_cash = float(acct.cash) 
-        except (AttributeError, TypeError, ValueError):
-            available_cash = float(acct.non_marginable_buying_power)
+        managed_equity = snapshot.managed_equity(TRADED_SYMBOLS)
+        # Real cash, not 'buying_power' (which can be 4x equity).
+        available_cash = snapshot.available_cash
 
         strategy_budget = available_cash + managed_equity
         logger.info(f" Budgeting: Cash=${available_cash:,.2f} + Managed=${managed_equity:,.2f} = Budget=${strategy_budget:,.2f}")
         
         if strategy_budget < 1000:
              logger.warning(" Budget very low. Using full equity as fallback to prevent stall.")
-             strategy_budget = float(acct.equity)
+             strategy_budget = snapshot.equity
 
         # Still track total equity for metrics/agent context
-        equity = float(acct.equity)
-
-        latest_prices = bars['close'].groupby(level=0).last().to_dict()
+        equity = snapshot.equity
+        vix_val = snapshot.vix
 
         logging_svc = LoggingService(db)
         metrics_svc = MetricsService(db)
         
         # --- AGENTIC FLOW ---
-        agent = AgenticExecutor()
-        
-        vix_val = market_provider.get_vix()
-
         market_context = {
             "equity": equity,
             "vix_close": vix_val,
-            "latest_prices": latest_prices,
+            "latest_prices": dict(snapshot.latest_prices),
+            "snapshot": snapshot,
             "dry_run": dry_run,
             "epsilon": bandit_epsilon_override if bandit_epsilon_override is not None else 0.2,
             "risk_override": risk_override,
@@ -383,18 +374,27 @@ async def execute_bot_cycle(dry_run: bool = False):
              logging_svc.log_decision(run_id, params_used, {}, {}, [], reasoning=analysis_text)
              return {"run_id": run_id, "status": "shield_active", "reason": analysis_text}
 
-        signals = compute_signal(
-            bars, 
-            fast_window=params_used['fast'], 
-            slow_window=params_used['slow'],
-            threshold=params_used.get('threshold', 0.0005)
+        # Only bars newer than the last cycle are pushed; MA / vol updates are O(1) each.
+        # Symbols outside this cycle keep their last state, unless they have never
+        # been seen or lack the chosen MA windows - then their bars are fetched too.
+        windows = (params_used['fast'], params_used['slow'])
+        catch_up = [s for s in signal_engine.missing(TRADED_SYMBOLS, windows) if s not in symbols]
+        if catch_up:
+            extra, call = await timed_call(broker, "get_bars_catch_up", market_provider.get_bars, catch_up, lookback_days=2, timeframe=tf)
+            snapshot = snapshot.with_bars(extra, call)
+        signal_engine.update(snapshot.bars, windows=windows)
+        signals = signal_engine.signals(
+            params_used['fast'],
+            params_used['slow'],
+            threshold=params_used.get('threshold', 0.0005),
+            live_prices=live_prices,
+            now=now_ts,
         )
-        current_vol = compute_volatility(bars, timeframe="1m")
+        current_vol = signal_engine.volatility(live_prices=live_prices, now=now_ts)
         targets = size_position(signals, current_vol, account_value=strategy_budget, vol_target=params_used['vol_target'], vix_value=vix_val)
         
-        alpaca_positions = trading_client.get_all_positions()
-        current_positions = [{"symbol": p.symbol, "qty": float(p.qty)} for p in alpaca_positions]
-        orders_to_place = calculate_orders(current_positions, targets, latest_prices, only_allow_symbols=symbols)
+        latest_prices = snapshot.latest_prices
+        orders_to_place = calculate_orders(snapshot.position_qtys(), targets, latest_prices, only_allow_symbols=symbols)
 
         signals_dict = signals.groupby(level=0).last()['signal'].to_dict()
         
@@ -402,10 +402,12 @@ async def execute_bot_cycle(dry_run: bool = False):
         metrics_svc.record_daily_equity(equity)
         
         executed_ids = []
+        order_latency = []
         if not dry_run:
             sl_pct = params_used.get('sl_pct', 0.02)
             tp_pct = params_used.get('tp_pct', 0.05)
             
+            requests = []
             for order in orders_to_place:
                 symbol = order["symbol"]
                 curr_price = latest_prices.get(symbol, 0.0)
@@ -433,44 +435,42 @@ async def execute_bot_cycle(dry_run: bool = False):
                         side=OrderSide.SELL,
                         time_in_force=TimeInForce.DAY
                     )
-                # CANCEL PENDING ORDERS FIRST
-                # This fixes 'insufficient qty available' caused by old brackets holding shares
-                try:
-                    # Robust way: Fetch & Cancel specific symbol's open orders
-                    open_orders = trading_client.get_orders(GetOrdersRequest(
-                        status=QueryOrderStatus.OPEN, 
-                        symbols=[symbol]
-                    ))
-                    for o in open_orders:
-                        trading_client.cancel_order_by_id(o.id)
-                        # Minimal pause to ensure propagation (sync client blocks anyway but good to be safe)
-                        await asyncio.sleep(0.1) 
-                except Exception as e:
-                    logger.warning(f"Failed to cancel open orders for {symbol}: {e}")
-
-                try:
-                    tx = trading_client.submit_order(req)
-                    executed_ids.append(str(tx.id))
-                    
-                    # Create precise Order record with parent ID for tracking
-                    new_order = Order(
-                        run_id=run_id,
-                        symbol=symbol,
-                        qty=order["qty"],
-                        side=order["side"],
-                        status="submitted",
-                        alpaca_id=str(tx.id)
-                    )
-                    db.add(new_order)
-                    db.commit()
-                except Exception as e:
-                    logger.error(f"Order Failed {symbol}: {e}")
-                    logging_svc.update_order_status(run_id, symbol, "failed")
+                requests.append((order, req))
+
+            # Pending orders are cancelled first: old brackets holding shares
+            # cause 'insufficient qty available' on the new order.
+            dispatcher = OrderDispatcher(broker, trading_client, order_acks)
+            order_latency = await dispatcher.dispatch(requests)
+
+            for result in order_latency:
+                if result["status"] != "submitted":
+                    logging_svc.update_order_status(run_id, result["symbol"], "failed")
+                    continue
+                executed_ids.append(result["order_id"])
+                # Create precise Order record with parent ID for tracking
+                db.add(Order(
+                    run_id=run_id,
+                    symbol=result["symbol"],
+                    qty=result["qty"],
+                    side=result["side"],
+                    status="submitted",
+                    alpaca_id=result["order_id"]
+                ))
+            if executed_ids:
+                db.commit()
         
-        return {"run_id": run_id, "status": "success", "params": params_used, "orders_count": len(orders_to_place), "executed_ids": executed_ids}
+        return {"run_id": run_id, "status": "success", "params": params_used, "orders_count": len(orders_to_place), "executed_ids": executed_ids, "order_latency": order_latency, "symbols": symbols,
+                "upstream_calls": [asdict(c) for c in snapshot.calls]}
     finally:
         db.close()
 
+# Every cycle goes through here so concurrent triggers / requests never overlap.
+cycle_runner = CycleRunner(execute_bot_cycle)
+
+async def run_triggered_cycle(symbols: list[str] | None = None):
+    # A price trigger needs data newer than any cycle already in flight.
+    return await cycle_runner.run(dry_run=False, symbols=symbols, fresh=True)
+
 # --- API Endpoints ---
 @app.websocket("/ws/logs")
 async def websocket_endpoint(websocket: WebSocket):
@@ -487,7 +487,15 @@ class RunBotIn(BaseModel):
 
 @app.post("/bot/run_once")
 async def run_bot(params: RunBotIn):
-    return await execute_bot_cycle(params.dry_run)
+    return await cycle_runner.run(dry_run=params.dry_run)
+
+@app.get("/bot/cycle_stats")
+def get_cycle_stats():
+    return cycle_runner.stats()
+
+@app.get("/bot/agent_stats")
+def get_agent_stats():
+    return agent.stats()
 
 @app.post("/bot/backtest")
 def trigger_backtest(background_tasks: BackgroundTasks):
@@ -496,13 +504,53 @@ def trigger_backtest(background_tasks: BackgroundTasks):
     return {"status": "started"}
 
 @app.get("/bot/metrics")
-def get_bot_metrics():
+def get_bot_metrics(
+    max_points: int | None = None,
+    from_: Annotated[datetime | None, Query(alias="from")] = None,
+    to: datetime | None = None,
+    resolution: str | None = None,
+):
+    """
+    Summary plus the downsampled equity curve; with from / to / resolution
+    ("1m", "1h", "1d" or "auto") the curve is replaced by OHLC buckets
+    from the rollup tables.
+    """
+    if max_points is not None and max_points < 2:
+        raise HTTPException(status_code=400, detail="max_points must be at least 2")
+    ranged = from_ is not None or to is not None or resolution is not None
     db = SessionLocal()
     try:
-        return MetricsService(db).get_metrics()
+        svc = MetricsService(db)
+        metrics = svc.get_metrics(max_points=max_points, history=not ranged)
+        if ranged:
+            try:
+                metrics.update(svc.get_series(from_, to, None if resolution == "auto" else resolution, max_points))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        return metrics
     finally:
         db.close()
 
+# HTTP runs stay small and in-process; million-path runs belong to scripts/run_stress_test.py.
+MONTE_CARLO_MAX_ITERATIONS = int(os.getenv("MONTE_CARLO_MAX_ITERATIONS", "50000"))
+_monte_carlo_lock = threading.Lock()
+
+@app.get("/bot/monte_carlo")
+def get_monte_carlo(iterations: int = 1000, seed: int | None = None, method: str = "iid", block_length: int = 5):
+    if not (1 <= iterations <= MONTE_CARLO_MAX_ITERATIONS):
+        raise HTTPException(status_code=400, detail=f"iterations must be between 1 and {MONTE_CARLO_MAX_ITERATIONS:,}")
+    if method not in BOOTSTRAP_METHODS or block_length < 1:
+        raise HTTPException(status_code=400, detail=f"method must be one of {BOOTSTRAP_METHODS} with block_length >= 1")
+    if not _monte_carlo_lock.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail="A Monte Carlo run is already in progress; try again shortly.")
+    try:
+        report = run_monte_carlo(iterations=iterations, seed=seed, method=method, block_length=block_length, processes=1)
+    finally:
+        _monte_carlo_lock.release()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No trade history found. Run a backtest first.")
+    return report
+
 @app.get("/bot/bandit_stats")
 def get_bandit_stats():
     db = SessionLocal()
@@ -542,9 +590,11 @@ def record_feedback(feedback: FeedbackIn):
         if not decision:
             raise HTTPException(status_code=404, detail="Decision not found")
         bandit = EpsilonGreedyBandit(db)
-        bandit.update_arm(decision.params_used, feedback.profit)
+        bandit.update_arm(decision.params_used, feedback.profit, commit=False)
         decision.reward = feedback.profit
         db.commit()
+        agent.record_reward(decision.params_used, feedback.profit)
+        dashboard.invalidate()
         return {"status": "learned"}
     finally:
         db.close()
@@ -562,8 +612,7 @@ def get_risk_status():
     global risk_override
     vix_val = market_provider.get_vix()
     from backend.agency.sentinel import SentinelShield
-    sentinel = SentinelShield()
-    auto_regime = sentinel.analyze_vix_regime(vix_val)
+    auto_regime = SentinelShield.analyze_vix_regime(vix_val)
     active_regime = risk_override if risk_override else auto_regime
 
     tz_ny = pytz.timezone("America/New_York")
@@ -579,18 +628,47 @@ def get_risk_status():
         "block_reason": "Time cutoff (15:40 ET)" if time_blocked else ("CRISIS mode" if active_regime == "CRISIS" else None),
     }
 
+def _trade_cursor(order: Order) -> str | None:
+    return f"{order.timestamp.isoformat()}|{order.id}" if order.timestamp else None
+
+def _parse_trade_cursor(before: str) -> tuple[datetime, int]:
+    try:
+        ts, order_id = before.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(order_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="before must be a cursor returned by a previous page")
+
 @app.get("/bot/trade_history")
-def get_trade_history(limit: int = 20):
+def get_trade_history(limit: int = 20, before: str | None = None):
+    """
+    Filled orders, newest first, with the params / reward of their run's
+    decision. Each item carries a `cursor`; pass the last one as `before`
+    to fetch the next (older) page.
+    """
+    if not (1 <= limit <= 500):
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
     db = SessionLocal()
     try:
-        orders = db.query(Order).filter(
-            Order.status == "fill"
-        ).order_by(Order.timestamp.desc()).limit(limit).all()
-
-        results = []
-        for o in orders:
-            decision = db.query(Decision).filter(Decision.run_id == o.run_id).first()
-            results.append({
+        # One query: the run's first decision is joined in instead of looked up per order.
+        first_decision = (
+            select(func.min(Decision.id))
+            .where(Decision.run_id == Order.run_id)
+            .correlate(Order)
+            .scalar_subquery()
+        )
+        query = (
+            db.query(Order, Decision.params_used, Decision.reward)
+            .outerjoin(Decision, Decision.id == first_decision)
+            .filter(Order.status == "fill")
+        )
+        if before:
+            ts, order_id = _parse_trade_cursor(before)
+            query = query.filter(or_(Order.timestamp < ts, and_(Order.timestamp == ts, Order.id < order_id)))
+        rows = query.order_by(Order.timestamp.desc(), Order.id.desc()).limit(limit).all()
+
+        return [
+            {
+                "id": o.id,
                 "symbol": o.symbol,
                 "side": o.side,
                 "qty": o.qty,
@@ -598,13 +676,38 @@ def get_trade_history(limit: int = 20):
                 "status": o.status,
                 "timestamp": o.timestamp.isoformat() if o.timestamp else None,
                 "run_id": o.run_id,
-                "params_used": decision.params_used if decision else None,
-                "reward": decision.reward if decision else None,
-            })
-        return results
+                "params_used": params_used,
+                "reward": reward,
+                "cursor": _trade_cursor(o),
+            }
+            for o, params_used, reward in rows
+        ]
     finally:
         db.close()
 
+# Everything the dashboard polls, built once per DASHBOARD_REFRESH_SEC for all clients.
+DASHBOARD_TRADE_LIMIT = int(os.getenv("DASHBOARD_TRADE_LIMIT", "50"))
+dashboard = DashboardService(broker, {
+    "account": account,
+    "metrics": get_bot_metrics,
+    "bandit_stats": get_bandit_stats,
+    "risk_status": get_risk_status,
+    "trade_history": partial(get_trade_history, limit=DASHBOARD_TRADE_LIMIT),
+})
+
+@app.get("/bot/dashboard")
+async def get_dashboard(request: Request):
+    snap = await dashboard.current()
+    headers = {"ETag": snap.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snap.etag):
+        dashboard.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=snap.body, media_type="application/json", headers=headers)
+
+@app.get("/bot/dashboard_stats")
+def get_dashboard_stats():
+    return dashboard.stats()
+
 class RiskOverrideIn(BaseModel):
     mode: str | None = None  # "SAFE", "SHIELD_ACTIVE", "CRISIS", or null to clear
 
@@ -615,6 +718,7 @@ def set_risk_override(body: RiskOverrideIn):
     if body.mode not in valid:
         raise HTTPException(status_code=400, detail=f"mode must be one of {valid}")
     risk_override = body.mode
+    dashboard.invalidate()
     logger.info(f"Risk override set to: {risk_override}")
     return {"risk_override": risk_override}
 
@@ -633,8 +737,9 @@ def set_bandit_epsilon(body: EpsilonIn):
 @app.post("/bot/force_liquidate")
 def force_liquidation_endpoint():
     logger.info("MANUAL FORCE LIQUIDATION TRIGGERED")
-    liquidate_all_positions()
-    return {"status": "liquidation_triggered"}
+    timeline = liquidate_all_positions()
+    dashboard.invalidate()
+    return {"status": "liquidation_triggered", "timeline": timeline}
 
 class MarketOrderIn(BaseModel):
     symbol: str
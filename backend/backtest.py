@@ -1,4 +1,6 @@
+import os
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -7,17 +9,69 @@ from backend.db import SessionLocal
 from backend.models import Decision, DailyEquity, BanditState
 from backend.market_data import MarketDataProvider
 from backend.learning import EpsilonGreedyBandit
-from backend.strategy.ts_mom import compute_signal
-from backend.strategy.risk import compute_volatility, size_position
+from backend.backtest_engine import VectorizedBacktest
+from backend.bulk_writer import BufferedWriter
 from backend.config import TRADED_SYMBOLS
-import yfinance as yf
+from backend import yf_cache
 
 # Load env from backend folder (still needed for DB/keys if used elsewhere)
 load_dotenv("backend/.env")
 
 logger = logging.getLogger("PaperPilot")
 
-def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=True, is_training=True, inject_arms=None, timeframe="1d", **kwargs):
+# run_id prefix of run_batched_backtest's per-arm summary Decisions.
+BATCH_RUN_PREFIX = "batch_"
+
+def _load_history(provider, symbols, days_to_sim, start_date, end_date, timeframe):
+    """Fetches (bars, vix_bars, days_to_sim) for the simulation window."""
+    if timeframe == "1m":
+        from alpaca.data.timeframe import TimeFrame
+        logger.info(f"Fetching 1-Minute data from Alpaca for {symbols}...")
+        # For 1m, Alpaca is better. We'll use provider.
+        # Limit days_to_sim for 1m to avoid timeouts/overload
+        if days_to_sim > 30:
+            logger.warning("1m backtest limited to 30 days for stability.")
+            days_to_sim = 30
+        
+        bars = provider.get_bars(symbols, lookback_days=days_to_sim, timeframe=TimeFrame.Minute)
+        
+        # For VIX (Regime), we still need yfinance (Daily)
+        vix_raw = yf_cache.download(["^VIX"], start_date, end_date, interval="1d")
+        vix_bars = vix_raw.xs("^VIX", level="symbol") if not vix_raw.empty else None
+    else:
+        logger.info("Fetching Daily data from Yahoo Finance (cached)...")
+        bars = yf_cache.download(list(symbols) + ["^VIX"], start_date, end_date, interval="1d")
+        vix_bars = bars.xs("^VIX", level="symbol") if "^VIX" in bars.index.get_level_values("symbol").unique() else None
+        bars = bars[bars.index.get_level_values("symbol") != "^VIX"]
+
+    return bars, vix_bars, days_to_sim
+
+def _sim_start_index(dates, days_to_sim, timeframe):
+    if timeframe == "1m":
+        # For intraday, the provider already fetched Exactly the days_to_sim.
+        # So we start from the beginning of the fetched data.
+        sim_start_index = 0
+    else:
+        # For Daily, we might have fetched extra for vol lookbacks.
+        sim_start_index = len(dates) - days_to_sim
+    
+    if sim_start_index < 0:
+        logger.warning("Not enough data. Starting from earliest possible point.")
+        sim_start_index = 0
+    return sim_start_index
+
+def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=True, is_training=True, inject_arms=None, timeframe="1d", flush_every=None, **kwargs):
+    """
+    Replays history through the bandit + TS_MOM strategy and persists each
+    simulated bar as a Decision / DailyEquity row.
+
+    Signals, vols, sizing and next-bar SL/TP PnL come from a VectorizedBacktest
+    built once for the whole timeline; the loop below only walks the bandit.
+    Rows are buffered and bulk-inserted every `flush_every` bars
+    (BACKTEST_FLUSH_EVERY, default 50), and the in-memory bandit's stats
+    are written back in the same commit.
+    Returns {"final_equity", "equity_curve"} or None if the run failed.
+    """
     logger.info(f"--- Starting Backtest Session ({timeframe}) ---")
     
     db = SessionLocal()
@@ -28,7 +82,8 @@ def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=T
             db.query(BanditState).delete()
             db.commit()
 
-        bandit = EpsilonGreedyBandit(db)
+        # Write-behind: arm stats are persisted with each BufferedWriter flush.
+        bandit = EpsilonGreedyBandit(db, flush_every=0)
         if inject_arms:
             bandit.set_arms(inject_arms)
         
@@ -42,70 +97,33 @@ def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=T
         if start_date is None:
             start_date = end_date - timedelta(days=days_to_sim + 365)
         
-        if timeframe == "1m":
-            from alpaca.data.timeframe import TimeFrame
-            logger.info(f"Fetching 1-Minute data from Alpaca for {symbols}...")
-            # For 1m, Alpaca is better. We'll use provider.
-            # Limit days_to_sim for 1m to avoid timeouts/overload
-            if days_to_sim > 30:
-                logger.warning("1m backtest limited to 30 days for stability.")
-                days_to_sim = 30
-            
-            bars = provider.get_bars(symbols, lookback_days=days_to_sim, timeframe=TimeFrame.Minute)
-            
-            # For VIX (Regime), we still need yfinance (Daily)
-            vix_raw = yf.download("^VIX", start=start_date, end=end_date, interval="1d", progress=False)
-            vix_bars = vix_raw.rename(columns={'Close': 'close'})
-        else:
-            logger.info("Fetching Daily data from Yahoo Finance...")
-            download_list = list(set(symbols + ["^VIX"]))
-            raw_bars = yf.download(download_list, start=start_date, end=end_date, interval="1d", progress=False)
-            
-            if len(download_list) > 1:
-                bars = raw_bars.stack(level=1).rename_axis(['timestamp', 'symbol']).swaplevel(0, 1).sort_index()
-            else:
-                bars = raw_bars.copy()
-                bars['symbol'] = download_list[0]
-                bars = bars.set_index('symbol', append=True).swaplevel(0, 1).sort_index()
-                bars.index.names = ['symbol', 'timestamp']
-
-            bars = bars.rename(columns={
-                'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-            })
-            vix_bars = bars.xs("^VIX", level="symbol") if "^VIX" in bars.index.get_level_values("symbol").unique() else None
-            bars = bars[bars.index.get_level_values("symbol") != "^VIX"]
+        bars, vix_bars, days_to_sim = _load_history(provider, symbols, days_to_sim, start_date, end_date, timeframe)
 
-        time_level = 'timestamp'
         # Crucial: Determine the tradable timeline AFTER removing VIX
-        dates = bars.index.get_level_values(time_level).unique().sort_values()
-        
-        if timeframe == "1m":
-            # For intraday, the provider already fetched Exactly the days_to_sim.
-            # So we start from the beginning of the fetched data.
-            sim_start_index = 0
-        else:
-            # For Daily, we might have fetched extra for vol lookbacks.
-            sim_start_index = len(dates) - days_to_sim
-        
-        if sim_start_index < 0:
-            logger.warning("Not enough data. Starting from earliest possible point.")
-            sim_start_index = 0
+        dates = bars.index.get_level_values('timestamp').unique().sort_values()
+        sim_start_index = _sim_start_index(dates, days_to_sim, timeframe)
             
         logger.info(f"Simulating from {dates[sim_start_index]} to {dates[-1]}")
+
+        # STRESS TEST: Inject a 'Flash Crash' on a random bar (e.g. periodically)
+        # This forces the bot to handle a sudden -3% drop.
+        crash_mask = np.zeros(len(dates), dtype=bool)
+        if kwargs.get('stress_test'):
+            idx = np.arange(len(dates))
+            crash_mask = ((idx - sim_start_index) > 10) & (idx % 200 == 0)
+
+        # 3. Whole-timeline signals / vols / next-bar PnL in one pass
+        engine = VectorizedBacktest(bars, vix_bars, timeframe=timeframe, crash_mask=crash_mask)
+        equity_curve = {}
+        if flush_every is None:
+            flush_every = int(os.getenv("BACKTEST_FLUSH_EVERY", "50"))
+        writer = BufferedWriter(db, flush_every=flush_every, before_commit=lambda: bandit.flush(commit=False))
         
-        # 3. Simulation Loop
+        # 4. Simulation Loop (bandit walk only)
         for i in range(sim_start_index, len(dates) - 1):
             current_date = dates[i]
-            next_date = dates[i+1]
             
-            # Use data up to current_date
-            current_data = bars.loc[bars.index.get_level_values(time_level) <= current_date]
-            
-            # STRESS TEST: Inject a 'Flash Crash' on a random bar (e.g. periodically)
-            # This forces the bot to handle a sudden -3% drop.
-            is_crash = False
-            if kwargs.get('stress_test') and (i - sim_start_index) > 10 and (i % 200 == 0):
-                is_crash = True
+            if crash_mask[i]:
                 logger.warning(f" FLASH CRASH SIMULATED at {current_date} ")
             
             # A. Bandit Choose
@@ -115,83 +133,22 @@ def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=T
                 # Validation mode: Always exploit the best arm found during training
                 params_used = bandit.get_best_arm()
             
-            # B. Strategy & Signals
-            signals = compute_signal(
-                current_data, 
-                fast_window=params_used['fast'], 
-                slow_window=params_used['slow'],
-                threshold=params_used.get('threshold', 0.0005)
-            )
-            
-            # C. Risk Scaling
-            current_vol = compute_volatility(current_data, timeframe=timeframe)
-            
-            # Extract VIX for regime detection. 
-            # If intraday, we match the current_date's calendar date to the VIX daily close.
-            vix_today = 20.0
-            if vix_bars is not None:
-                v_lookup = current_date.normalize() if hasattr(current_date, 'normalize') else current_date
-                if v_lookup in vix_bars.index:
-                    vix_today = vix_bars.loc[v_lookup]['close']
-
-            targets = size_position(
-                signals, 
-                current_vol, 
-                account_value=equity, 
-                vol_target=params_used['vol_target'],
-                vix_value=vix_today
-            )
-            
-            # D. Simulated PnL (T to T+1)
-            daily_pnl = 0.0
-            
-            # Extract SL/TP from params or use defaults
-            sl_pct = params_used.get('sl_pct', 0.02)
-            tp_pct = params_used.get('tp_pct', 0.05)
-            stop_triggered = False
-            tp_triggered = False
-            
-            prices_t = bars.xs(current_date, level=time_level)
-            prices_t1 = bars.xs(next_date, level=time_level)
-            
-            for symbol, target_usd in targets.items():
-                if symbol in prices_t.index and symbol in prices_t1.index:
-                    s_t = prices_t.loc[symbol]
-                    s_t1 = prices_t1.loc[symbol]
-                    
-                    price_initial = s_t['close']
-                    price_final = s_t1['close']
-                    price_high = s_t1['high']
-                    price_low = s_t1['low']
-                    
-                    if is_crash:
-                        # Force a deep wick down to trigger SL
-                        price_low = price_initial * 0.97
-                        price_final = price_initial * 0.975 # Partial recovery
-                    
-                    # Size weighted impact
-                    # We check if Low hit SL or High hit TP during the next bar
-                    # (Note: This is a daily approximation. For 1-min bars, it's very accurate)
-                    
-                    # 1. Check Stop Loss
-                    if (price_low - price_initial) / price_initial < -sl_pct:
-                        daily_pnl += (target_usd / price_initial) * (price_initial * (1 - sl_pct) - price_initial)
-                        stop_triggered = True
-                    # 2. Check Take Profit
-                    elif (price_high - price_initial) / price_initial > tp_pct:
-                        daily_pnl += (target_usd / price_initial) * (price_initial * (1 + tp_pct) - price_initial)
-                        tp_triggered = True
-                    else:
-                        daily_pnl += (target_usd / price_initial) * (price_final - price_initial)
+            # B-D. Signals, risk scaling and simulated PnL (T to T+1)
+            path = engine.arm_path(params_used)
+            sig_dict, weights = engine.row(i, params_used)
+            targets = {symbol: equity * w for symbol, w in weights.items()}
+            daily_pnl = equity * float(path.returns[i])
+            stop_triggered = bool(path.stop_hit[i])
+            tp_triggered = bool(path.take_hit[i])
             
             # E. Update Training State
             equity += daily_pnl
+            equity_curve[current_date] = equity
             if is_training:
                 bandit.update_arm(params_used, daily_pnl)
             
             # F. Persist to DB
             run_id = f"sim_{current_date.strftime('%Y%m%d')}"
-            sig_dict = signals.groupby(level=0).last()['signal'].to_dict()
             
             # Generate Analysis Text
             reasons = []
@@ -210,33 +167,31 @@ def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=T
             if tp_triggered:
                 analysis_text += " |  TAKE PROFIT TRIGGERED"
 
-            decision = Decision(
-                run_id=run_id,
-                timestamp=pd.to_datetime(current_date).to_pydatetime(),
-                params_used=params_used,
-                signals=sig_dict,
-                targets=targets,
-                reasoning=analysis_text,
-                reward=daily_pnl
-            )
-            db.merge(decision)
+            writer.add(Decision, {
+                "run_id": run_id,
+                "timestamp": pd.to_datetime(current_date).to_pydatetime(),
+                "params_used": params_used,
+                "signals": sig_dict,
+                "targets": targets,
+                "reasoning": analysis_text,
+                "reward": daily_pnl
+            })
             
-            eq_record = DailyEquity(
-                date=pd.to_datetime(current_date).to_pydatetime(),
-                equity=equity,
-                drawdown_pct=0.0,
-                source="backtest"
-            )
-            db.merge(eq_record)
+            writer.add(DailyEquity, {
+                "date": pd.to_datetime(current_date).to_pydatetime(),
+                "equity": equity,
+                "drawdown_pct": 0.0,
+                "source": "backtest"
+            })
             
-            if (i - sim_start_index) % 10 == 0:
+            # Each flush commits, so the Dashboard still shows live progress.
+            if writer.step():
                 year_indicator = current_date.year
                 logger.info(f" [{year_indicator}] Progress: {current_date.date()} | Equity: ${equity:,.0f} | Last PnL: ${daily_pnl:,.2f}")
-                # Commit every 10 steps so the Dashboard shows live progress!
-                db.commit()
                 
-        db.commit()
+        writer.flush()
         logger.info(" Deep Training Complete. 5 years of history processed.")
+        return {"final_equity": equity, "equity_curve": pd.Series(equity_curve, name="equity")}
         
     except Exception as e:
         logger.error(f" Backtest Failed: {e}")
@@ -245,6 +200,79 @@ def run_backtest(days_to_sim=200, start_date=None, end_date=None, reset_bandit=T
     finally:
         db.close()
 
+def run_batched_backtest(arms, days_to_sim=200, start_date=None, end_date=None, reset_bandit=True, timeframe="1d", seed_bandit=True,
+                         record_decisions=False):
+    """
+    Evaluates every arm in `arms` over the same window in a single batched
+    pass (see VectorizedBacktest.evaluate_arms) instead of one arm per bar.
+
+    Each arm is scored as if it had been held for the whole window. With
+    `seed_bandit`, the per-arm totals are written to BanditState so a
+    follow-up run_backtest starts from an informed bandit. No per-bar
+    Decision/DailyEquity rows are written; with `record_decisions`, one
+    summary Decision per arm is, for StrategyAdvisor. Summary rows carry
+    their stats in `signals` and leave `reward` NULL, so they never enter
+    the per-bar reward stream that Monte Carlo resamples.
+
+    Returns {"arms", "rewards" (arm x bar ndarray), "dates"} or None on failure.
+    """
+    logger.info(f"--- Starting Batched Backtest ({len(arms)} arms, {timeframe}) ---")
+
+    db = SessionLocal()
+    provider = MarketDataProvider()
+    try:
+        if reset_bandit:
+            db.query(BanditState).delete()
+            db.commit()
+
+        if end_date is None:
+            end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=days_to_sim + 365)
+
+        bars, vix_bars, days_to_sim = _load_history(provider, TRADED_SYMBOLS, days_to_sim, start_date, end_date, timeframe)
+        dates = bars.index.get_level_values('timestamp').unique().sort_values()
+        sim_start_index = _sim_start_index(dates, days_to_sim, timeframe)
+        logger.info(f"Evaluating from {dates[sim_start_index]} to {dates[-1]}")
+
+        engine = VectorizedBacktest(bars, vix_bars, timeframe=timeframe)
+        rewards = engine.evaluate_arms(arms, start_index=sim_start_index)
+
+        if seed_bandit:
+            EpsilonGreedyBandit(db).seed_rewards(arms, rewards)
+
+        totals = rewards.sum(axis=1)
+        if record_decisions:
+            writer = BufferedWriter(db, flush_every=len(arms))
+            end_ts = pd.to_datetime(dates[-1]).to_pydatetime()
+            run_id = f"{BATCH_RUN_PREFIX}{end_ts.strftime('%Y%m%d')}"
+            for arm, arm_rewards, total in zip(arms, rewards, totals):
+                win_rate = float((arm_rewards > 0).mean()) if len(arm_rewards) else 0.0
+                writer.add(Decision, {
+                    "run_id": run_id,
+                    "timestamp": end_ts,
+                    "params_used": arm,
+                    "signals": {"total_pnl": float(total), "bars": len(arm_rewards), "win_rate": win_rate},
+                    "reasoning": (
+                        f"Strategy: TS_MOM | Params: {arm['fast']}/{arm['slow']} | VolTarget: {arm['vol_target']} | "
+                        f"Batched backtest over {len(arm_rewards)} bars from {dates[sim_start_index]:%Y-%m-%d} | "
+                        f"Win rate: {win_rate:.1%}"
+                    ),
+                })
+            writer.flush()
+
+        for k in np.argsort(totals)[::-1][:5]:
+            logger.info(f" Top arm {arms[k]} | Total PnL: ${totals[k]:,.2f}")
+
+        return {"arms": arms, "rewards": rewards, "dates": dates[sim_start_index:-1]}
+
+    except Exception as e:  # noqa: BLE001 - logged with traceback, like run_backtest
+        logger.error(f" Batched Backtest Failed: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+    finally:
+        db.close()
+
 if __name__ == "__main__":
     # Setup console logging for standalone run
     logging.basicConfig(
@@ -0,0 +1,204 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from backend.strategy.risk import position_weights, volatility_matrix
+from backend.strategy.ts_mom import momentum_signal
+
+# Synthetic flash-crash bar: the next bar wicks 3% down and closes 2.5% down.
+CRASH_LOW = 0.97
+CRASH_CLOSE = 0.975
+
+
+@dataclass
+class ArmPath:
+    """Whole-timeline outcome of holding one parameter set on every bar."""
+    returns: np.ndarray     # (T-1,) portfolio return from bar i to bar i+1
+    stop_hit: np.ndarray    # (T-1,) any sized symbol hit its stop loss
+    take_hit: np.ndarray    # (T-1,) any sized symbol hit its take profit
+
+
+def _arm_key(params: dict) -> tuple:
+    return (
+        params['fast'],
+        params['slow'],
+        params.get('threshold', 0.0005),
+        params['vol_target'],
+        params.get('sl_pct', 0.02),
+        params.get('tp_pct', 0.05),
+    )
+
+
+def _align_vix(vix_bars, dates) -> np.ndarray:
+    """One VIX close per bar, matched on calendar day (defaults to 20.0)."""
+    vix = np.full(len(dates), 20.0)
+    if vix_bars is None:
+        return vix
+    days = dates.normalize() if hasattr(dates, 'normalize') else dates
+    lookup = {}
+    for j, day in enumerate(days):
+        if day not in lookup:
+            lookup[day] = float(vix_bars.loc[day]['close']) if day in vix_bars.index else 20.0
+        vix[j] = lookup[day]
+    return vix
+
+
+class VectorizedBacktest:
+    """
+    Whole-history simulation over aligned (time x symbol) NumPy arrays.
+
+    Signals, volatility, position weights and next-bar SL/TP PnL are computed
+    once for the full timeline instead of re-running compute_signal and
+    compute_volatility on every prefix. Every rolling window only looks
+    backwards, so row i matches what the per-bar loop saw at bar i.
+    """
+
+    def __init__(self, bars: pd.DataFrame, vix_bars=None, timeframe: str = "1d", vol_window: int = 20, crash_mask=None):
+        bars = bars.sort_index()
+        closes = bars['close'].unstack(level=0)
+
+        self.dates = closes.index
+        self.symbols = list(closes.columns)
+        self.close = closes.to_numpy(dtype=float)
+        self.high = bars['high'].unstack(level=0).reindex_like(closes).to_numpy(dtype=float)
+        self.low = bars['low'].unstack(level=0).reindex_like(closes).to_numpy(dtype=float)
+
+        # size_position joins each prefix's signals with its vol (NaN rows
+        # kept, see compute_volatility) and takes groupby().last(), which
+        # skips NaNs per column: the signal at bar i, paired with the latest
+        # valid vol. Forward-filling vol and reading the signal at i is the
+        # same thing, also across a missing bar.
+        self.vol = volatility_matrix(closes, window=vol_window, timeframe=timeframe).ffill().to_numpy(dtype=float)
+        self.vix = _align_vix(vix_bars, self.dates)
+
+        # A symbol only enters the book once it has traded.
+        self.listed = np.maximum.accumulate(~np.isnan(self.close), axis=0)
+
+        n = len(self.dates)
+        self.crash = np.zeros(n, dtype=bool) if crash_mask is None else np.asarray(crash_mask, dtype=bool)
+
+        # Next-bar moves: row i describes holding from bar i to bar i+1.
+        p0 = self.close[:-1]
+        p1 = self.close[1:].copy()
+        lo = self.low[1:].copy()
+        hi = self.high[1:]
+        crash = self.crash[:-1]
+        lo[crash] = p0[crash] * CRASH_LOW
+        p1[crash] = p0[crash] * CRASH_CLOSE
+
+        self._p0 = p0
+        self._hi = hi
+        self._lo = lo
+        self._p1 = p1
+        self._tradable = np.isfinite(p0) & np.isfinite(p1) & np.isfinite(hi) & np.isfinite(lo) & (p0 != 0)
+
+        self._ma_cache: dict[int, np.ndarray] = {}
+        self._path_cache: dict[tuple, ArmPath] = {}
+
+    def moving_average(self, window: int) -> np.ndarray:
+        """Rolling mean of closes, shared by every arm using this window."""
+        if window not in self._ma_cache:
+            self._ma_cache[window] = pd.DataFrame(self.close).rolling(window=window).mean().to_numpy()
+        return self._ma_cache[window]
+
+    def signals(self, params: dict) -> np.ndarray:
+        return momentum_signal(
+            self.moving_average(params['fast']),
+            self.moving_average(params['slow']),
+            params.get('threshold', 0.0005),
+        )
+
+    def weights(self, params: dict) -> np.ndarray:
+        return position_weights(self.signals(params), self.vol, vol_target=params['vol_target'], vix_value=self.vix)
+
+    def exit_prices(self, sl_pct: float, tp_pct: float):
+        """
+        Exit price per (bar, symbol) for the given bracket, plus SL/TP hit masks.
+        The stop is checked before the take profit, as with a daily bar we
+        can't tell which was touched first.
+        """
+        p0 = self._p0
+        with np.errstate(invalid='ignore'):
+            stop = (self._lo - p0) / p0 < -sl_pct
+            take = ~stop & ((self._hi - p0) / p0 > tp_pct)
+        exit_px = np.where(stop, p0 * (1 - sl_pct), np.where(take, p0 * (1 + tp_pct), self._p1))
+        return exit_px, stop & self._tradable, take & self._tradable
+
+    def arm_path(self, params: dict) -> ArmPath:
+        """Portfolio returns for holding `params` on every bar (cached per arm)."""
+        key = _arm_key(params)
+        if key not in self._path_cache:
+            w = self.weights(params)[:-1]
+            exit_px, stop, take = self.exit_prices(params.get('sl_pct', 0.02), params.get('tp_pct', 0.05))
+            with np.errstate(invalid='ignore'):
+                contrib = np.where(self._tradable, (w / self._p0) * (exit_px - self._p0), 0.0)
+            self._path_cache[key] = ArmPath(
+                returns=contrib.sum(axis=1),
+                stop_hit=stop.any(axis=1),
+                take_hit=take.any(axis=1),
+            )
+        return self._path_cache[key]
+
+    def row(self, i: int, params: dict) -> tuple[dict, dict]:
+        """Per-symbol signal and weight at bar i, for symbols listed by then."""
+        listed = self.listed[i]
+        sig = momentum_signal(
+            self.moving_average(params['fast'])[i],
+            self.moving_average(params['slow'])[i],
+            params.get('threshold', 0.0005),
+        )
+        w = position_weights(sig[listed], self.vol[i][listed], vol_target=params['vol_target'], vix_value=self.vix[i])
+        symbols = [s for s, ok in zip(self.symbols, listed) if ok]
+        return (
+            {s: float(v) for s, v in zip(symbols, sig[listed])},
+            {s: float(v) for s, v in zip(symbols, w)},
+        )
+
+    def evaluate_arms(self, arms: list[dict], start_index: int = 0, initial_equity: float = 100000.0, chunk_size: int = 64) -> np.ndarray:
+        """
+        Evaluates every arm over the whole window in one batched pass.
+
+        Builds (arm x time x symbol) tensors of signals, weights and next-bar
+        PnL, with one rolling mean per distinct window and the shared vol
+        series. Each arm compounds its own equity from `initial_equity`.
+        Arms are processed `chunk_size` at a time to bound memory.
+
+        Returns the (arm x bar) matrix of dollar rewards for bars
+        start_index .. T-2, i.e. what update_arm would have received.
+        """
+        windows = sorted({a['fast'] for a in arms} | {a['slow'] for a in arms})
+        ma = np.stack([self.moving_average(w)[:-1] for w in windows])
+        window_idx = {w: k for k, w in enumerate(windows)}
+
+        rewards = np.empty((len(arms), len(self.dates) - 1 - start_index))
+        for lo in range(0, len(arms), chunk_size):
+            chunk = arms[lo:lo + chunk_size]
+            fast = ma[[window_idx[a['fast']] for a in chunk]]
+            slow = ma[[window_idx[a['slow']] for a in chunk]]
+            threshold = np.array([a.get('threshold', 0.0005) for a in chunk])[:, None, None]
+            vol_target = np.array([a['vol_target'] for a in chunk])[:, None]
+            sl = np.array([a.get('sl_pct', 0.02) for a in chunk])[:, None, None]
+            tp = np.array([a.get('tp_pct', 0.05) for a in chunk])[:, None, None]
+
+            sig = momentum_signal(fast, slow, threshold)
+            w = position_weights(sig, self.vol[:-1], vol_target=vol_target, vix_value=self.vix[:-1])
+
+            p0 = self._p0
+            with np.errstate(invalid='ignore'):
+                stop = (self._lo - p0) / p0 < -sl
+                take = ~stop & ((self._hi - p0) / p0 > tp)
+                exit_px = np.where(stop, p0 * (1 - sl), np.where(take, p0 * (1 + tp), self._p1))
+                contrib = np.where(self._tradable, (w / p0) * (exit_px - p0), 0.0)
+            returns = contrib.sum(axis=2)[:, start_index:]
+
+            equity_after = initial_equity * np.cumprod(1.0 + returns, axis=1)
+            equity_before = np.concatenate([np.full((len(chunk), 1), initial_equity), equity_after[:, :-1]], axis=1)
+            rewards[lo:lo + len(chunk)] = equity_before * returns
+        return rewards
+
+    def equity_curve(self, params: dict, start_index: int = 0, initial_equity: float = 100000.0) -> pd.Series:
+        """Equity after each bar when one arm is held throughout (no bandit)."""
+        returns = self.arm_path(params).returns[start_index:]
+        equity = initial_equity * np.cumprod(1.0 + returns)
+        return pd.Series(equity, index=self.dates[start_index:-1], name="equity")
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from backend.db import DB_DIR
+
+logger = logging.getLogger("BarStore")
+
+BAR_COLUMNS = ["open", "high", "low", "close", "volume", "trade_count", "vwap"]
+_COVERAGE_FILE = "_coverage.json"
+
+
+def _is_intraday(timeframe: str) -> bool:
+    return timeframe.endswith(("Min", "Hour"))
+
+
+def _partition_keys(index: pd.DatetimeIndex, timeframe: str) -> pd.Index:
+    """Intraday bars go in one file per UTC day, daily and slower in one per year."""
+    return index.strftime("%Y-%m-%d" if _is_intraday(timeframe) else "%Y")
+
+
+def _utc(ts) -> pd.Timestamp:
+    """Naive datetimes are treated as UTC, same as the Alpaca API does."""
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def empty_bars() -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays(
+        [pd.Index([], dtype=object), pd.DatetimeIndex([], tz="UTC")],
+        names=["symbol", "timestamp"],
+    )
+    return pd.DataFrame(columns=BAR_COLUMNS, index=index, dtype=float)
+
+
+class BarStore:
+    """
+    On-disk Parquet cache of OHLCV bars.
+
+    Partitioned as <root>/<timeframe>/<symbol>/<YYYY-MM-DD>.parquet for
+    intraday timeframes (UTC days) and <YYYY>.parquet for daily bars, with a small _coverage.json per symbol recording the [start, end] range
+    that has already been fetched from upstream. Bars are returned in the
+    same (symbol, timestamp) MultiIndex shape as alpaca-py's BarSet.df.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = root or os.getenv("BAR_CACHE_DIR", os.path.join(DB_DIR, "bar_cache"))
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, timeframe, symbol)
+
+    def _partition_path(self, symbol: str, timeframe: str, key: str) -> str:
+        return os.path.join(self._dir(symbol, timeframe), f"{key}.parquet")
+
+    def _coverage_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self._dir(symbol, timeframe), _COVERAGE_FILE)
+
+    def _read_partition(self, symbol: str, timeframe: str, key: str, columns: list[str] | None = None) -> pd.DataFrame | None:
+        """
+        The partition for `key`, or None if it is missing or unreadable. An
+        unreadable partition is deleted along with the symbol's coverage, so
+        the next missing_ranges call re-fetches the symbol in full.
+        """
+        path = self._partition_path(symbol, timeframe, key)
+        try:
+            return pd.read_parquet(path, columns=columns)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable bar partition {path}: {e}")
+            self._drop_coverage(symbol, timeframe)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_partition(self, rows: pd.DataFrame, path: str) -> None:
+        # Write-then-rename so a parallel reader never sees half a partition.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        rows.to_parquet(tmp)
+        os.replace(tmp, path)
+
+    def _drop_coverage(self, symbol: str, timeframe: str) -> None:
+        try:
+            os.remove(self._coverage_path(symbol, timeframe))
+        except FileNotFoundError:
+            pass
+
+    def coverage(self, symbol: str, timeframe: str) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+        path = self._coverage_path(symbol, timeframe)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return _utc(data["start"]), _utc(data["end"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _set_coverage(self, symbol: str, timeframe: str, start: pd.Timestamp, end: pd.Timestamp) -> None:
+        os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+        path = self._coverage_path(symbol, timeframe)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"start": start.isoformat(), "end": end.isoformat()}, f)
+        os.replace(tmp, path)
+
+    def last_bar(self, symbol: str, timeframe: str) -> pd.Timestamp | None:
+        """Timestamp of the newest cached bar for `symbol`, read from its newest partition."""
+        try:
+            names = sorted(n for n in os.listdir(self._dir(symbol, timeframe)) if n.endswith(".parquet"))
+        except OSError:
+            return None
+        if not names:
+            return None
+        frame = self._read_partition(symbol, timeframe, names[-1][:-len(".parquet")], columns=[])
+        if frame is None or not len(frame.index):
+            return None
+        return _utc(frame.index.max())
+
+    def missing_ranges(self, symbols: list[str], timeframe: str, start: datetime, end: datetime) -> dict[tuple, list[str]]:
+        """
+        Ranges still to fetch for [start, end], grouped so symbols with the same
+        gap share one upstream request: {(fetch_start, fetch_end): [symbols]}.
+
+        The tail is re-fetched from the newest cached bar (inclusive), not the
+        end of the last request, so a bar that was still forming when it was
+        cached (today's 1Day bar, the current 1Min bar) gets overwritten. A
+        symbol whose newest partition is unreadable is fetched in full.
+        """
+        start, end = _utc(start), _utc(end)
+        ranges: dict[tuple, list[str]] = {}
+        for symbol in symbols:
+            covered = self.coverage(symbol, timeframe)
+            if covered is None or end < covered[0] or start > covered[1]:
+                gaps = [(start, end)]
+            else:
+                gaps = []
+                if start < covered[0]:
+                    gaps.append((start, covered[0]))
+                if end > covered[1]:
+                    last = self.last_bar(symbol, timeframe)
+                    if last is None and self.coverage(symbol, timeframe) is None:
+                        gaps = [(start, end)]
+                    else:
+                        gaps.append((min(covered[1], last) if last is not None else covered[1], end))
+            for gap in gaps:
+                ranges.setdefault(gap, []).append(symbol)
+        return ranges
+
+    def write(self, bars: pd.DataFrame, timeframe: str, symbols: list[str], start: datetime, end: datetime) -> None:
+        """
+        Merges freshly fetched `bars` into their partitions (newer rows win)
+        and extends coverage for every symbol that was requested over
+        [start, end], including ones that returned no bars. An unreadable
+        partition is rebuilt from `bars` and its symbol's coverage restarts
+        at [start, end].
+        """
+        start, end = _utc(start), _utc(end)
+        if bars is not None and not bars.empty:
+            for symbol, frame in bars.groupby(level=0):
+                frame = frame.droplevel(0)
+                index = pd.DatetimeIndex(frame.index)
+                frame.index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+                frame = frame.reindex(columns=BAR_COLUMNS)
+                os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+                for key, rows in frame.groupby(_partition_keys(frame.index, timeframe)):
+                    path = self._partition_path(symbol, timeframe, key)
+                    cached = self._read_partition(symbol, timeframe, key)
+                    if cached is not None:
+                        rows = pd.concat([cached, rows])
+                        rows = rows[~rows.index.duplicated(keep="last")]
+                    self._write_partition(rows.sort_index(), path)
+
+        for symbol in symbols:
+            covered = self.coverage(symbol, timeframe)
+            if covered is None or end < covered[0] or start > covered[1]:
+                self._set_coverage(symbol, timeframe, start, end)
+            else:
+                self._set_coverage(symbol, timeframe, min(start, covered[0]), max(end, covered[1]))
+
+    def read(self, symbols: list[str], timeframe: str, start: datetime, end: datetime) -> pd.DataFrame:
+        """Cached bars for `symbols` within [start, end]; unreadable partitions are skipped."""
+        start, end = _utc(start), _utc(end)
+        keys = _partition_keys(pd.date_range(start.normalize(), end.normalize(), freq="D"), timeframe).unique()
+        frames = []
+        for symbol in symbols:
+            parts = []
+            for key in keys:
+                part = self._read_partition(symbol, timeframe, key)
+                if part is not None:
+                    parts.append(part)
+            if not parts:
+                continue
+            frame = pd.concat(parts)
+            frame = frame[(frame.index >= start) & (frame.index <= end)]
+            frame.index.name = "timestamp"
+            frames.append(pd.concat({symbol: frame}, names=["symbol"]))
+
+        if not frames:
+            return empty_bars()
+        return pd.concat(frames).sort_index()
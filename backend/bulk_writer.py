@@ -0,0 +1,47 @@
+import logging
+from collections import defaultdict
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("BulkWriter")
+
+
+class BufferedWriter:
+    """
+    Collects rows in memory and writes them with one executemany INSERT per
+    model every `flush_every` steps, instead of a db.merge (SELECT + INSERT)
+    per row. Each flush commits, so anything else pending on the session
+    lands in the same transaction and the dashboard sees progress at flush
+    granularity. `before_commit` runs just before that commit, e.g. to write
+    back a write-behind bandit.
+    """
+
+    def __init__(self, db: Session, flush_every: int = 50, before_commit=None):
+        self.db = db
+        self.flush_every = max(1, flush_every)
+        self.before_commit = before_commit
+        self._pending: dict[type, list[dict]] = defaultdict(list)
+        self._steps = 0
+        self.rows_written = 0
+
+    def add(self, model, values: dict) -> None:
+        self._pending[model].append(values)
+
+    def step(self) -> bool:
+        """Marks one simulation step done; flushes and returns True every flush_every steps."""
+        self._steps += 1
+        if self._steps % self.flush_every == 0:
+            self.flush()
+            return True
+        return False
+
+    def flush(self) -> None:
+        for model, rows in self._pending.items():
+            if rows:
+                self.db.execute(insert(model), rows)
+                self.rows_written += len(rows)
+        self._pending.clear()
+        if self.before_commit is not None:
+            self.before_commit()
+        self.db.commit()
@@ -1,11 +1,63 @@
+import heapq
 import random
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from .models import BanditState
 
+# Rows per upsert statement, well under SQLite's bound-parameter limit.
+_UPSERT_CHUNK = 200
+
+
+def _add_deltas(db: Session, deltas: dict[str, tuple[int, float]]):
+    """
+    Adds {param_key: (trials, reward)} to BanditState in the database itself
+    (INSERT ... ON CONFLICT DO UPDATE SET trials = trials + ...), so writers
+    sharing the table never lose each other's counts.
+    """
+    items = list(deltas.items())
+    for i in range(0, len(items), _UPSERT_CHUNK):
+        stmt = sqlite_insert(BanditState).values([
+            {"param_key": key, "trials": trials, "total_reward": reward, "avg_reward": reward / trials if trials else 0.0}
+            for key, (trials, reward) in items[i:i + _UPSERT_CHUNK]
+        ])
+        trials = func.coalesce(BanditState.trials, 0) + stmt.excluded.trials
+        total = func.coalesce(BanditState.total_reward, 0.0) + stmt.excluded.total_reward
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[BanditState.param_key],
+            set_={"trials": trials, "total_reward": total, "avg_reward": case((trials > 0, total / trials), else_=0.0)},
+        ))
+    # The upsert bypasses the ORM; drop any BanditState this session already holds.
+    for obj in list(db.identity_map.values()):
+        if isinstance(obj, BanditState) and obj.param_key in deltas:
+            db.expire(obj)
+
+
 class EpsilonGreedyBandit:
-    def __init__(self, db: Session, epsilon: float = 0.2):
+    """
+    Epsilon-greedy bandit over strategy parameter sets.
+
+    BanditState is read once on construction into an in-memory arm table
+    (trials / total reward lists indexed by arm id), so choose/update never
+    touch the DB. The best arm comes from a lazy max-heap keyed on average
+    reward. Updates are written back as deltas every `flush_every` updates
+    (1 = write-through, 0 = only on flush()) with an atomic upsert, so
+    concurrent bandits sharing the table don't overwrite each other's counts.
+    """
+
+    def __init__(self, db: Session, epsilon: float = 0.2, flush_every: int = 1):
         self.db = db
         self.epsilon = epsilon
+        self.flush_every = flush_every
+
+        # Arm table: one id per distinct param key.
+        self._ids: dict[str, int] = {}
+        self._trials: list[int] = []
+        self._totals: list[float] = []
+        self._versions: list[int] = []
+        self._pending: dict[int, list] = {}  # id -> [trials, reward] not yet persisted
+        self._updates_since_flush = 0
+
         # Default arms as a fallback
         self.arms = [
             {"fast": 15, "slow": 40, "vol_target": 0.5},   # Very Fast (Scalping 15m/40m)
@@ -16,9 +68,12 @@ class EpsilonGreedyBandit:
         self._load_arms_from_db()
 
     def _load_arms_from_db(self):
-        """Loads all parameter keys from BanditState and adds them to possible arms."""
+        """Loads all BanditState rows into the arm table and adds their params to possible arms."""
         states = self.db.query(BanditState).all()
         for s in states:
+            arm_id = self._arm_id(s.param_key)
+            self._trials[arm_id] = s.trials or 0
+            self._totals[arm_id] = s.total_reward or 0.0
             try:
                 parts = s.param_key.split("_")
                 arm = {"fast": int(parts[0]), "slow": int(parts[1]), "vol_target": float(parts[2])}
@@ -30,39 +85,58 @@ class EpsilonGreedyBandit:
                     self.arms.append(arm)
             except (ValueError, IndexError):
                 continue
+        self._index_arms()
+
+    def _arm_id(self, key: str) -> int:
+        arm_id = self._ids.get(key)
+        if arm_id is None:
+            arm_id = self._ids[key] = len(self._trials)
+            self._trials.append(0)
+            self._totals.append(0.0)
+            self._versions.append(0)
+        return arm_id
+
+    def _value(self, arm_id: int) -> float:
+        # Never-tried arms count as neutral (0.0).
+        trials = self._trials[arm_id]
+        return self._totals[arm_id] / trials if trials else 0.0
+
+    def _index_arms(self):
+        """Maps positions in self.arms to arm ids and rebuilds the best-arm heap."""
+        self._arm_pos_ids = [self._arm_id(self._get_arm_key(arm)) for arm in self.arms]
+        self._positions: dict[int, list[int]] = {}
+        for pos, arm_id in enumerate(self._arm_pos_ids):
+            self._positions.setdefault(arm_id, []).append(pos)
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        # Ties go to the earliest arm in self.arms, as with a linear scan.
+        self._heap = [
+            (-self._value(arm_id), pos, self._versions[arm_id])
+            for pos, arm_id in enumerate(self._arm_pos_ids)
+        ]
+        heapq.heapify(self._heap)
 
     def set_arms(self, arms_list: list[dict]):
         """Injects a massive set of arms for deep optimization."""
         self.arms = arms_list
+        self._index_arms()
 
-    def _get_arm_key(self, params: dict) -> str:
+    @staticmethod
+    def _get_arm_key(params: dict) -> str:
         base = f"{params['fast']}_{params['slow']}_{params['vol_target']}"
         if 'sl_pct' in params or 'tp_pct' in params or 'threshold' in params:
             base += f"_{params.get('sl_pct', 0.02)}_{params.get('tp_pct', 0.05)}_{params.get('threshold', 0.0005)}"
         return base
 
     def get_best_arm(self) -> dict:
-        # 1. Query DB for all arm stats
-        states = self.db.query(BanditState).all()
-        state_map = {s.param_key: s for s in states}
-        
-        best_arm = self.arms[1] # Default to standard
-        best_reward = -float('inf')
-        
-        for arm in self.arms:
-            key = self._get_arm_key(arm)
-            if key in state_map:
-                avg = state_map[key].avg_reward
-                if avg > best_reward:
-                    best_reward = avg
-                    best_arm = arm
-            else:
-                # If arm never tried, treat as neutral (0.0) or optimistic
-                if 0.0 > best_reward:
-                    best_reward = 0.0
-                    best_arm = arm
-                    
-        return best_arm
+        """Arm with the highest average reward (untried arms count as 0.0)."""
+        while self._heap:
+            _, pos, version = self._heap[0]
+            if version == self._versions[self._arm_pos_ids[pos]]:
+                return self.arms[pos]
+            heapq.heappop(self._heap)  # stale entry from before an update
+        return self.arms[1] # Default to standard
 
     def choose_arm(self) -> dict:
         """Selects parameters using Epsilon-Greedy strategy."""
@@ -75,19 +149,70 @@ class EpsilonGreedyBandit:
 
     def get_state(self) -> list:
         """Returns all BanditState records."""
+        self.flush(commit=False)
         return self.db.query(BanditState).all()
 
-    def update_arm(self, params: dict, reward: float):
-        """Updates the running stats for the chosen arm."""
-        key = self._get_arm_key(params)
-        
-        state = self.db.query(BanditState).filter(BanditState.param_key == key).first()
-        if not state:
-            state = BanditState(param_key=key, trials=0, total_reward=0.0, avg_reward=0.0)
-            self.db.add(state)
-        
-        state.trials += 1
-        state.total_reward += reward
-        state.avg_reward = state.total_reward / state.trials
-        
-        self.db.commit()
+    def _record(self, key: str, trials: int, reward: float, persist: bool = True):
+        arm_id = self._arm_id(key)
+        self._trials[arm_id] += trials
+        self._totals[arm_id] += reward
+        self._versions[arm_id] += 1
+        if persist:
+            pending = self._pending.setdefault(arm_id, [0, 0.0])
+            pending[0] += trials
+            pending[1] += reward
+
+        value = self._value(arm_id)
+        for pos in self._positions.get(arm_id, ()):
+            heapq.heappush(self._heap, (-value, pos, self._versions[arm_id]))
+        # Stale entries only leave the heap when they reach the top; compact
+        # occasionally so long runs don't grow it without bound.
+        if len(self._heap) > 4 * len(self.arms) + 64:
+            self._rebuild_heap()
+
+    def seed_rewards(self, arms: list[dict], rewards):
+        """
+        Folds a batched (arm x bar) reward matrix into BanditState in one commit,
+        as if update_arm had been called once per bar for every arm.
+        """
+        for arm, arm_rewards in zip(arms, rewards):
+            self._record(self._get_arm_key(arm), len(arm_rewards), float(sum(arm_rewards)))
+        self.flush()
+
+    def update_arm(self, params: dict, reward: float, commit: bool = True):
+        """
+        Updates the running stats for the chosen arm.
+        The change is persisted every `flush_every` updates; with commit=False
+        that write is only flushed, leaving the commit to the caller.
+        """
+        self._record(self._get_arm_key(params), 1, reward)
+        self._updates_since_flush += 1
+        if self.flush_every and self._updates_since_flush >= self.flush_every:
+            self.flush(commit=commit)
+
+    @classmethod
+    def add_reward(cls, db: Session, params: dict, reward: float):
+        """
+        Adds one reward to the arm's BanditState row without loading the arm
+        table, leaving the commit to the caller.
+        """
+        _add_deltas(db, {cls._get_arm_key(params): (1, reward)})
+
+    def observe(self, params: dict, reward: float):
+        """Folds in a reward another bandit has already persisted (memory only, no DB write)."""
+        self._record(self._get_arm_key(params), 1, reward, persist=False)
+
+    def flush(self, commit: bool = True):
+        """Adds pending trial/reward deltas to BanditState in one upsert."""
+        self._updates_since_flush = 0
+        if not self._pending:
+            return
+        _add_deltas(self.db, {
+            key: tuple(self._pending[arm_id]) for key, arm_id in self._ids.items() if arm_id in self._pending
+        })
+        self._pending.clear()
+
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
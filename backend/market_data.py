@@ -9,10 +9,12 @@ from alpaca.data.historical import StockHistoricalDataClient, NewsClient
 from alpaca.data.requests import StockBarsRequest, NewsRequest
 from alpaca.data.timeframe import TimeFrame
 
+from backend.bar_store import BarStore
+
 logger = logging.getLogger("MarketData")
 
 class MarketDataProvider:
-    def __init__(self):
+    def __init__(self, bar_store: BarStore | None = None):
         self.api_key = os.getenv("ALPACA_API_KEY")
         self.api_secret = os.getenv("ALPACA_API_SECRET")
         if not self.api_key or not self.api_secret:
@@ -30,13 +32,34 @@ class MarketDataProvider:
         self._vix_cache = {"value": 20.0, "timestamp": 0.0}
         self._vix_cache_ttl = 300  # 5 minutes
 
+        # Local Parquet bar cache; BAR_CACHE_OFFLINE serves from disk only.
+        if bar_store is None and os.getenv("BAR_CACHE_ENABLED", "true").lower() == "true":
+            bar_store = BarStore()
+        self.bar_store = bar_store
+        self.offline = os.getenv("BAR_CACHE_OFFLINE", "false").lower() == "true"
+
     def get_bars(self, symbols: list[str], lookback_days: int = 365, timeframe: TimeFrame = TimeFrame.Day) -> pd.DataFrame:
         """
         Fetches bars for the given symbols and timeframe.
+
+        With a bar store configured, ranges already on disk are served locally
+        and only the missing head/tail is requested from Alpaca.
         """
         end_dt = datetime.now()
         start_dt = end_dt - timedelta(days=lookback_days)
 
+        if self.bar_store is None:
+            return self._fetch_bars(symbols, start_dt, end_dt, timeframe)
+
+        tf_key = str(timeframe)
+        if not self.offline:
+            for (fetch_start, fetch_end), group in self.bar_store.missing_ranges(symbols, tf_key, start_dt, end_dt).items():
+                fetched = self._fetch_bars(group, fetch_start, fetch_end, timeframe)
+                self.bar_store.write(fetched, tf_key, group, fetch_start, fetch_end)
+                logger.debug(f"Bar cache top-up: {len(fetched)} {tf_key} bars for {len(group)} symbols from {fetch_start}")
+        return self.bar_store.read(symbols, tf_key, start_dt, end_dt)
+
+    def _fetch_bars(self, symbols: list[str], start_dt, end_dt, timeframe: TimeFrame) -> pd.DataFrame:
         request_params = StockBarsRequest(
             symbol_or_symbols=symbols,
             timeframe=timeframe,
@@ -46,14 +69,14 @@ class MarketDataProvider:
         )
 
         bars = self.client.get_stock_bars(request_params)
-        
+
         # Convert to DataFrame
         df = bars.df
-        
-        # Ensure standard columns if needed, though alpaca-py returns: 
+
+        # Ensure standard columns if needed, though alpaca-py returns:
         # index: [symbol, timestamp]
         # columns: [open, high, low, close, volume, trade_count, vwap]
-        
+
         return df
 
     def get_news(self, symbols: list[str] | str, limit: int = 10) -> list:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
 from datetime import datetime
 from backend.db import Base
 
@@ -40,6 +40,9 @@ class Order(Base):
     parent_order_id = Column(String, nullable=True, index=True) # To link bracket children to parent
     entry_price = Column(Float, nullable=True) # To calculate PnL on exit
 
+    # Serves /bot/trade_history newest-first; SQLite appends the rowid (id) to the key, covering the tie-break.
+    __table_args__ = (Index("ix_orders_status_timestamp", "status", "timestamp"),)
+
 class DailyEquity(Base):
     __tablename__ = "daily_equity"
     
@@ -48,3 +51,44 @@ class DailyEquity(Base):
     equity = Column(Float)
     drawdown_pct = Column(Float)
     source = Column(String, default="live", nullable=False)
+
+    __table_args__ = (Index("ix_daily_equity_source_date", "source", "date"),)
+
+class EquityStats(Base):
+    __tablename__ = "equity_stats"
+
+    # Running aggregates over one source's DailyEquity rows, updated on every insert
+    source = Column(String, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    high_water_mark = Column(Float)
+    max_drawdown_pct = Column(Float, default=0.0, nullable=False)
+    last_equity = Column(Float)
+    first_date = Column(DateTime)
+    last_date = Column(DateTime)
+
+class EquityRollup(Base):
+    __tablename__ = "equity_rollups"
+
+    # OHLC of equity plus drawdown per minute / hour / day bucket, maintained on write
+    source = Column(String, primary_key=True)
+    resolution = Column(String, primary_key=True)  # "1m", "1h", "1d"
+    bucket_start = Column(DateTime, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    drawdown_max = Column(Float, nullable=False)
+    drawdown_close = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
+
+class SentimentCacheEntry(Base):
+    __tablename__ = "sentiment_cache"
+
+    # "<headline-set hash>:<vix bucket>", shared by every process using this DB
+    cache_key = Column(String, primary_key=True)
+    headline_hash = Column(String, nullable=False)
+    vix_bucket = Column(Integer, nullable=False)
+    headline_count = Column(Integer, default=0)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -2,6 +2,7 @@ import os
 import json
 from sqlalchemy.orm import Session
 from backend.models import Decision
+from backend.backtest import BATCH_RUN_PREFIX
 from backend.learning import EpsilonGreedyBandit
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
@@ -18,6 +19,19 @@ class StrategyAdvisor:
             temperature=0.2
         )
 
+    def _latest_batch_summaries(self, top_n: int = 10):
+        """Best and worst `top_n` arms of the most recent batched backtest."""
+        latest = self.db.query(Decision.run_id).filter(
+            Decision.run_id.like(f"{BATCH_RUN_PREFIX}%")
+        ).order_by(Decision.timestamp.desc(), Decision.id.desc()).first()
+        if latest is None:
+            return []
+        rows = self.db.query(Decision).filter(Decision.run_id == latest.run_id).all()
+        rows.sort(key=lambda d: d.signals["total_pnl"])
+        if len(rows) <= 2 * top_n:
+            return rows
+        return rows[:top_n] + rows[-top_n:]
+
     def perform_retrospective(self, days_back: int = 30):
         """Analyze recent trades and suggest Bandit adjustments."""
         # 1. Fetch recent decisions with negative rewards (failures)
@@ -30,10 +44,14 @@ class StrategyAdvisor:
             Decision.reward > 100
         ).order_by(Decision.timestamp.desc()).limit(20).all()
 
-        if not failures and not successes:
+        # 3. Fetch the best/worst arms of the latest batched backtest; these
+        # summary rows keep their total PnL in `signals`, not `reward`.
+        batch = self._latest_batch_summaries()
+
+        if not failures and not successes and not batch:
             return "Not enough diversified data to perform a retrospective."
 
-        # 3. Create context for LLM
+        # 4. Create context for LLM
         history_summary = []
         for d in failures + successes:
             history_summary.append({
@@ -41,6 +59,12 @@ class StrategyAdvisor:
                 "reasoning": d.reasoning,
                 "pnl": d.reward
             })
+        for d in batch:
+            history_summary.append({
+                "params": d.params_used,
+                "reasoning": d.reasoning,
+                "pnl": d.signals["total_pnl"]
+            })
 
         prompt = PromptTemplate.from_template("""
         You are the PaperPilot Quantitative Strategist. 
@@ -66,7 +90,7 @@ class StrategyAdvisor:
             cleaned_content = response.content.replace("```json", "").replace("```", "").strip()
             advice = json.loads(cleaned_content)
             
-            # 4. Apply "Virtual Feedback" to the Bandit
+            # 5. Apply "Virtual Feedback" to the Bandit
             bandit = EpsilonGreedyBandit(self.db)
             applied = []
             for adj in advice.get("adjustments", []):
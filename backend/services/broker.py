@@ -0,0 +1,38 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("Broker")
+
+
+class AsyncBroker:
+    """
+    Async facade over the blocking alpaca-py trading / market-data clients.
+
+    Each call runs on a bounded thread pool so the event loop (WebSocket log
+    stream, /health, trade-update callbacks) keeps running while a cycle
+    waits on the network. Independent calls can be awaited together:
+
+        acct, positions = await broker.gather(
+            broker.call(trading_client.get_account),
+            broker.call(trading_client.get_all_positions),
+        )
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or int(os.getenv("BROKER_MAX_WORKERS", "8"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="broker")
+
+    async def call(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on the broker pool and awaits the result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    @staticmethod
+    async def gather(*calls, return_exceptions: bool = False):
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
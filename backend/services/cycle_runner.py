@@ -0,0 +1,177 @@
+import asyncio
+import bisect
+import logging
+import os
+from dataclasses import dataclass
+
+logger = logging.getLogger("CycleRunner")
+
+# Upper bounds (seconds) for cycle duration / queue wait buckets.
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds for the number of requests waiting when one is queued.
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 25)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus-style upper bounds plus +Inf)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float):
+        """Upper bound of the bucket holding the q-th observation (None if empty / in +Inf)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": {**{str(b): n for b, n in zip(self.buckets, self.counts)}, "+Inf": self.counts[-1]},
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+@dataclass
+class _Flight:
+    dry_run: bool
+    symbols: frozenset | None          # None = whole universe
+    future: asyncio.Future
+    queued_at: float
+    callers: int = 1
+
+    def covers(self, dry_run: bool, symbols: frozenset | None) -> bool:
+        if dry_run != self.dry_run:
+            return False
+        return self.symbols is None or (symbols is not None and symbols <= self.symbols)
+
+    def merge(self, symbols: frozenset | None) -> None:
+        self.callers += 1
+        self.symbols = None if self.symbols is None or symbols is None else self.symbols | symbols
+
+
+class CycleRunner:
+    """
+    Single-flight front door for execute_bot_cycle.
+
+    At most one cycle runs at a time. A caller whose request is already
+    covered by the running cycle (same dry_run, same or fewer symbols)
+    awaits that cycle's result, unless it passes fresh=True because it
+    needs data newer than the running cycle's (e.g. a price trigger that
+    fired mid-cycle). Anything else joins one queued follow-up
+    per dry_run mode, whose symbol sets are merged, so a burst of triggers
+    collapses into a single extra cycle. Consecutive cycles start at least
+    `min_interval` seconds apart (env CYCLE_MIN_INTERVAL_SEC).
+    """
+
+    def __init__(self, cycle_fn, min_interval: float | None = None):
+        self.cycle_fn = cycle_fn
+        self.min_interval = min_interval if min_interval is not None else float(os.getenv("CYCLE_MIN_INTERVAL_SEC", "5"))
+        self._current: _Flight | None = None
+        self._queued: dict[bool, _Flight] = {}
+        self._worker: asyncio.Task | None = None
+        self._last_finished: float | None = None
+
+        self.cycles_run = 0
+        self.requests_shared = 0
+        self.requests_coalesced = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queue_wait = Histogram(DURATION_BUCKETS)
+        self.queue_depth = Histogram(DEPTH_BUCKETS)
+
+    @property
+    def running(self) -> bool:
+        return self._current is not None
+
+    def depth(self) -> int:
+        """Callers waiting on queued (not yet started) cycles."""
+        return sum(f.callers for f in self._queued.values())
+
+    async def run(self, dry_run: bool = False, symbols=None, fresh: bool = False):
+        scope = None if symbols is None else frozenset(symbols)
+        current = self._current
+        if not fresh and current is not None and current.covers(dry_run, scope):
+            self.requests_shared += 1
+            current.callers += 1
+            return await asyncio.shield(current.future)
+
+        flight = self._queued.get(dry_run)
+        if flight is not None:
+            flight.merge(scope)
+            self.requests_coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            flight = self._queued[dry_run] = _Flight(dry_run, scope, loop.create_future(), loop.time())
+        self.queue_depth.observe(self.depth())
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return await asyncio.shield(flight.future)
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self._queued:
+            if self._last_finished is not None:
+                wait = self._last_finished + self.min_interval - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            dry_run = next(iter(self._queued))
+            flight = self._queued.pop(dry_run)
+            self._current = flight
+            started = loop.time()
+            self.queue_wait.observe(started - flight.queued_at)
+            symbols = None if flight.symbols is None else sorted(flight.symbols)
+            try:
+                result = await self.cycle_fn(dry_run=dry_run, symbols=symbols)
+            except asyncio.CancelledError:
+                flight.future.cancel()
+                raise
+            except Exception as e:  # noqa: BLE001 - forwarded to every waiter via the future
+                logger.error(f"Cycle failed: {e}")
+                flight.future.set_exception(e)
+            else:
+                flight.future.set_result(result)
+            finally:
+                self._current = None
+                self._last_finished = loop.time()
+                self.cycles_run += 1
+                self.duration.observe(self._last_finished - started)
+                if flight.callers > 1:
+                    logger.info(f"Cycle result shared by {flight.callers} callers")
+            # Nobody may be left awaiting (e.g. a cancelled request); don't warn about it.
+            if flight.future.done() and not flight.future.cancelled():
+                flight.future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self.depth(),
+            "min_interval_sec": self.min_interval,
+            "cycles_run": self.cycles_run,
+            "requests_shared": self.requests_shared,
+            "requests_coalesced": self.requests_coalesced,
+            "cycle_duration_sec": self.duration.snapshot(),
+            "queue_wait_sec": self.queue_wait.snapshot(),
+            "queue_depth_hist": self.queue_depth.snapshot(),
+        }
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+from backend.services.cycle_runner import DURATION_BUCKETS, Histogram
+
+logger = logging.getLogger("Dashboard")
+
+# The background loop stops rebuilding once nobody has read the snapshot
+# for this many intervals; the next reader then rebuilds on demand.
+IDLE_INTERVALS = 3
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    body: bytes
+    etag: str
+    built_at: float                      # time.time()
+    build_ms: float
+    errors: dict = field(default_factory=dict)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    def opaque(tag: str) -> str:
+        return tag.strip().removeprefix("W/")
+    return opaque(etag) in {opaque(t) for t in if_none_match.split(",")}
+
+
+class DashboardService:
+    """
+    One pre-serialized snapshot of everything the dashboard shows, rebuilt
+    by a background task every `interval` seconds (env DASHBOARD_REFRESH_SEC).
+
+    `sections` maps a payload key to a blocking callable; each rebuild runs
+    them on the broker pool, at most `max_workers` at a time (env
+    DASHBOARD_MAX_WORKERS) so a slow build can't starve trading calls. A
+    section that fails keeps its last good value and is listed under
+    "errors". Readers always get the cached bytes, so any number of browser
+    tabs and MCP tools cost one build per interval, and nothing is rebuilt
+    while nobody is reading. invalidate() makes the next reader wait for a
+    fresh build (e.g. right after a risk override).
+
+    The ETag is a hash of the sections and their errors (not the build
+    time), so an unchanged dashboard keeps its ETag across rebuilds and
+    clients revalidate with a 304, while a section failing or recovering
+    changes it.
+    """
+
+    def __init__(self, broker, sections: dict, interval: float | None = None, max_workers: int | None = None):
+        self.broker = broker
+        self.sections = sections
+        self.interval = interval if interval is not None else float(os.getenv("DASHBOARD_REFRESH_SEC", "5"))
+        self.max_workers = max_workers or int(os.getenv("DASHBOARD_MAX_WORKERS", "2"))
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._last_read: float | None = None     # time.monotonic()
+        self._snapshot: DashboardSnapshot | None = None
+        self._values: dict = {name: None for name in sections}
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self.builds = 0
+        self.idle_skips = 0
+        self.reads = 0
+        self.not_modified = 0
+        self.build_time = Histogram(DURATION_BUCKETS)
+
+    def invalidate(self) -> None:
+        """Safe to call from any thread (sync endpoints run in a worker pool)."""
+        self._dirty = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _section(self, name: str):
+        async with self._slots:
+            return await self.broker.call(self.sections[name])
+
+    async def _build(self) -> DashboardSnapshot:
+        self._dirty = False
+        start = time.perf_counter()
+        names = list(self.sections)
+        results = await self.broker.gather(*(self._section(n) for n in names), return_exceptions=True)
+        errors = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Dashboard section {name} failed: {result}")
+                errors[name] = str(result)
+            else:
+                self._values[name] = result
+
+        content = json.dumps({"sections": self._values, "errors": errors}, sort_keys=True, default=str)
+        etag = f'W/"{hashlib.sha256(content.encode()).hexdigest()[:20]}"'
+        built_at = time.time()
+        build_ms = round((time.perf_counter() - start) * 1000, 2)
+        body = json.dumps({
+            **self._values,
+            "errors": errors,
+            "generated_at": built_at,
+            "refresh_sec": self.interval,
+        }, default=str).encode()
+
+        self._snapshot = DashboardSnapshot(body, etag, built_at, build_ms, errors)
+        self.builds += 1
+        self.build_time.observe(build_ms / 1000)
+        return self._snapshot
+
+    async def refresh(self) -> DashboardSnapshot:
+        async with self._lock:
+            return await self._build()
+
+    async def current(self) -> DashboardSnapshot:
+        self.reads += 1
+        self._last_read = time.monotonic()
+        if self._snapshot is None or self._dirty:
+            async with self._lock:
+                # Another reader may have rebuilt it while we waited.
+                if self._snapshot is None or self._dirty:
+                    await self._build()
+        return self._snapshot
+
+    def _idle(self) -> bool:
+        if self._snapshot is None:
+            return False
+        last = self._last_read
+        return last is None or time.monotonic() - last > IDLE_INTERVALS * self.interval
+
+    async def _run(self):
+        while True:
+            if self._idle():
+                self.idle_skips += 1
+                self._dirty = True
+            else:
+                try:
+                    await self.refresh()
+                except Exception as e:  # noqa: BLE001 - the refresh loop must outlive a failed build
+                    logger.error(f"Dashboard refresh failed: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "refresh_sec": self.interval,
+            "builds": self.builds,
+            "idle_skips": self.idle_skips,
+            "reads": self.reads,
+            "not_modified": self.not_modified,
+            "age_sec": round(time.time() - snap.built_at, 2) if snap else None,
+            "errors": snap.errors if snap else {},
+            "build_duration_sec": self.build_time.snapshot(),
+        }
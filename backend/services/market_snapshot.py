@@ -0,0 +1,120 @@
+import logging
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any
+
+import pandas as pd
+
+logger = logging.getLogger("MarketSnapshot")
+
+
+@dataclass(frozen=True)
+class UpstreamCall:
+    name: str
+    ms: float
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    Everything one bot cycle knows about the market and the account,
+    fetched once at the start of the cycle and shared read-only by the
+    agent (sentinel, strategy, executor nodes), sizing and execution.
+
+    `calls` records which upstream requests were actually made to build
+    it (and how long each took), so duplicated fetches are visible.
+    """
+    taken_at: pd.Timestamp
+    symbols: tuple[str, ...]
+    account: Any
+    positions: tuple[Any, ...]
+    bars: pd.DataFrame
+    live_prices: Mapping[str, float]
+    vix: float
+    calls: tuple[UpstreamCall, ...] = ()
+    latest_prices: Mapping[str, float] | None = None
+
+    def __post_init__(self):
+        # Bars' last close, overridden by the live trade where there is one.
+        if self.latest_prices is None:
+            closes = self.bars['close'].groupby(level=0).last().to_dict() if len(self.bars) else {}
+            object.__setattr__(self, "latest_prices", MappingProxyType({**closes, **self.live_prices}))
+        object.__setattr__(self, "live_prices", MappingProxyType(dict(self.live_prices)))
+
+    @property
+    def equity(self) -> float:
+        return float(self.account.equity)
+
+    @property
+    def available_cash(self) -> float:
+        # Prefer real cash over buying_power (which can be 4x equity).
+        try:
+            return float(self.account.cash)
+        except (AttributeError, TypeError, ValueError):
+            return float(self.account.non_marginable_buying_power)
+
+    def managed_equity(self, universe) -> float:
+        """Market value of positions in `universe` (excludes manual holdings)."""
+        universe = set(universe)
+        return sum(float(p.market_value) for p in self.positions if p.symbol in universe)
+
+    def position_qtys(self) -> list[dict]:
+        return [{"symbol": p.symbol, "qty": float(p.qty)} for p in self.positions]
+
+    def with_bars(self, extra: pd.DataFrame, call: UpstreamCall) -> "MarketSnapshot":
+        """A copy with `extra` bars appended (e.g. a catch-up fetch), recording the call."""
+        return replace(self, bars=pd.concat([self.bars, extra]), calls=self.calls + (call,), latest_prices=None)
+
+    def summary(self) -> dict:
+        """JSON-friendly view for logs and agent context."""
+        return {
+            "taken_at": self.taken_at.isoformat(),
+            "equity": self.equity,
+            "cash": self.available_cash,
+            "vix": self.vix,
+            "positions": [
+                {
+                    "symbol": p.symbol,
+                    "qty": float(p.qty),
+                    "market_value": float(getattr(p, "market_value", 0.0) or 0.0),
+                    "unrealized_pl": float(getattr(p, "unrealized_pl", 0.0) or 0.0),
+                }
+                for p in self.positions
+            ],
+            "latest_prices": dict(self.latest_prices),
+            "upstream_calls": [c.name for c in self.calls],
+        }
+
+
+async def timed_call(broker, name: str, fn, *args, **kwargs):
+    """Runs fn on the broker pool; returns (result, UpstreamCall)."""
+    start = time.perf_counter()
+    try:
+        result = await broker.call(fn, *args, **kwargs)
+    except Exception:
+        logger.warning(f"Snapshot call {name} failed after {(time.perf_counter() - start) * 1000:.0f}ms")
+        raise
+    return result, UpstreamCall(name, round((time.perf_counter() - start) * 1000, 2))
+
+
+async def capture_snapshot(broker, trading_client, market_provider, symbols, timeframe, lookback_days: int = 2) -> MarketSnapshot:
+    """Fetches bars, latest trades, account, positions and VIX concurrently into one snapshot."""
+    (bars, c_bars), (trades, c_trades), (account, c_acct), (positions, c_pos), (vix, c_vix) = await broker.gather(
+        timed_call(broker, "get_bars", market_provider.get_bars, symbols, lookback_days=lookback_days, timeframe=timeframe),
+        timed_call(broker, "get_latest_trades", market_provider.get_latest_trades, symbols),
+        timed_call(broker, "get_account", trading_client.get_account),
+        timed_call(broker, "get_all_positions", trading_client.get_all_positions),
+        timed_call(broker, "get_vix", market_provider.get_vix),
+    )
+    return MarketSnapshot(
+        taken_at=pd.Timestamp.now(tz='UTC'),
+        symbols=tuple(symbols),
+        account=account,
+        positions=tuple(positions),
+        bars=bars,
+        live_prices={symbol: float(trade.price) for symbol, trade in trades.items()},
+        vix=float(vix),
+        calls=(c_bars, c_trades, c_acct, c_pos, c_vix),
+    )
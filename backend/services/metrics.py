@@ -1,62 +1,347 @@
+import logging
+import math
+import os
+import threading
+import weakref
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from backend.models import DailyEquity, Decision
+
+from backend.models import DailyEquity, Decision, EquityRollup, EquityStats
+from backend.services.downsample import lttb
+
+logger = logging.getLogger("Metrics")
+
+# Default point budget for the equity curve returned by get_metrics.
+MAX_POINTS = int(os.getenv("METRICS_MAX_POINTS", "500"))
+# Resolution of the per-process equity curve cache; requests can ask for up to this many points.
+CACHE_POINTS = 4 * MAX_POINTS
+
+
+# Rollup resolutions, finest first.
+ROLLUPS = {"1m": timedelta(minutes=1), "1h": timedelta(hours=1), "1d": timedelta(days=1)}
+
+
+def _bucket(date: datetime, resolution: str) -> datetime:
+    if resolution == "1m":
+        return date.replace(second=0, microsecond=0)
+    if resolution == "1h":
+        return date.replace(minute=0, second=0, microsecond=0)
+    return date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _utc_naive(date: datetime | None) -> datetime | None:
+    if date is None or date.tzinfo is None:
+        return date
+    return date.astimezone(UTC).replace(tzinfo=None)
+
+
+def _fold(stats: EquityStats, date: datetime, equity: float) -> float:
+    """Adds one equity observation to the running stats; returns its drawdown %."""
+    hwm = equity if stats.high_water_mark is None else max(stats.high_water_mark, equity)
+    drawdown_pct = (hwm - equity) / hwm * 100 if hwm > 0 else 0.0
+    stats.high_water_mark = hwm
+    stats.max_drawdown_pct = max(stats.max_drawdown_pct or 0.0, drawdown_pct)
+    stats.last_equity = equity
+    stats.last_date = date
+    stats.first_date = stats.first_date or date
+    stats.count = (stats.count or 0) + 1
+    return drawdown_pct
+
+
+class _EquityCurve:
+    """
+    Downsampled copy of one DB's live equity curve, kept per process.
+
+    The full history is read once; afterwards only rows newer than the
+    last cached point are fetched and appended, and the cache is
+    re-downsampled to CACHE_POINTS whenever it doubles. The EquityStats
+    row (one primary-key read) tells whether anything changed; if a full
+    read disagrees with it, its count and date range are re-synced to the
+    table so the next call doesn't rescan again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.first_date = None
+        self.last_date = None
+        self.ts = np.empty(0)
+        self.equity = np.empty(0)
+
+    def _append(self, rows):
+        if not rows:
+            return
+        dates, values = zip(*rows)
+        # DailyEquity dates are naive UTC.
+        self.ts = np.concatenate([self.ts, [d.replace(tzinfo=UTC).timestamp() for d in dates]])
+        self.equity = np.concatenate([self.equity, values])
+        self.count += len(rows)
+        self.last_date = dates[-1]
+        if len(self.ts) > 2 * CACHE_POINTS:
+            keep = lttb(self.ts, self.equity, CACHE_POINTS)
+            self.ts, self.equity = self.ts[keep], self.equity[keep]
+
+    def sync(self, db: Session, stats: EquityStats):
+        if self.count == stats.count and self.first_date == stats.first_date and self.last_date == stats.last_date:
+            return
+        query = (
+            select(DailyEquity.date, DailyEquity.equity)
+            .where(DailyEquity.source == "live")
+            .order_by(DailyEquity.date.asc(), DailyEquity.id.asc())
+        )
+        if self.count and self.first_date == stats.first_date and self.count < stats.count:
+            new_rows = db.execute(query.where(DailyEquity.date > self.last_date)).all()
+            if self.count + len(new_rows) == stats.count:
+                self._append(new_rows)
+                return
+        # First read, or the table changed under us (rows deleted / backfilled): start over.
+        self._reset()
+        batch = []
+        for row in db.execute(query.execution_options(yield_per=10_000)):
+            if self.first_date is None:
+                self.first_date = row.date
+            batch.append(tuple(row))
+            if len(batch) == 10_000:
+                self._append(batch)
+                batch = []
+        self._append(batch)
+        if (self.count, self.first_date, self.last_date) != (stats.count, stats.first_date, stats.last_date):
+            logger.warning(
+                f"Live equity stats disagree with daily_equity ({stats.count} rows recorded, {self.count} found); "
+                "re-syncing the count, run rebuild_stats() to recompute the aggregates"
+            )
+            live = DailyEquity.source == "live"
+            db.execute(
+                update(EquityStats).where(EquityStats.source == "live").values(
+                    count=select(func.count()).where(live).scalar_subquery(),
+                    first_date=select(func.min(DailyEquity.date)).where(live).scalar_subquery(),
+                    last_date=select(func.max(DailyEquity.date)).where(live).scalar_subquery(),
+                )
+            )
+            db.commit()
+
+    def points(self, max_points: int) -> list[dict]:
+        keep = lttb(self.ts, self.equity, max_points)
+        return [
+            {"date": datetime.fromtimestamp(self.ts[i], tz=UTC).strftime("%Y-%m-%d %H:%M"), "equity": round(float(self.equity[i]), 2)}
+            for i in keep
+        ]
+
+
+_curves: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_curves_lock = threading.Lock()
+
+
+def _curve_for(db: Session) -> _EquityCurve:
+    engine = db.get_bind()
+    with _curves_lock:
+        curve = _curves.get(engine)
+        if curve is None:
+            curve = _curves[engine] = _EquityCurve()
+        return curve
+
 
 class MetricsService:
     def __init__(self, db: Session):
         self.db = db
 
-    def record_daily_equity(self, equity: float):
-        live_q = self.db.query(DailyEquity).filter(DailyEquity.source == "live")
-        high_water_mark = live_q.with_entities(func.max(DailyEquity.equity)).scalar() or equity
-        high_water_mark = max(high_water_mark, equity)
-        drawdown_pct = 0.0
-        if high_water_mark > 0:
-            drawdown_pct = (high_water_mark - equity) / high_water_mark * 100
+    def _stats(self, source: str = "live") -> EquityStats:
+        stats = self.db.get(EquityStats, source)
+        if stats is None:
+            stats = self.rebuild_stats(source)
+        return stats
+
+    def rebuild_stats(self, source: str = "live") -> EquityStats:
+        """
+        Recomputes the running stats and rollups for `source` from
+        DailyEquity in one streamed pass. Runs automatically the first time
+        stats are needed; call it after modifying DailyEquity rows directly.
+        """
+        stats = self.db.get(EquityStats, source)
+        if stats is None:
+            stats = EquityStats(source=source)
+            self.db.add(stats)
+        stats.count, stats.high_water_mark, stats.max_drawdown_pct = 0, None, 0.0
+        stats.last_equity = stats.first_date = stats.last_date = None
+        self.db.execute(delete(EquityRollup).where(EquityRollup.source == source))
+
+        rows = self.db.execute(
+            select(DailyEquity.date, DailyEquity.equity)
+            .where(DailyEquity.source == source)
+            .order_by(DailyEquity.date.asc(), DailyEquity.id.asc())
+            .execution_options(yield_per=10_000)
+        )
+        open_buckets: dict[str, dict] = {}
+        finished = []
+        for date, equity in rows:
+            drawdown_pct = _fold(stats, date, equity)
+            for resolution in ROLLUPS:
+                start = _bucket(date, resolution)
+                bucket = open_buckets.get(resolution)
+                if bucket is None or bucket["bucket_start"] != start:
+                    if bucket is not None:
+                        finished.append(bucket)
+                    bucket = open_buckets[resolution] = {
+                        "source": source, "resolution": resolution, "bucket_start": start,
+                        "open": equity, "high": equity, "low": equity, "drawdown_max": drawdown_pct, "count": 0,
+                    }
+                bucket["high"] = max(bucket["high"], equity)
+                bucket["low"] = min(bucket["low"], equity)
+                bucket["close"] = equity
+                bucket["drawdown_max"] = max(bucket["drawdown_max"], drawdown_pct)
+                bucket["drawdown_close"] = drawdown_pct
+                bucket["count"] += 1
+            if len(finished) >= 10_000:
+                self.db.execute(sqlite_insert(EquityRollup), finished)
+                finished = []
+        finished.extend(open_buckets.values())
+        if finished:
+            self.db.execute(sqlite_insert(EquityRollup), finished)
+        self.db.commit()
+        return stats
+
+    def _roll_up(self, source: str, date: datetime, equity: float, drawdown_pct: float):
+        """Folds one point into its minute, hour and day buckets (one upsert)."""
+        stmt = sqlite_insert(EquityRollup).values([
+            {
+                "source": source, "resolution": resolution, "bucket_start": _bucket(date, resolution),
+                "open": equity, "high": equity, "low": equity, "close": equity,
+                "drawdown_max": drawdown_pct, "drawdown_close": drawdown_pct, "count": 1,
+            }
+            for resolution in ROLLUPS
+        ])
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[EquityRollup.source, EquityRollup.resolution, EquityRollup.bucket_start],
+            set_={
+                "high": func.max(EquityRollup.high, stmt.excluded.high),
+                "low": func.min(EquityRollup.low, stmt.excluded.low),
+                "close": stmt.excluded.close,
+                "drawdown_max": func.max(EquityRollup.drawdown_max, stmt.excluded.drawdown_max),
+                "drawdown_close": stmt.excluded.drawdown_close,
+                "count": EquityRollup.count + 1,
+            },
+        ))
+
+    def _fold_live(self, date: datetime, equity: float) -> float:
+        """
+        _fold as a single UPDATE of the live stats row, so writers in other
+        sessions can't overwrite each other's counts; returns the drawdown %.
+        It also takes SQLite's write lock before the DailyEquity insert.
+        """
+        equity = float(equity)
+        hwm = func.max(func.coalesce(EquityStats.high_water_mark, equity), equity)
+        drawdown = case((hwm > 0, (hwm - equity) / hwm * 100), else_=0.0)
+        hwm = self.db.execute(
+            update(EquityStats).where(EquityStats.source == "live").values(
+                high_water_mark=hwm,
+                max_drawdown_pct=func.max(func.coalesce(EquityStats.max_drawdown_pct, 0.0), drawdown),
+                last_equity=equity,
+                last_date=date,
+                first_date=func.coalesce(EquityStats.first_date, date),
+                count=func.coalesce(EquityStats.count, 0) + 1,
+            ).returning(EquityStats.high_water_mark)
+        ).scalar_one()
+        return (hwm - equity) / hwm * 100 if hwm > 0 else 0.0
+
+    def record_daily_equity(self, equity: float, at: datetime | None = None):
+        """Records one live equity point. `at` (naive UTC, default now) must not precede the last point."""
+        self._stats("live")
+        now = at or _utc_naive(datetime.now(UTC))
+        drawdown_pct = self._fold_live(now, equity)
 
         rec = DailyEquity(
+            date=now,
             equity=equity,
             drawdown_pct=drawdown_pct,
             source="live"
         )
         self.db.add(rec)
+        self._roll_up("live", now, equity, drawdown_pct)
         self.db.commit()
 
-    def get_metrics(self):
+    def get_series(self, start: datetime | None = None, end: datetime | None = None,
+                   resolution: str | None = None, max_points: int | None = None) -> dict:
+        """
+        Live equity OHLC between `start` and `end` (default: all history) from
+        the rollup tables. Without a `resolution` ("1m", "1h", "1d") the
+        finest one that fits `max_points` buckets is used; ranges too long
+        even for daily buckets merge consecutive days. An explicit resolution
+        that would exceed CACHE_POINTS buckets raises ValueError.
+        """
+        max_points = min(max_points or MAX_POINTS, CACHE_POINTS)
+        if resolution is not None and resolution not in ROLLUPS:
+            raise ValueError(f"resolution must be one of {list(ROLLUPS)}")
+        stats = self._stats("live")
+        start = _utc_naive(start) or stats.first_date
+        end = _utc_naive(end) or stats.last_date
+        if not stats.count or start is None or end is None or end < start:
+            return {"resolution": resolution, "from": start and start.isoformat(), "to": end and end.isoformat(), "series": []}
+
+        span = end - start
+        if resolution is None:
+            fits = [r for r, width in ROLLUPS.items() if span / width < max_points]
+            resolution = fits[0] if fits else "1d"
+        elif span / ROLLUPS[resolution] > CACHE_POINTS:
+            raise ValueError(f"{resolution} buckets over this range exceed {CACHE_POINTS} points; use a coarser resolution")
+
+        rows = self.db.execute(
+            select(EquityRollup)
+            .where(
+                EquityRollup.source == "live",
+                EquityRollup.resolution == resolution,
+                EquityRollup.bucket_start >= _bucket(start, resolution),
+                EquityRollup.bucket_start <= end,
+            )
+            .order_by(EquityRollup.bucket_start.asc())
+        ).scalars().all()
+
+        # Even daily buckets exceed the budget: merge runs of consecutive days.
+        group = max(1, math.ceil(len(rows) / max_points))
+        series = []
+        for i in range(0, len(rows), group):
+            chunk = rows[i:i + group]
+            series.append({
+                "t": chunk[0].bucket_start.isoformat(),
+                "open": chunk[0].open,
+                "high": max(r.high for r in chunk),
+                "low": min(r.low for r in chunk),
+                "close": chunk[-1].close,
+                "drawdown_max": max(r.drawdown_max for r in chunk),
+                "drawdown_close": chunk[-1].drawdown_close,
+                "count": sum(r.count for r in chunk),
+            })
+        label = resolution if group == 1 else f"{group}x{resolution}"
+        return {"resolution": label, "from": start.isoformat(), "to": end.isoformat(), "series": series}
+
+    def get_metrics(self, max_points: int | None = None, history: bool = True):
         # 1. Total runs
         total_runs = self.db.query(Decision).count()
-        
-        # 2. Equity Curve — live Alpaca account data only, never backtest rows
-        equity_recs = (
-            self.db.query(DailyEquity)
-            .filter(DailyEquity.source == "live")
-            .order_by(DailyEquity.date.asc())
-            .all()
-        )
-        if not equity_recs:
+
+        # 2. Running stats — live Alpaca account data only, never backtest rows
+        stats = self._stats("live")
+        if not stats.count:
             return {"total_runs": total_runs, "current_equity": 0, "drawdown": 0}
-            
-        current_equity = equity_recs[-1].equity
-        
-        # Simple Drawdown Calculation
-        high_water_mark = -1
-        max_drawdown = 0
-        
-        for r in equity_recs:
-            if r.equity > high_water_mark:
-                high_water_mark = r.equity
-            
-            if high_water_mark > 0:
-                dd = (high_water_mark - r.equity) / high_water_mark
-                if dd > max_drawdown:
-                    max_drawdown = dd
-                    
-        return {
+
+        metrics = {
             "total_runs": total_runs,
-            "current_equity": current_equity,
-            "max_drawdown_pct": max_drawdown * 100,
-            "history": [
-                {"date": r.date.strftime("%Y-%m-%d"), "equity": round(r.equity, 2)}
-                for r in equity_recs
-            ]
+            "current_equity": stats.last_equity,
+            "max_drawdown_pct": stats.max_drawdown_pct,
+            "history_points": stats.count,
         }
+        if not history:
+            return metrics
+
+        # 3. Equity curve, downsampled (LTTB) to the point budget
+        max_points = min(max_points or MAX_POINTS, CACHE_POINTS)
+        curve = _curve_for(self.db)
+        with curve.lock:
+            curve.sync(self.db, stats)
+            metrics["history"] = curve.points(max_points)
+        return metrics
@@ -1,72 +1,202 @@
-import numpy as np
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
 from backend.db import SessionLocal
 from backend.models import Decision
 
 logger = logging.getLogger("MonteCarlo")
 
-def run_monte_carlo(iterations=1000):
+PERCENTILES = (5, 25, 50, 75, 95)
+BOOTSTRAP_METHODS = ("iid", "block", "stationary")
+
+# Upper bound on cells in one (paths x returns) resample matrix (~16 MB of float64).
+MAX_CHUNK_CELLS = 2_000_000
+
+# Paths per seeded task. Fixed so a given seed reproduces the same paths
+# however many worker processes end up running the tasks.
+TASK_PATHS = 50_000
+
+
+def _wrap(idx: np.ndarray, n: int) -> np.ndarray:
+    """idx % n for 0 <= idx < 2n, without an integer division per element."""
+    idx = np.ascontiguousarray(idx)
+    idx[idx >= n] -= n
+    return idx
+
+
+def resample_indices(rng: np.random.Generator, rows: int, n: int, method: str = "iid", block_length: int = 5) -> np.ndarray:
+    """
+    (rows x n) indices into the return series for one bootstrap chunk.
+
+    iid:        every step drawn independently.
+    block:      circular moving blocks of exactly `block_length` steps.
+    stationary: Politis-Romano; blocks restart with probability 1/block_length,
+                so lengths are geometric with mean `block_length`.
+    """
+    block_length = max(1, min(block_length, n))
+    if method == "iid":
+        return rng.integers(0, n, size=(rows, n), dtype=np.int32)
+    if method == "block":
+        n_blocks = -(-n // block_length)
+        starts = rng.integers(0, n, size=(rows, n_blocks), dtype=np.int32)
+        idx = (starts[:, :, None] + np.arange(block_length, dtype=np.int32)).reshape(rows, n_blocks * block_length)[:, :n]
+        return _wrap(idx, n)
+    if method == "stationary":
+        steps = np.arange(n, dtype=np.int32)
+        restart = rng.random((rows, n), dtype=np.float32) < 1.0 / block_length
+        restart[:, 0] = True
+        starts = rng.integers(0, n, size=(rows, n), dtype=np.int32)
+        block_start = np.maximum.accumulate(np.where(restart, steps, 0), axis=1)
+        idx = np.take_along_axis(starts, block_start, axis=1)
+        idx += steps
+        idx -= block_start
+        return _wrap(idx, n)
+    raise ValueError(f"Unknown bootstrap method '{method}' (expected one of {BOOTSTRAP_METHODS})")
+
+
+def _simulate_task(rewards, rows: int, initial_equity: float, seed_seq, method: str, block_length: int, chunk_size: int):
+    """Runs `rows` paths from one seeded stream, chunk by chunk."""
+    n = len(rewards)
+    rng = np.random.default_rng(seed_seq)
+    final = np.empty(rows)
+    ruined = np.empty(rows, dtype=bool)
+    max_dd = np.empty(rows)
+    for lo in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - lo)
+        equity = rewards[resample_indices(rng, size, n, method, block_length)]
+        np.cumsum(equity, axis=1, out=equity)
+        equity += initial_equity
+        hit = equity.min(axis=1) <= 0
+        ruined[lo:lo + size] = hit
+        final[lo:lo + size] = np.where(hit, 0.0, equity[:, -1])
+
+        # Drawdown = 1 - equity / running peak (the peak starts at initial_equity).
+        ratio = np.maximum.accumulate(equity, axis=1)
+        np.maximum(ratio, initial_equity, out=ratio)
+        np.divide(equity, ratio, out=ratio)
+        # A ruined path ends at 0, i.e. a 100% drawdown.
+        max_dd[lo:lo + size] = np.where(hit, 1.0, 1.0 - ratio.min(axis=1))
+    return final, ruined, max_dd
+
+
+def simulate(rewards, iterations: int = 1000, initial_equity: float = 100000.0, seed=None, chunk_size: int | None = None,
+             method: str = "iid", block_length: int = 5, processes: int | None = None) -> dict:
     """
-    Takes the actual historical returns generated by the bot and 
-    shuffles them into 1,000 different timelines.
-    Calculates the 'Risk of Ruin' and 'Average Performance' across universes.
+    Bootstraps `iterations` equity paths from dollar `rewards` and returns
+    per-path final equity, ruin flags and max drawdown (fraction of peak).
+
+    Paths are built `chunk_size` at a time as an (paths x n) resample matrix,
+    cumsummed along time. A path is ruined at its first step with equity
+    <= 0 and stays at 0 from there on.
+
+    Work is split into TASK_PATHS-sized tasks, each with its own stream from
+    SeedSequence(seed).spawn(), and spread over `processes` workers (default:
+    one per core once there is more than one task; 1 runs inline).
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"Unknown bootstrap method '{method}' (expected one of {BOOTSTRAP_METHODS})")
+    rewards = np.asarray(rewards, dtype=float)
+    n = len(rewards)
+    chunk_size = chunk_size or max(1, MAX_CHUNK_CELLS // max(n, 1))
+
+    sizes = [min(TASK_PATHS, iterations - lo) for lo in range(0, iterations, TASK_PATHS)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(rewards, rows, initial_equity, ss, method, block_length, chunk_size) for rows, ss in zip(sizes, streams)]
+
+    if processes is None:
+        processes = min(len(sizes), os.cpu_count() or 1)
+    if processes <= 1:
+        parts = [_simulate_task(*a) for a in args]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=ctx) as pool:
+            parts = list(pool.map(_simulate_task, *zip(*args)))
+
+    return {
+        "final_equity": np.concatenate([p[0] for p in parts]),
+        "ruined": np.concatenate([p[1] for p in parts]),
+        "max_drawdown": np.concatenate([p[2] for p in parts]),
+    }
+
+
+def _bands(values: np.ndarray) -> dict:
+    lo90, lo50, hi50, hi90 = np.percentile(values, (5, 25, 75, 95))
+    return {"90": [float(lo90), float(hi90)], "50": [float(lo50), float(hi50)]}
+
+
+def summarize(final_equity: np.ndarray, ruined: np.ndarray, initial_equity: float = 100000.0, max_drawdown: np.ndarray | None = None) -> dict:
+    win_rate_universes = float((final_equity > initial_equity).mean() * 100)
+    if win_rate_universes > 80:
+        verdict = "ROBUST"          # succeeds in most parallel universes
+    elif win_rate_universes > 50:
+        verdict = "CAUTION"         # highly dependent on return sequencing
+    else:
+        verdict = "OVERFITTED"      # fails in the majority of random timelines
+    report = {
+        "iterations": len(final_equity),
+        "avg_final_equity": float(final_equity.mean()),
+        "median_final_equity": float(np.median(final_equity)),
+        "final_equity_percentiles": {
+            str(p): float(v) for p, v in zip(PERCENTILES, np.percentile(final_equity, PERCENTILES))
+        },
+        "probability_of_profit_pct": win_rate_universes,
+        "risk_of_ruin_pct": float(ruined.mean() * 100),
+        "verdict": verdict,
+        "confidence_bands": {"final_equity": _bands(final_equity)},
+    }
+    if max_drawdown is not None:
+        dd_pct = max_drawdown * 100
+        report["median_max_drawdown_pct"] = float(np.median(dd_pct))
+        report["max_drawdown_pct_percentiles"] = {
+            str(p): float(v) for p, v in zip(PERCENTILES, np.percentile(dd_pct, PERCENTILES))
+        }
+        report["confidence_bands"]["max_drawdown_pct"] = _bands(dd_pct)
+    return report
+
+
+def run_monte_carlo(iterations=1000, seed=None, method="iid", block_length=5, processes=None):
+    """
+    Takes the actual historical returns generated by the bot and
+    resamples them into `iterations` different timelines. Use method="block"
+    or "stationary" to keep `block_length`-day runs of returns together,
+    preserving autocorrelation that an IID shuffle destroys.
+    Returns the 'Risk of Ruin', final-equity / drawdown percentiles and
+    confidence bands across universes, or None if there is no history yet.
     """
     db = SessionLocal()
     try:
         # 1. Fetch historical daily returns from Decisions/Equity
         # We'll use rewards from decisions as our return stream
-        decisions = db.query(Decision).order_by(Decision.timestamp).all()
-        
-        if not decisions:
-            print("No trade history found. Run a backtest first.")
-            return
-
-        daily_rewards = [d.reward for d in decisions if d.reward is not None]
-        initial_equity = 100000.0
-        
-        print(f" Analyzing {len(daily_rewards)} days of returns across {iterations} universes...")
-
-        final_equities = []
-        ruined_count = 0
-        
-        for _ in range(iterations):
-            # Shuffle the returns (This breaks the specific historical timeline)
-            shuffled = np.random.choice(daily_rewards, size=len(daily_rewards), replace=True)
-            
-            universe_equity = initial_equity
-            for ret in shuffled:
-                universe_equity += ret
-                if universe_equity <= 0:
-                    ruined_count += 1
-                    universe_equity = 0
-                    break
-            
-            final_equities.append(universe_equity)
-
-        # 2. Results Analysis
-        final_equities = np.array(final_equities)
-        avg_equity = np.mean(final_equities)
-        median_equity = np.median(final_equities)
-        win_rate_universes = (final_equities > initial_equity).mean() * 100
-        
-        print("\n--- MONTE CARLO SURVIVABILITY REPORT ---")
-        print(f"Universe Iterations: {iterations}")
-        print(f"Average Final Equity: ${avg_equity:,.2f}")
-        print(f"Median Final Equity: ${median_equity:,.2f}")
-        print(f"Probability of Profit: {win_rate_universes:.1f}%")
-        print(f"Risk of Ruin (0$): {(ruined_count/iterations)*100:.1f}%")
-        print("----------------------------------------\n")
-
-        if win_rate_universes > 80:
-            print(" ROBUST: The strategy succeeds in most parallel universes.")
-        elif win_rate_universes > 50:
-            print(" CAUTION: Performance is highly dependent on return sequencing.")
-        else:
-            print(" OVERFITTED: Strategy fails in the majority of random timelines.")
-
+        daily_rewards = [
+            r for (r,) in db.query(Decision.reward).filter(Decision.reward.isnot(None)).order_by(Decision.timestamp)
+        ]
     finally:
         db.close()
 
+    if not daily_rewards:
+        logger.warning("No trade history found. Run a backtest first.")
+        return None
+
+    initial_equity = 100000.0
+    logger.info(f" Analyzing {len(daily_rewards)} days of returns across {iterations} universes ({method} bootstrap)...")
+
+    # 2. Results Analysis
+    paths = simulate(daily_rewards, iterations=iterations, initial_equity=initial_equity, seed=seed,
+                     method=method, block_length=block_length, processes=processes)
+    report = summarize(paths["final_equity"], paths["ruined"], initial_equity, paths["max_drawdown"])
+    report.update(n_returns=len(daily_rewards), method=method, block_length=block_length if method != "iid" else None, seed=seed)
+
+    logger.info(
+        f"Monte Carlo: median ${report['median_final_equity']:,.2f} | "
+        f"P(profit) {report['probability_of_profit_pct']:.1f}% | "
+        f"Risk of Ruin {report['risk_of_ruin_pct']:.1f}% | {report['verdict']}"
+    )
+    return report
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     run_monte_carlo()
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from alpaca.trading.enums import OrderSide, QueryOrderStatus, TimeInForce
+from alpaca.trading.requests import GetOrdersRequest, MarketOrderRequest
+
+logger = logging.getLogger("OrderDispatch")
+
+# Trade-stream events after which an order no longer holds shares / buying power.
+CLOSED_EVENTS = frozenset({"canceled", "fill", "expired", "rejected", "replaced", "done_for_day"})
+
+# Closing events kept for orders nobody was waiting on yet (e.g. a fill that
+# arrives before submit_order returns the new order's id).
+RECENT_EVENTS = 1000
+
+
+def _event_name(event) -> str:
+    # alpaca-py sends TradeEvent (a str Enum); compare on the raw value.
+    return str(getattr(event, "value", event))
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class OrderAckTracker:
+    """
+    Lets coroutines wait for an order's next trade-stream event.
+
+    expect() is called *before* the broker request that triggers the event,
+    so an ack that races ahead of the REST response is not lost; closing
+    events nobody was waiting for are remembered briefly for the same
+    reason. resolve() is fed from the trade-update callback and may be
+    called from any thread.
+    """
+
+    def __init__(self):
+        self._waiters: dict[str, list[tuple[frozenset, asyncio.Future]]] = {}
+        self._recent: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def expect(self, order_id, events=CLOSED_EVENTS) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        events = frozenset(events)
+        with self._lock:
+            seen = self._recent.get(str(order_id))
+            if seen in events:
+                fut.set_result(seen)
+            else:
+                self._waiters.setdefault(str(order_id), []).append((events, fut))
+        return fut
+
+    def discard(self, order_id, fut: asyncio.Future) -> None:
+        with self._lock:
+            waiters = [w for w in self._waiters.get(str(order_id), []) if w[1] is not fut]
+            if waiters:
+                self._waiters[str(order_id)] = waiters
+            else:
+                self._waiters.pop(str(order_id), None)
+        fut.cancel()
+
+    def resolve(self, order_id, event) -> bool:
+        """Completes every waiter on `order_id` interested in `event`. Returns True if any matched."""
+        name = _event_name(event)
+        with self._lock:
+            waiters = self._waiters.get(str(order_id), [])
+            matched = [fut for events, fut in waiters if name in events]
+            rest = [w for w in waiters if name not in w[0]]
+            if rest:
+                self._waiters[str(order_id)] = rest
+            else:
+                self._waiters.pop(str(order_id), None)
+            if not matched and name in CLOSED_EVENTS:
+                self._recent[str(order_id)] = name
+                while len(self._recent) > RECENT_EVENTS:
+                    self._recent.popitem(last=False)
+        for fut in matched:
+            fut.get_loop().call_soon_threadsafe(_set_result, fut, name)
+        return bool(matched)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(w) for w in self._waiters.values())
+
+
+def _set_result(fut: asyncio.Future, value) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+@dataclass
+class OrderResult:
+    symbol: str
+    side: str
+    qty: float
+    status: str = "pending"
+    order_id: str | None = None
+    error: str | None = None
+    cancelled: int = 0
+    acked: int = 0
+    cancel_ms: float = 0.0
+    ack_wait_ms: float = 0.0
+    submit_ms: float = 0.0
+    latency_ms: float = 0.0
+
+
+@dataclass
+class LiquidationStep:
+    symbol: str
+    qty: float = 0.0
+    side: str | None = None
+    status: str = "pending"
+    order_id: str | None = None
+    error: str | None = None
+    cancelled: int = 0
+    acked: int = 0
+    released_ms: float | None = None
+    submitted_ms: float | None = None
+    filled_ms: float | None = None
+
+
+class OrderDispatcher:
+    """
+    Replaces open orders with new ones for a batch of symbols.
+
+    1. One get_orders call fetches every open order in the batch.
+    2. Per symbol, its open orders are cancelled concurrently and the
+       dispatcher waits (up to `ack_timeout`) for the trade stream to confirm
+       them, instead of sleeping a fixed interval.
+    3. The symbol's new order is submitted as soon as its cancels are acked,
+       so symbols never wait on each other.
+
+    Broker calls are bounded by `max_concurrency`. dispatch() returns one
+    OrderResult dict per order with per-stage latencies in milliseconds.
+    """
+
+    def __init__(self, broker, trading_client, acks: OrderAckTracker,
+                 max_concurrency: int | None = None, ack_timeout: float | None = None):
+        self.broker = broker
+        self.trading_client = trading_client
+        self.acks = acks
+        self.max_concurrency = max_concurrency or int(os.getenv("ORDER_DISPATCH_CONCURRENCY", "8"))
+        self.ack_timeout = ack_timeout if ack_timeout is not None else float(os.getenv("ORDER_CANCEL_ACK_TIMEOUT", "2.0"))
+
+    async def fetch_open_orders(self, symbols) -> dict[str, list]:
+        by_symbol = {s: [] for s in symbols}
+        if not by_symbol:
+            return by_symbol
+        try:
+            open_orders = await self.broker.call(self.trading_client.get_orders, GetOrdersRequest(
+                status=QueryOrderStatus.OPEN,
+                symbols=sorted(by_symbol),
+                limit=500,
+            ))
+        except Exception as e:  # noqa: BLE001 - any broker error just skips the cancel pass
+            logger.warning(f"Failed to fetch open orders for {sorted(by_symbol)}: {e}")
+            return by_symbol
+        for o in open_orders:
+            by_symbol.setdefault(o.symbol, []).append(o)
+        return by_symbol
+
+    async def cancel_and_wait(self, order_ids, sem: asyncio.Semaphore) -> tuple[int, int, float, float]:
+        """Cancels `order_ids` concurrently; returns (cancelled, acked, cancel_ms, ack_wait_ms)."""
+        if not order_ids:
+            return 0, 0, 0.0, 0.0
+        start = time.perf_counter()
+
+        async def cancel(order_id):
+            fut = self.acks.expect(order_id)
+            try:
+                async with sem:
+                    await self.broker.call(self.trading_client.cancel_order_by_id, order_id)
+                return order_id, fut
+            except Exception as e:  # noqa: BLE001 - any broker error fails this cancel only
+                # Usually already filled / cancelled; no ack will follow.
+                logger.warning(f"Failed to cancel order {order_id}: {e}")
+                self.acks.discard(order_id, fut)
+                return None
+
+        waiting = dict(w for w in await asyncio.gather(*(cancel(oid) for oid in order_ids)) if w is not None)
+        sent = time.perf_counter()
+        if not waiting:
+            return 0, 0, _ms(sent - start), 0.0
+        done, not_done = await asyncio.wait(waiting.values(), timeout=self.ack_timeout)
+        for oid, fut in waiting.items():
+            if fut in not_done:
+                self.acks.discard(oid, fut)
+        if not_done:
+            logger.warning(f"{len(not_done)} cancel ack(s) not seen within {self.ack_timeout}s; submitting anyway")
+        return len(waiting), len(done), _ms(sent - start), _ms(time.perf_counter() - sent)
+
+    async def dispatch(self, orders) -> list[dict]:
+        """`orders` is a list of (order dict from calculate_orders, alpaca order request)."""
+        start = time.perf_counter()
+        sem = asyncio.Semaphore(self.max_concurrency)
+        open_by_symbol = await self.fetch_open_orders({o["symbol"] for o, _ in orders})
+
+        async def run(order, req, open_ids):
+            result = OrderResult(symbol=order["symbol"], side=order["side"], qty=order["qty"])
+            result.cancelled, result.acked, result.cancel_ms, result.ack_wait_ms = await self.cancel_and_wait(open_ids, sem)
+            t0 = time.perf_counter()
+            try:
+                async with sem:
+                    tx = await self.broker.call(self.trading_client.submit_order, req)
+                result.order_id = str(tx.id)
+                result.status = "submitted"
+            except Exception as e:  # noqa: BLE001 - any broker error fails this order only
+                logger.error(f"Order Failed {result.symbol}: {e}")
+                result.status = "failed"
+                result.error = str(e)
+            result.submit_ms = _ms(time.perf_counter() - t0)
+            result.latency_ms = _ms(time.perf_counter() - start)
+            return asdict(result)
+
+        # Open orders are cancelled once per symbol, by its first order in the batch.
+        claimed = set()
+        tasks = []
+        for order, req in orders:
+            symbol = order["symbol"]
+            open_ids = [] if symbol in claimed else [str(o.id) for o in open_by_symbol.get(symbol, [])]
+            claimed.add(symbol)
+            tasks.append(run(order, req, open_ids))
+        results = await asyncio.gather(*tasks)
+
+        if results:
+            latencies = sorted(r["latency_ms"] for r in results)
+            logger.info(
+                f"Dispatched {len(results)} orders in {_ms(time.perf_counter() - start)}ms "
+                f"(p50 {latencies[len(latencies) // 2]}ms, max {latencies[-1]}ms, "
+                f"{sum(r['status'] == 'failed' for r in results)} failed)"
+            )
+        return results
+
+    async def liquidate(self, symbols, fill_timeout: float | None = None) -> list[dict]:
+        """
+        Flattens every position in `symbols`.
+
+        Open orders and positions are fetched with one call each. Per symbol,
+        its open orders are cancelled and the trade stream's cancel acks mark
+        the shares as released, then a market close order is submitted and
+        its fill awaited for up to `fill_timeout` seconds. Symbols proceed
+        independently. Returns one LiquidationStep dict per symbol with
+        millisecond offsets from the start of the liquidation.
+        """
+        fill_timeout = fill_timeout if fill_timeout is not None else float(os.getenv("EOD_FILL_TIMEOUT", "10"))
+        start = time.perf_counter()
+        sem = asyncio.Semaphore(self.max_concurrency)
+        symbols = list(symbols)
+        open_by_symbol, positions = await asyncio.gather(
+            self.fetch_open_orders(symbols),
+            self.broker.call(self.trading_client.get_all_positions),
+        )
+        qty_by_symbol = {p.symbol: float(p.qty) for p in positions if p.symbol in set(symbols)}
+
+        async def run(symbol):
+            step = LiquidationStep(symbol=symbol)
+            open_ids = [str(o.id) for o in open_by_symbol.get(symbol, [])]
+            step.cancelled, step.acked, _, _ = await self.cancel_and_wait(open_ids, sem)
+            step.released_ms = _ms(time.perf_counter() - start)
+
+            qty = qty_by_symbol.get(symbol, 0.0)
+            if not qty:
+                step.status = "no_position"
+                return asdict(step)
+            step.qty = abs(qty)
+            side = OrderSide.SELL if qty > 0 else OrderSide.BUY
+            step.side = side.value
+            logger.info(f"Closing {qty} of {symbol} ({side.value}) for EOD...")
+            try:
+                async with sem:
+                    tx = await self.broker.call(self.trading_client.submit_order, MarketOrderRequest(
+                        symbol=symbol,
+                        qty=step.qty,
+                        side=side,
+                        time_in_force=TimeInForce.DAY
+                    ))
+            except Exception as e:  # noqa: BLE001 - any broker error fails this symbol only
+                logger.error(f"Failed to liquidate {symbol}: {e}")
+                step.status = "failed"
+                step.error = str(e)
+                return asdict(step)
+            step.order_id = str(tx.id)
+            step.submitted_ms = _ms(time.perf_counter() - start)
+            step.status = "submitted"
+
+            fut = self.acks.expect(step.order_id)
+            try:
+                event = await asyncio.wait_for(fut, timeout=fill_timeout)
+            except TimeoutError:
+                self.acks.discard(step.order_id, fut)
+                return asdict(step)
+            step.status = "closed" if event == "fill" else event
+            step.filled_ms = _ms(time.perf_counter() - start)
+            return asdict(step)
+
+        timeline = await asyncio.gather(*(run(s) for s in symbols))
+        logger.info(
+            f"Liquidation finished in {_ms(time.perf_counter() - start)}ms: "
+            f"{sum(t['status'] == 'closed' for t in timeline)} closed, "
+            f"{sum(t['status'] == 'submitted' for t in timeline)} unconfirmed, "
+            f"{sum(t['status'] == 'failed' for t in timeline)} failed"
+        )
+        return timeline
@@ -0,0 +1,85 @@
+import hashlib
+import logging
+import math
+import os
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.db import SessionLocal
+from backend.models import SentimentCacheEntry
+
+logger = logging.getLogger("SentimentCache")
+
+
+def headline_hash(headline_ids) -> str:
+    """Order-independent hash of a set of headline IDs."""
+    return hashlib.sha256("\n".join(sorted(headline_ids)).encode()).hexdigest()[:32]
+
+
+class SentimentStore:
+    """
+    Durable LLM sentiment verdicts in the app's SQLite DB, keyed by the
+    headline-set hash and a VIX bucket (SENTINEL_VIX_BUCKET points wide,
+    default 5). Every process pointed at the same DB - uvicorn workers,
+    scripts, restarts - reuses the same verdicts. Entries expire after
+    SENTINEL_CACHE_TTL_SECONDS (default 6h); expired rows are purged on write.
+
+    Failures are logged and treated as a miss, so the sentinel never
+    depends on the cache being available.
+    """
+
+    def __init__(self, ttl_seconds: float | None = None, vix_bucket_width: float | None = None, session_factory=None):
+        self.ttl = timedelta(seconds=ttl_seconds if ttl_seconds is not None else float(os.getenv("SENTINEL_CACHE_TTL_SECONDS", "21600")))
+        self.vix_bucket_width = vix_bucket_width or float(os.getenv("SENTINEL_VIX_BUCKET", "5"))
+        self._session_factory = session_factory
+
+    def _session(self):
+        return (self._session_factory or SessionLocal)()
+
+    def vix_bucket(self, vix: float) -> int:
+        return math.floor(vix / self.vix_bucket_width)
+
+    def key(self, headline_ids, vix: float) -> str:
+        return f"{headline_hash(headline_ids)}:{self.vix_bucket(vix)}"
+
+    def get(self, headline_ids, vix: float) -> float | None:
+        db = self._session()
+        try:
+            entry = db.get(SentimentCacheEntry, self.key(headline_ids, vix))
+            if entry is None or entry.expires_at <= datetime.now(UTC).replace(tzinfo=None):
+                return None
+            return entry.score
+        except SQLAlchemyError as e:
+            logger.warning(f"Sentiment cache read failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def put(self, headline_ids, vix: float, score: float) -> None:
+        now = datetime.now(UTC).replace(tzinfo=None)
+        values = {
+            "cache_key": self.key(headline_ids, vix),
+            "headline_hash": headline_hash(headline_ids),
+            "vix_bucket": self.vix_bucket(vix),
+            "headline_count": len(headline_ids),
+            "score": score,
+            "created_at": now,
+            "expires_at": now + self.ttl,
+        }
+        db = self._session()
+        try:
+            stmt = sqlite_insert(SentimentCacheEntry).values(**values)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[SentimentCacheEntry.cache_key],
+                set_={k: stmt.excluded[k] for k in ("score", "created_at", "expires_at")},
+            ))
+            db.execute(delete(SentimentCacheEntry).where(SentimentCacheEntry.expires_at <= now))
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Sentiment cache write failed: {e}")
+        finally:
+            db.close()
@@ -1,6 +1,8 @@
 import asyncio
+import json
 import logging
 import os
+import websockets
 from alpaca.data import StockHistoricalDataClient
 from alpaca.data.enums import DataFeed
 from alpaca.data.requests import StockLatestTradeRequest
@@ -31,58 +33,204 @@ class AlpacaStreamingService:
         self._stopping = False
 
         self.last_prices = {s: 0.0 for s in self.symbols}
+        # Price at each symbol's last trigger; moves are measured against it, not the previous tick.
+        self.ref_prices = {s: 0.0 for s in self.symbols}
         self.last_trigger_times = {s: 0.0 for s in self.symbols}
         self.threshold = 0.001
         self.heartbeat_sec = 30
         self.min_cooldown_sec = 10
         self.global_last_trigger = 0.0
 
+        # Symbols that moved since the last cycle started; drained by _run_trigger_loop.
+        self.coalesce_sec = float(os.getenv("TRIGGER_COALESCE_SEC", "0.25"))
+        self._dirty: set[str] = set()
+        self._dirty_event = asyncio.Event()
+        self.triggers_received = 0
+        self.cycles_triggered = 0
+
+        # "stream": one market-data WebSocket for all symbols, falling back to
+        # polling while it is unavailable. "poll": REST polling only.
+        self.data_mode = os.getenv("MARKET_DATA_MODE", "stream").lower()
+        self.data_stream_url = os.getenv(
+            "ALPACA_DATA_STREAM_URL", f"wss://stream.data.alpaca.markets/v2/{self._data_feed.value}"
+        )
+        # Adaptive polling: back off toward heartbeat_sec while prices are quiet,
+        # drop to poll_min_sec as soon as something moves.
+        self.poll_min_sec = float(os.getenv("MARKET_DATA_POLL_MIN_SEC", "2"))
+        self.poll_interval = self.poll_min_sec
+
         self._data_client = StockHistoricalDataClient(self._api_key, self._secret_key)
         self.trade_stream = None
+        self.data_socket = None
+
+    # ── Price-move trigger ─────────────────────────────────────────────────────
+
+    def _on_price(self, symbol: str, price: float, now: float) -> bool:
+        """
+        Feeds one price observation through the threshold / heartbeat rules
+        and marks the symbol dirty if it fires. Returns True if it fired.
+        """
+        self.last_prices[symbol] = price
+        ref = self.ref_prices.get(symbol, 0.0)
+        if ref == 0.0:
+            self.ref_prices[symbol] = price
+            return False
+
+        move_pct = abs(price - ref) / ref
+        time_since_last = now - self.last_trigger_times.get(symbol, 0.0)
+
+        if move_pct >= self.threshold or time_since_last >= self.heartbeat_sec:
+            logger.info(f"PREY DETECTED: {symbol} @ {price} (Δ {move_pct:.4%})")
+            self.ref_prices[symbol] = price
+            self.last_trigger_times[symbol] = now
+            self.triggers_received += 1
+            self._dirty.add(symbol)
+            self._dirty_event.set()
+            return True
+        return False
+
+    async def _run_trigger_loop(self):
+        """
+        Turns dirty symbols into cycles, one at a time.
+
+        Triggers that land within coalesce_sec of each other (or during the
+        global cooldown, or while a cycle is running) are merged into the
+        next batch. Pending work is just the dirty set, so it is bounded by
+        the symbol universe however slow a cycle is.
+        """
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            await self._dirty_event.wait()
+            if self._stopping:
+                return
+            wait = max(self.coalesce_sec, self.global_last_trigger + self.min_cooldown_sec - loop.time())
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            batch = [s for s in self.symbols if s in self._dirty]
+            self._dirty.clear()
+            self._dirty_event.clear()
+            if not batch:
+                continue
+            self.global_last_trigger = loop.time()
+            self.cycles_triggered += 1
+            logger.info(f"Cycle triggered for {len(batch)} symbol(s): {', '.join(batch)}")
+            try:
+                await self.data_callback(symbols=batch)
+            except Exception as e:  # noqa: BLE001 - the trigger loop must outlive a failed cycle
+                logger.error(f"Triggered cycle failed: {e}")
+
+    # ── WebSocket market data ──────────────────────────────────────────────────
+
+    async def _run_data_stream(self):
+        """
+        Consumes trades for every symbol over a single market-data WebSocket.
+        Returns when the socket closes; raises if it cannot connect or authenticate.
+        """
+        async with websockets.connect(self.data_stream_url, open_timeout=10) as ws:
+            self.data_socket = ws
+            try:
+                await self._expect(ws, "success", "connected")
+                await ws.send(json.dumps({"action": "auth", "key": self._api_key, "secret": self._secret_key}))
+                await self._expect(ws, "success", "authenticated")
+                await ws.send(json.dumps({"action": "subscribe", "trades": self.symbols}))
+                await self._expect(ws, "subscription")
+                logger.info(f"Market-data stream subscribed to {len(self.symbols)} symbols")
+
+                loop = asyncio.get_running_loop()
+                async for raw in ws:
+                    for msg in json.loads(raw):
+                        kind = msg.get("T")
+                        if kind == "t":
+                            price = msg["p"]
+                        elif kind == "b":
+                            price = msg["c"]
+                        elif kind == "error":
+                            raise ConnectionError(f"market-data stream error {msg.get('code')}: {msg.get('msg')}")
+                        else:
+                            continue
+                        if msg.get("S") in self.last_prices:
+                            self._on_price(msg["S"], float(price), loop.time())
+            finally:
+                self.data_socket = None
+
+    @staticmethod
+    async def _expect(ws, kind: str, text: str | None = None):
+        """Waits for the control message `kind` (and `msg` == text) during the handshake."""
+        while True:
+            for msg in json.loads(await asyncio.wait_for(ws.recv(), timeout=10)):
+                if msg.get("T") == "error":
+                    raise ConnectionError(f"market-data stream error {msg.get('code')}: {msg.get('msg')}")
+                if msg.get("T") == kind and (text is None or msg.get("msg") == text):
+                    return msg
+
+    async def _run_market_data(self):
+        if self.data_mode != "stream":
+            await self._run_data_polling()
+            return
+
+        backoff = 5
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            started = loop.time()
+            try:
+                await self._run_data_stream()
+                logger.warning("Market-data stream closed.")
+            except Exception as e:  # noqa: BLE001 - any stream failure falls back to polling
+                if self._stopping:
+                    return
+                logger.error(f"Market-data stream unavailable: {e}")
+            if self._stopping:
+                return
+            if loop.time() - started > 60:
+                backoff = 5
+            logger.info(f"Falling back to REST polling for {backoff}s before reconnecting the stream...")
+            await self._run_data_polling(until=loop.time() + backoff)
+            backoff = min(backoff * 2, 300)
 
     # ── REST-based market data polling ────────────────────────────────────────
 
-    async def _run_data_polling(self):
-        """Poll latest trades via REST instead of WebSocket to avoid connection limits."""
+    async def _run_data_polling(self, until: float | None = None):
+        """
+        Polls latest trades via REST, every poll_min_sec while prices move and
+        backing off toward heartbeat_sec while they are quiet. Runs until
+        stopped, or until loop time `until` when used as the stream fallback.
+        """
         logger.info("Starting REST market-data polling loop...")
+        loop = asyncio.get_running_loop()
         backoff = 5
-        while not self._stopping:
+        self.poll_interval = self.poll_min_sec
+        while not self._stopping and (until is None or loop.time() < until):
             try:
                 req = StockLatestTradeRequest(
                     symbol_or_symbols=self.symbols,
                     feed=self._data_feed,
                 )
-                latest = self._data_client.get_stock_latest_trade(req)
+                latest = await asyncio.to_thread(self._data_client.get_stock_latest_trade, req)
 
-                now = asyncio.get_event_loop().time()
-                triggered = False
+                now = loop.time()
+                moving = False
 
                 for symbol in self.symbols:
                     if symbol not in latest:
                         continue
                     price = float(latest[symbol].price)
                     prev = self.last_prices.get(symbol, 0.0)
+                    if prev and abs(price - prev) / prev >= self.threshold / 2:
+                        moving = True
+                    if self._on_price(symbol, price, now):
+                        moving = True
 
-                    if prev == 0.0:
-                        self.last_prices[symbol] = price
-                        continue
-
-                    move_pct = abs(price - prev) / prev
-                    time_since_last = now - self.last_trigger_times.get(symbol, 0.0)
-
-                    if move_pct >= self.threshold or time_since_last >= self.heartbeat_sec:
-                        if not triggered and (now - self.global_last_trigger) >= self.min_cooldown_sec:
-                            logger.info(f"PREY DETECTED: {symbol} @ {price} (Δ {move_pct:.4%})")
-                            self.last_prices[symbol] = price
-                            self.last_trigger_times[symbol] = now
-                            self.global_last_trigger = now
-                            triggered = True
-                            await self.data_callback()
-                    else:
-                        self.last_prices[symbol] = price
+                if moving:
+                    self.poll_interval = self.poll_min_sec
+                else:
+                    self.poll_interval = min(self.poll_interval * 2, self.heartbeat_sec)
 
                 backoff = 5
-                await asyncio.sleep(self.heartbeat_sec)
+                delay = self.poll_interval
+                if until is not None:
+                    delay = min(delay, max(0.0, until - loop.time()))
+                await asyncio.sleep(delay)
 
             except Exception as e:
                 if self._stopping:
@@ -129,11 +277,15 @@ class AlpacaStreamingService:
     # ── Lifecycle ──────────────────────────────────────────────────────────────
 
     async def start(self):
-        logger.info("Starting market-data polling + trade stream...")
-        asyncio.create_task(self._run_data_polling())
+        logger.info(f"Starting market data ({self.data_mode}) + trade stream...")
+        asyncio.create_task(self._run_trigger_loop())
+        asyncio.create_task(self._run_market_data())
         await self._run_trade_stream_with_reconnect()
 
     async def stop(self):
         logger.info("Stopping streaming service...")
         self._stopping = True
+        self._dirty_event.set()
+        if self.data_socket is not None:
+            await self.data_socket.close()
         await self._close_trade_stream()
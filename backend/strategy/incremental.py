@@ -0,0 +1,212 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from backend.strategy.risk import annualization_factor
+
+# Recompute window stats from scratch every N pushes to stop float drift.
+_RESYNC_EVERY = 10_000
+
+
+class RollingWindow:
+    """
+    Fixed-size window with O(1) push.
+
+    Keeps a running sum for the mean and a Welford-style M2 for the sample
+    variance, updated in place when the oldest value slides out. Stats are
+    None until the window is full, matching pandas' rolling(window) NaNs.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._values: deque[float] = deque()
+        self._sum = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._pushes = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def full(self) -> bool:
+        return len(self._values) == self.size
+
+    def _advance(self, x: float) -> tuple[float, float, float]:
+        """(sum, mean, m2) after pushing x, without mutating the window."""
+        if len(self._values) < self.size:
+            n = len(self._values) + 1
+            delta = x - self._mean
+            mean = self._mean + delta / n
+            return self._sum + x, mean, self._m2 + delta * (x - mean)
+        old = self._values[0]
+        mean = self._mean + (x - old) / self.size
+        m2 = self._m2 + (x - old) * (x - mean + old - self._mean)
+        return self._sum - old + x, mean, max(m2, 0.0)
+
+    def push(self, x: float) -> None:
+        self._sum, self._mean, self._m2 = self._advance(x)
+        if len(self._values) == self.size:
+            self._values.popleft()
+        self._values.append(x)
+
+        self._pushes += 1
+        if self._pushes % _RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        values = np.fromiter(self._values, dtype=float)
+        self._sum = float(values.sum())
+        self._mean = float(values.mean()) if len(values) else 0.0
+        self._m2 = float(((values - self._mean) ** 2).sum())
+
+    def mean(self, peek: float | None = None) -> float | None:
+        """Window mean, optionally as if `peek` had been pushed."""
+        if peek is None:
+            return self._sum / self.size if self.full else None
+        if len(self._values) + 1 < self.size:
+            return None
+        return self._advance(peek)[0] / self.size
+
+    def std(self, peek: float | None = None) -> float | None:
+        """Sample (ddof=1) standard deviation, optionally with `peek` pushed."""
+        if self.size < 2:
+            return None
+        if peek is None:
+            return math.sqrt(max(self._m2, 0.0) / (self.size - 1)) if self.full else None
+        if len(self._values) + 1 < self.size:
+            return None
+        return math.sqrt(max(self._advance(peek)[2], 0.0) / (self.size - 1))
+
+
+class _SymbolState:
+    def __init__(self, vol_window: int):
+        self.ma: dict[int, RollingWindow] = {}
+        self.returns = RollingWindow(vol_window)
+        self.last_ts = None
+        self.last_close: float | None = None
+
+    def push(self, ts, close: float) -> None:
+        for window in self.ma.values():
+            window.push(close)
+        if self.last_close:
+            self.returns.push(math.log(close / self.last_close))
+        self.last_ts = ts
+        self.last_close = close
+
+
+class IncrementalSignalEngine:
+    """
+    Per-symbol rolling state for the live cycle.
+
+    Instead of re-running compute_signal / compute_volatility over the whole
+    lookback on every cycle, bars are pushed in as they arrive and each
+    moving-average window (shared by every parameter set that uses it) and
+    the log-return vol window update in O(1). The latest trade can be
+    applied as a provisional "live bar" that is not committed to state.
+
+    signals() / volatility() return the same (symbol, timestamp) frames
+    that size_position expects, with one row per symbol. Pass the same
+    `now` to both so live rows line up on the join.
+    """
+
+    def __init__(self, vol_window: int = 20, timeframe: str = "1m"):
+        self.vol_window = vol_window
+        self.multiplier = annualization_factor(timeframe)
+        self._windows: set[int] = set()
+        self._states: dict[str, _SymbolState] = {}
+
+    @property
+    def symbols(self) -> list[str]:
+        return list(self._states)
+
+    def _state(self, symbol: str) -> _SymbolState:
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _SymbolState(self.vol_window)
+            state.ma = {w: RollingWindow(w) for w in self._windows}
+        return state
+
+    def last_timestamp(self, symbol: str):
+        state = self._states.get(symbol)
+        return state.last_ts if state else None
+
+    def missing(self, symbols, windows=()) -> list[str]:
+        """Symbols in `symbols` with no state yet, or not tracking every window in `windows`."""
+        return [
+            s for s in symbols
+            if s not in self._states or any(w not in self._states[s].ma for w in windows)
+        ]
+
+    def update(self, bars: pd.DataFrame, windows=()) -> int:
+        """
+        Pushes rows of `bars` newer than what each symbol has already seen,
+        and backfills any MA window in `windows` not tracked yet.
+        Returns the number of bars pushed.
+        """
+        self._windows.update(windows)
+        pushed = 0
+        for symbol, closes in bars['close'].groupby(level=0):
+            closes = closes.droplevel(0).sort_index().dropna()
+            state = self._state(symbol)
+
+            if state.last_ts is None:
+                seen, fresh = closes.iloc[:0], closes
+            else:
+                is_new = closes.index > state.last_ts
+                seen, fresh = closes[~is_new], closes[is_new]
+
+            for window in self._windows:
+                if window not in state.ma:
+                    state.ma[window] = RollingWindow(window)
+                    for close in seen.iloc[-window:]:
+                        state.ma[window].push(float(close))
+
+            for ts, close in fresh.items():
+                state.push(ts, float(close))
+            pushed += len(fresh)
+        return pushed
+
+    def push_bar(self, symbol: str, ts, close: float) -> None:
+        """Pushes a single completed bar (e.g. from a streaming feed)."""
+        state = self._state(symbol)
+        if state.last_ts is not None and ts <= state.last_ts:
+            return
+        state.push(ts, float(close))
+
+    def signals(self, fast_window: int, slow_window: int, threshold: float = 0.0005, live_prices: dict | None = None, now=None) -> pd.DataFrame:
+        """Latest long-only crossover signal per symbol (see compute_signal)."""
+        live_prices = live_prices or {}
+        rows = []
+        for symbol, state in self._states.items():
+            if fast_window not in state.ma or slow_window not in state.ma:
+                raise KeyError(f"Window {fast_window}/{slow_window} not tracked; pass it to update()")
+            live = live_prices.get(symbol)
+            fast = state.ma[fast_window].mean(live)
+            slow = state.ma[slow_window].mean(live)
+            sig = 0.0
+            if fast is not None and slow:
+                sig = 1.0 if (fast - slow) / slow > threshold else 0.0
+            rows.append((symbol, now if live is not None and now is not None else state.last_ts, sig))
+        return self._frame(rows, 'signal')
+
+    def volatility(self, live_prices: dict | None = None, now=None) -> pd.DataFrame:
+        """Latest annualized realized vol per symbol (see compute_volatility)."""
+        live_prices = live_prices or {}
+        rows = []
+        for symbol, state in self._states.items():
+            live = live_prices.get(symbol)
+            peek = None
+            if live is not None and state.last_close:
+                peek = math.log(live / state.last_close)
+            std = state.returns.std(peek)
+            vol = std * self.multiplier if std is not None else np.nan
+            rows.append((symbol, now if live is not None and now is not None else state.last_ts, vol))
+        return self._frame(rows, 'volatility')
+
+    @staticmethod
+    def _frame(rows, column: str) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=['symbol', 'timestamp', column])
+        return df.set_index(['symbol', 'timestamp']).sort_index()
@@ -1,28 +1,78 @@
 import pandas as pd
 import numpy as np
 
-def compute_volatility(bars: pd.DataFrame, window: int = 20, timeframe: str = "1d") -> pd.DataFrame:
+def annualization_factor(timeframe: str = "1d") -> float:
     """
-    Computes annualized realized volatility.
+    Scale factor that annualizes a per-bar volatility.
     """
-    closes = bars['close'].unstack(level=0)
-    log_returns = np.log(closes / closes.shift(1))
-    
-    # Scale based on frequency
     # Daily: sqrt(252)
     # Minute: sqrt(252 * 6.5 * 60) assuming 6.5 hour trading day
     if timeframe == "1m":
-        multiplier = np.sqrt(252 * 390) # 390 minutes per day
+        return np.sqrt(252 * 390) # 390 minutes per day
     elif timeframe == "5m":
-        multiplier = np.sqrt(252 * 78) # 78 5-min bars per day
+        return np.sqrt(252 * 78) # 78 5-min bars per day
     elif timeframe == "15m":
-        multiplier = np.sqrt(252 * 26) # 26 15-min bars per day
-    else:
-        multiplier = np.sqrt(252)
-        
-    vol = log_returns.rolling(window=window).std() * multiplier
-    
-    return vol.stack().to_frame('volatility').swaplevel(0, 1).sort_index()
+        return np.sqrt(252 * 26) # 26 15-min bars per day
+    return np.sqrt(252)
+
+def volatility_matrix(closes: pd.DataFrame, window: int = 20, timeframe: str = "1d") -> pd.DataFrame:
+    """
+    Annualized realized volatility on a wide (timestamp x symbol) close frame.
+    """
+    log_returns = np.log(closes / closes.shift(1))
+    return log_returns.rolling(window=window).std() * annualization_factor(timeframe)
+
+def compute_volatility(bars: pd.DataFrame, window: int = 20, timeframe: str = "1d") -> pd.DataFrame:
+    """
+    Computes annualized realized volatility.
+
+    NaN rows (warm-up, or a window spanning a missing bar) are kept so that
+    size_position pairs the latest signal with the latest valid vol on any
+    pandas version; the legacy stack() dropped them, which made it reuse an
+    older bar's signal instead.
+    """
+    closes = bars['close'].unstack(level=0)
+    vol = volatility_matrix(closes, window=window, timeframe=timeframe)
+
+    return vol.stack(future_stack=True).to_frame('volatility').swaplevel(0, 1).sort_index()
+
+def vix_risk_multiplier(vix_value):
+    """
+    Regime Shield: If VIX > 25, we are in a high-fear regime. Cut aggression.
+    Accepts a scalar or an array of VIX values.
+    """
+    vix = np.asarray(vix_value, dtype=float)
+    mult = np.where(vix > 35, 0.1, np.where(vix > 25, 0.5, 1.0))
+    return float(mult) if mult.ndim == 0 else mult
+
+def position_weights(
+    signals: np.ndarray,
+    volatility: np.ndarray,
+    vol_target=0.10,
+    vix_value=20.0,
+    max_position_weight: float = 0.50,
+    leverage_cap: float = 0.95
+) -> np.ndarray:
+    """
+    Vectorized counterpart of size_position returning weights instead of dollars.
+
+    The last axis is the symbol axis; `vol_target` and `vix_value` broadcast
+    over the leading axes (e.g. one VIX per bar, one vol target per arm).
+    """
+    sig = np.asarray(signals, dtype=float)
+    vol = np.asarray(volatility, dtype=float)
+    valid = ~np.isnan(sig) & ~np.isnan(vol) & (vol != 0)
+
+    adjusted_vol_target = np.asarray(vol_target, dtype=float) * vix_risk_multiplier(vix_value)
+    adjusted_vol_target = np.expand_dims(adjusted_vol_target, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.where(valid, (adjusted_vol_target / vol) * sig, 0.0)
+    w = np.clip(w, -max_position_weight, max_position_weight)
+
+    total_gross_exposure = np.abs(w).sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalization_factor = np.where(total_gross_exposure > leverage_cap, leverage_cap / total_gross_exposure, 1.0)
+    return w * normalization_factor
 
 def size_position(
     signals: pd.DataFrame, 
@@ -39,12 +89,8 @@ def size_position(
     df = signals.join(volatility, how='inner')
     latest = df.groupby(level=0).last()
     
-    # Regime Shield: If VIX > 25, we are in a high-fear regime. Cut aggression.
-    risk_multiplier = 1.0
-    if vix_value > 35:
-        risk_multiplier = 0.1 # Panic shift (move almost everything to cash)
-    elif vix_value > 25:
-        risk_multiplier = 0.5 # Defensive shift
+    # Regime Shield: 0.1x above VIX 35 (panic), 0.5x above 25 (defensive)
+    risk_multiplier = vix_risk_multiplier(vix_value)
 
     # First pass: Calculate raw unconstrained weights
     raw_weights = {}
@@ -1,6 +1,18 @@
 import pandas as pd
 import numpy as np
 
+def momentum_signal(fast_ma, slow_ma, threshold: float = 0.0005) -> np.ndarray:
+    """
+    Long-only crossover signal from precomputed moving averages.
+
+    Works on any array shape (time x symbol, arm x time x symbol, ...).
+    Returns 1.0 where fast_ma > slow_ma * (1 + threshold), else 0.0;
+    warm-up NaNs (window not yet full) map to 0.0.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff_pct = (np.asarray(fast_ma) - np.asarray(slow_ma)) / np.asarray(slow_ma)
+    return np.where(diff_pct > threshold, 1.0, 0.0)
+
 def compute_signal(bars: pd.DataFrame, fast_window: int = 20, slow_window: int = 60, threshold: float = 0.0005) -> pd.DataFrame:
     """
     Computes time-series momentum signals based on MA crossover with a confidence threshold.
@@ -22,10 +34,8 @@ def compute_signal(bars: pd.DataFrame, fast_window: int = 20, slow_window: int =
     
     # Signal: 1 if fast_ma > slow_ma * (1 + threshold)
     # This prevents 'micro-flips' where MAs touch but don't trend.
-    diff_pct = (fast_ma - slow_ma) / slow_ma
-    
-    raw_signal = np.where(diff_pct > threshold, 1.0, 
-                          np.where(diff_pct < -threshold, -1.0, 0.0))
+    # For MVP: Long only if positive, else flat.
+    raw_signal = momentum_signal(fast_ma, slow_ma, threshold)
     
     # Convert back to DataFrame
     signals = pd.DataFrame(raw_signal, index=closes.index, columns=closes.columns)
@@ -34,7 +44,4 @@ def compute_signal(bars: pd.DataFrame, fast_window: int = 20, slow_window: int =
     signals = signals.stack().to_frame('signal')
     signals = signals.swaplevel(0, 1).sort_index()
     
-    # For MVP: Long only if positive, else flat.
-    signals['signal'] = signals['signal'].apply(lambda x: 1.0 if x > 0 else 0.0)
-    
     return signals
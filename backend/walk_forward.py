@@ -0,0 +1,190 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from backend import backtest as backtest_module
+from backend import db as db_module
+from backend import yf_cache
+from backend.config import TRADED_SYMBOLS
+from backend.learning import EpsilonGreedyBandit
+
+logger = logging.getLogger("WalkForward")
+
+
+@dataclass
+class Fold:
+    """One train -> blind-test split over daily bars. Day counts are calendar days."""
+    index: int
+    train_end: datetime
+    test_end: datetime
+    train_days: int
+    test_days: int
+
+
+def _trading_days(calendar_days: int) -> int:
+    """run_backtest's days_to_sim counts bars, not calendar days."""
+    return max(2, round(calendar_days * 252 / 365))
+
+
+def make_folds(end_date: datetime, n_folds: int = 5, train_days: int = 730, test_days: int = 90) -> list[Fold]:
+    """
+    Rolling folds whose test windows tile the period ending at `end_date`,
+    oldest first. Each fold trains on the `train_days` before its test window.
+    """
+    folds = []
+    for k in range(n_folds):
+        test_end = end_date - timedelta(days=(n_folds - 1 - k) * test_days)
+        folds.append(Fold(
+            index=k,
+            train_end=test_end - timedelta(days=test_days),
+            test_end=test_end,
+            train_days=train_days,
+            test_days=test_days,
+        ))
+    return folds
+
+
+@contextmanager
+def _isolated_db(path: str):
+    """Points backend.db.SessionLocal at a fresh SQLite file for the duration."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    db_module.Base.metadata.create_all(bind=engine)
+    previous = db_module.SessionLocal.kw.get("bind")
+    db_module.SessionLocal.configure(bind=engine)
+    try:
+        yield
+    finally:
+        db_module.SessionLocal.configure(bind=previous)
+        engine.dispose()
+
+
+def _curve_stats(curve) -> dict:
+    if curve is None or len(curve) == 0:
+        return {"return_pct": 0.0, "sharpe": 0.0, "max_drawdown_pct": 0.0}
+    equity = np.concatenate([[100000.0], np.asarray(curve, dtype=float)])
+    returns = np.diff(equity) / equity[:-1]
+    peak = np.maximum.accumulate(equity)
+    sharpe = returns.mean() / returns.std() * np.sqrt(252) if returns.std() > 0 else 0.0
+    return {
+        "return_pct": (equity[-1] / equity[0] - 1) * 100,
+        "sharpe": float(sharpe),
+        "max_drawdown_pct": float(((peak - equity) / peak).max() * 100),
+    }
+
+
+def _init_worker() -> None:
+    """
+    Pool initializer: workers only read the history the parent warmed, so
+    they never write or evict the shared yfinance cache under each other.
+    """
+    os.environ["YF_CACHE_OFFLINE"] = "true"
+
+
+def run_fold(fold: Fold, db_dir: str, inject_arms=None) -> dict:
+    """Trains then blind-tests one fold against its own SQLite file in `db_dir`."""
+    logging.basicConfig(level=logging.INFO)
+    path = os.path.join(db_dir, f"fold_{fold.index}.db")
+    with _isolated_db(path):
+        train = backtest_module.run_backtest(
+            days_to_sim=_trading_days(fold.train_days), end_date=fold.train_end,
+            reset_bandit=True, is_training=True, inject_arms=inject_arms,
+        )
+        session = db_module.SessionLocal()
+        try:
+            bandit = EpsilonGreedyBandit(session)
+            if inject_arms:
+                bandit.set_arms(inject_arms)
+            best_arm = bandit.get_best_arm()
+        finally:
+            session.close()
+        test = backtest_module.run_backtest(
+            days_to_sim=_trading_days(fold.test_days), end_date=fold.test_end,
+            reset_bandit=False, is_training=False, inject_arms=inject_arms,
+        )
+
+    train_curve = train["equity_curve"] if train else None
+    test_curve = test["equity_curve"] if test else None
+    return {
+        "fold": asdict(fold),
+        "best_arm": best_arm,
+        "train": _curve_stats(train_curve),
+        "test": _curve_stats(test_curve),
+        "test_curve": test_curve,
+        "ok": train is not None and test is not None,
+    }
+
+
+def merge_results(results: list[dict]) -> dict:
+    """
+    Combines per-fold results into one report. The out-of-sample curve chains
+    each fold's blind-test returns, so it reads as one continuous account.
+    """
+    results = sorted(results, key=lambda r: r["fold"]["index"])
+    pieces = []
+    for r in results:
+        curve = r["test_curve"]
+        if curve is not None and len(curve):
+            pieces.append(curve / curve.shift(1, fill_value=100000.0) - 1)
+    oos_returns = pd.concat(pieces) if pieces else pd.Series(dtype=float)
+    oos_returns = oos_returns[~oos_returns.index.duplicated(keep="last")].sort_index()
+    oos_equity = 100000.0 * (1 + oos_returns).cumprod()
+
+    test_returns = [r["test"]["return_pct"] for r in results if r["ok"]]
+    return {
+        "folds": [{k: v for k, v in r.items() if k != "test_curve"} for r in results],
+        "oos_equity": oos_equity.rename("equity"),
+        "summary": {
+            "folds": len(results),
+            "failed_folds": sum(not r["ok"] for r in results),
+            "mean_test_return_pct": float(np.mean(test_returns)) if test_returns else 0.0,
+            "positive_folds": sum(ret > 0 for ret in test_returns),
+            **{f"oos_{k}": v for k, v in _curve_stats(oos_equity).items()},
+        },
+    }
+
+
+def run_walk_forward(n_folds: int = 5, train_days: int = 730, test_days: int = 90, end_date: datetime | None = None,
+                     inject_arms=None, max_workers: int | None = None, db_dir: str | None = None) -> dict:
+    """
+    Runs every fold in its own process with its own SQLite DB and merges the
+    results. max_workers=1 runs the folds in this process, one after another.
+    """
+    end_date = end_date or datetime.now()
+    folds = make_folds(end_date, n_folds, train_days, test_days)
+    max_workers = max_workers or min(n_folds, os.cpu_count() or 1)
+
+    # Warm the shared on-disk history once so workers don't all download it.
+    earliest = min(f.train_end for f in folds) - timedelta(days=_trading_days(train_days) + 365)
+    yf_cache.download(list(TRADED_SYMBOLS) + ["^VIX"], earliest, end_date)
+
+    with tempfile.TemporaryDirectory(prefix="walk_forward_", dir=db_dir) as tmp:
+        logger.info(f"Running {n_folds} folds on {max_workers} worker(s)")
+        if max_workers == 1:
+            results = [run_fold(f, tmp, inject_arms) for f in folds]
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, initializer=_init_worker) as pool:
+                futures = [pool.submit(run_fold, f, tmp, inject_arms) for f in folds]
+                results = [f.result() for f in futures]
+
+    report = merge_results(results)
+    for r in report["folds"]:
+        fold = r["fold"]
+        logger.info(
+            f" Fold {fold['index']} (test to {fold['test_end']:%Y-%m-%d}): "
+            f"train {r['train']['return_pct']:+.2f}% | test {r['test']['return_pct']:+.2f}% "
+            f"| sharpe {r['test']['sharpe']:.2f} | arm {r['best_arm']}"
+        )
+    s = report["summary"]
+    logger.info(f" Out-of-sample: {s['oos_return_pct']:+.2f}% | sharpe {s['oos_sharpe']:.2f} | "
+                f"max DD {s['oos_max_drawdown_pct']:.2f}% | {s['positive_folds']}/{s['folds']} folds positive")
+    return report
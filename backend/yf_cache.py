@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import yfinance as yf
+
+from backend.db import DB_DIR
+
+logger = logging.getLogger("YFCache")
+
+_MANIFEST = "manifest.json"
+_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+_INTRADAY_SUFFIXES = ("m", "h")
+
+
+def _empty_history() -> pd.DataFrame:
+    return pd.DataFrame(columns=list(_COLUMNS.values()), index=pd.DatetimeIndex([], name='timestamp'), dtype=float)
+
+
+def _memo_end(end: pd.Timestamp, interval: str) -> pd.Timestamp:
+    """
+    `end` rounded to the grain of `interval` for the in-memory memo, so
+    repeated end=now() requests share an entry: the next midnight for daily
+    and slower bars, the current minute for intraday ones.
+    """
+    return end.floor("min") if interval.endswith(_INTRADAY_SUFFIXES) else end.ceil("D")
+
+
+def _to_long(raw: pd.DataFrame, symbols: list[str]) -> pd.DataFrame:
+    """yf.download output -> (symbol, timestamp) frame with lowercase columns."""
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+    if isinstance(raw.columns, pd.MultiIndex):
+        long = raw.stack(level=1, future_stack=True).rename_axis(['timestamp', 'symbol']).swaplevel(0, 1)
+    else:
+        long = raw.copy()
+        long['symbol'] = symbols[0]
+        long = long.set_index('symbol', append=True).swaplevel(0, 1)
+        long.index.names = ['symbol', 'timestamp']
+    long = long.rename(columns=_COLUMNS)
+    return long.dropna(subset=['close']).sort_index()
+
+
+class YFinanceCache:
+    """
+    Local cache in front of yf.download.
+
+    Each (symbol, interval) history lives in one Parquet file named by a
+    hash of that key, and the manifest records the [start, end) range it
+    covers. A request for (symbols, start, end, interval) only downloads the
+    head/tail each symbol is missing, so overlapping walk-forward phases
+    fetch every history once. Files are evicted least-recently-used once
+    the cache exceeds `max_bytes`. In offline mode nothing is downloaded
+    and nothing on disk is written or evicted, so any number of processes
+    can read a cache warmed by one writer. The last `memo_size` results are
+    also kept in memory.
+    """
+
+    def __init__(self, root: str | None = None, max_bytes: int | None = None, offline: bool | None = None,
+                 memo_size: int = 16):
+        self.root = root or os.getenv("YF_CACHE_DIR", os.path.join(DB_DIR, "yf_cache"))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("YF_CACHE_MAX_MB", "512")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        if offline is None:
+            offline = os.getenv("YF_CACHE_OFFLINE", "false").lower() == "true"
+        self.offline = offline
+        self.memo_size = memo_size
+        self._memo: OrderedDict[tuple, pd.DataFrame] = OrderedDict()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def _key(symbol: str, interval: str) -> str:
+        return hashlib.sha1(f"{symbol}|{interval}".encode()).hexdigest()[:20]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.parquet")
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.root, _MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _read_history(self, key: str) -> pd.DataFrame | None:
+        """The cached history for `key`, or None if it is missing or unreadable (e.g. evicted mid-read)."""
+        try:
+            return pd.read_parquet(self._path(key))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable yfinance cache file {self._path(key)}: {e}")
+            return None
+
+    def _save_manifest(self, manifest: dict) -> None:
+        # Write-then-rename so a parallel reader never sees half a manifest.
+        path = os.path.join(self.root, _MANIFEST)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+
+    def _missing(self, entry: dict | None, start: pd.Timestamp, end: pd.Timestamp) -> list[tuple]:
+        if entry is None:
+            return [(start, end)]
+        lo, hi = pd.Timestamp(entry["start"]), pd.Timestamp(entry["end"])
+        if end < lo or start > hi:
+            return [(start, end)]
+        gaps = []
+        if start < lo:
+            gaps.append((start, lo))
+        if end > hi:
+            # Re-fetch the last covered day in case its bar was still live.
+            gaps.append((hi.normalize(), end))
+        return gaps
+
+    def _merge(self, manifest: dict, symbol: str, interval: str, rows: pd.DataFrame, start, end) -> None:
+        key = self._key(symbol, interval)
+        path = self._path(key)
+        entry = manifest.get(key)
+        cached = self._read_history(key) if entry is not None else None
+        if cached is not None:
+            rows = pd.concat([cached, rows])
+            rows = rows[~rows.index.duplicated(keep="last")]
+            lo, hi = pd.Timestamp(entry["start"]), pd.Timestamp(entry["end"])
+            if not (end < lo or start > hi):
+                start, end = min(start, lo), max(end, hi)
+        # Same write-then-rename as the manifest, for readers in other processes.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        rows.sort_index().to_parquet(tmp)
+        os.replace(tmp, path)
+        manifest[key] = {
+            "symbol": symbol,
+            "interval": interval,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "bytes": os.path.getsize(path),
+            "last_used": time.time(),
+        }
+
+    def _evict(self, manifest: dict, keep: set[str]) -> None:
+        total = sum(e["bytes"] for e in manifest.values())
+        for key in sorted(manifest, key=lambda k: manifest[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            total -= manifest[key]["bytes"]
+            logger.info(f"Evicting {manifest[key]['symbol']} ({manifest[key]['interval']}) from yfinance cache")
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del manifest[key]
+
+    def download(self, symbols: list[str], start, end, interval: str = "1d") -> pd.DataFrame:
+        """
+        History for `symbols` in [start, end) as a (symbol, timestamp) frame
+        with open/high/low/close/volume columns.
+        """
+        symbols = sorted(set(symbols))
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end)
+        memo_key = (tuple(symbols), start, _memo_end(end, interval), interval)
+        if memo_key in self._memo:
+            self._memo.move_to_end(memo_key)
+            return self._memo[memo_key].copy()
+
+        manifest = self._load_manifest()
+
+        gaps: dict[tuple, list[str]] = {}
+        for symbol in symbols:
+            key = self._key(symbol, interval)
+            entry = manifest.get(key) if os.path.exists(self._path(key)) else None
+            for gap in self._missing(entry, start, end):
+                gaps.setdefault(gap, []).append(symbol)
+
+        if gaps and self.offline:
+            logger.warning(f"yfinance cache offline: {sum(len(g) for g in gaps.values())} ranges not cached")
+        elif gaps:
+            for (gap_start, gap_end), group in gaps.items():
+                logger.info(f"Downloading {len(group)} symbols from Yahoo Finance ({gap_start:%Y-%m-%d} -> {gap_end:%Y-%m-%d})")
+                raw = yf.download(group, start=gap_start, end=gap_end, interval=interval, progress=False)
+                fetched = _to_long(raw, group)
+                for symbol in group:
+                    rows = fetched.xs(symbol, level='symbol') if symbol in fetched.index.get_level_values(0) else _empty_history()
+                    self._merge(manifest, symbol, interval, rows, gap_start, gap_end)
+
+        frames = {}
+        for symbol in symbols:
+            key = self._key(symbol, interval)
+            rows = self._read_history(key) if key in manifest else None
+            if rows is None:
+                # Unreadable or gone: forget it so the next call re-downloads.
+                manifest.pop(key, None)
+                continue
+            manifest[key]["last_used"] = time.time()
+            rows = rows[(rows.index >= start) & (rows.index < end)]
+            if not rows.empty:
+                frames[symbol] = rows
+
+        if not self.offline:
+            self._evict(manifest, keep={self._key(s, interval) for s in symbols})
+            self._save_manifest(manifest)
+
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames, names=['symbol', 'timestamp']).sort_index()
+        self._memo[memo_key] = result
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result.copy()
+
+
+_default_cache: YFinanceCache | None = None
+
+
+def download(symbols: list[str], start, end, interval: str = "1d") -> pd.DataFrame:
+    """Module-level shortcut over a process-wide YFinanceCache."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = YFinanceCache()
+    return _default_cache.download(symbols, start, end, interval)
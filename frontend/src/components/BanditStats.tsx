@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { fetchBanditStats, type BanditArm } from "../lib/api";
+import { fetchDashboard, type BanditArm } from "../lib/api";
 
 export default function BanditStats() {
   const [arms, setArms] = useState<BanditArm[]>([]);
@@ -8,7 +8,9 @@ export default function BanditStats() {
 
   useEffect(() => {
     const load = () => {
-      fetchBanditStats().then(setArms).catch(() => {});
+      fetchDashboard()
+        .then((d) => setArms(d.bandit_stats ?? []))
+        .catch(() => {});
     };
     load();
     const id = setInterval(load, 30000);
@@ -3,7 +3,7 @@ import { Play, FlaskConical, Zap, OctagonX, ShieldOff, ShieldCheck } from "lucid
 import {
   runBot,
   triggerBacktest,
-  fetchRiskStatus,
+  fetchDashboard,
   setRiskOverride,
   forceLiquidate,
 } from "../lib/api";
@@ -16,7 +16,8 @@ export default function Controls() {
 
   const refreshRisk = async () => {
     try {
-      const s = await fetchRiskStatus();
+      const s = (await fetchDashboard()).risk_status;
+      if (!s) return;
       setHalted(s.override_active && s.active_regime === "CRISIS");
       setActiveRegime(s.active_regime);
     } catch {
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { LineChart, Line, XAxis, YAxis, Tooltip, ResponsiveContainer, CartesianGrid } from "recharts";
-import { fetchMetrics } from "../lib/api";
+import { fetchDashboard } from "../lib/api";
 
 interface Point {
   date: string;
@@ -12,8 +12,8 @@ export default function EquityChart() {
 
   useEffect(() => {
     const load = () => {
-      fetchMetrics()
-        .then((m) => setData(m.history ?? []))
+      fetchDashboard()
+        .then((d) => setData(d.metrics?.history ?? []))
         .catch(() => {});
     };
     load();
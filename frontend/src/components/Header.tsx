@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { Activity, DollarSign, TrendingDown } from "lucide-react";
-import { fetchAccount, fetchMetrics, type AccountInfo, type Metrics } from "../lib/api";
+import { fetchDashboard, type AccountInfo, type Metrics } from "../lib/api";
 
 function StatCard({ icon, label, value, color }: { icon: React.ReactNode; label: string; value: string; color: string }) {
   return (
@@ -20,8 +20,12 @@ export default function Header() {
 
   useEffect(() => {
     const load = () => {
-      fetchAccount().then(setAccount).catch(() => {});
-      fetchMetrics().then(setMetrics).catch(() => {});
+      fetchDashboard()
+        .then((d) => {
+          if (d.account) setAccount(d.account);
+          if (d.metrics) setMetrics(d.metrics);
+        })
+        .catch(() => {});
     };
     load();
     const id = setInterval(load, 15000);
@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from "react";
-import { fetchTradeHistory, type TradeHistoryItem } from "../lib/api";
+import { fetchDashboard, fetchTradeHistory, type TradeHistoryItem } from "../lib/api";
 
 function formatTimestamp(ts: string | null): string {
   if (!ts) return "-";
@@ -20,8 +20,14 @@ function formatReward(reward: number | null): string {
   return `${sign}${pct.toFixed(2)}%`;
 }
 
+const PAGE_SIZE = 50;
+
 export default function TradeHistory() {
-  const [trades, setTrades] = useState<TradeHistoryItem[]>([]);
+  const [latest, setLatest] = useState<TradeHistoryItem[]>([]);
+  // Pages fetched with "Load older"; the live head keeps refreshing above them.
+  const [older, setOlder] = useState<TradeHistoryItem[]>([]);
+  const [exhausted, setExhausted] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [loading, setLoading] = useState(true);
   const [stale, setStale] = useState(false);
 
@@ -30,10 +36,10 @@ export default function TradeHistory() {
 
     const load = async () => {
       try {
-        const rows = await fetchTradeHistory(50);
+        const d = await fetchDashboard();
         if (!mounted) return;
-        setTrades(rows);
-        setStale(false);
+        if (d.trade_history) setLatest(d.trade_history);
+        setStale("trade_history" in d.errors);
       } catch {
         if (!mounted) return;
         // Keep last successful data visible and just flag stale state.
@@ -51,6 +57,26 @@ export default function TradeHistory() {
     };
   }, []);
 
+  const trades = useMemo(() => {
+    const seen = new Set(latest.map((t) => t.id));
+    return [...latest, ...older.filter((t) => !seen.has(t.id))];
+  }, [latest, older]);
+
+  const loadOlder = async () => {
+    const cursor = trades[trades.length - 1]?.cursor;
+    if (!cursor) return;
+    setLoadingOlder(true);
+    try {
+      const page = await fetchTradeHistory(PAGE_SIZE, cursor);
+      setOlder((prev) => [...prev, ...page]);
+      if (page.length < PAGE_SIZE) setExhausted(true);
+    } catch {
+      setStale(true);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const hasTrades = trades.length > 0;
 
   const newestRunId = useMemo(() => (hasTrades ? trades[0].run_id : null), [hasTrades, trades]);
@@ -106,11 +132,11 @@ export default function TradeHistory() {
               </tr>
             </thead>
             <tbody>
-              {trades.map((trade, idx) => {
+              {trades.map((trade) => {
                 const liquidationLike = trade.side.toLowerCase() === "sell";
                 return (
                   <tr
-                    key={`${trade.run_id}-${trade.symbol}-${trade.timestamp ?? idx}`}
+                    key={trade.id}
                     className="border-b border-[var(--color-border)]/50 hover:bg-white/5"
                     title={`Run: ${trade.run_id}`}
                   >
@@ -146,6 +172,16 @@ export default function TradeHistory() {
               })}
             </tbody>
           </table>
+          {!exhausted && (
+            <button
+              type="button"
+              onClick={loadOlder}
+              disabled={loadingOlder}
+              className="mt-3 w-full rounded-md border border-[var(--color-border)] px-3 py-1.5 text-xs text-[var(--color-text-muted)] hover:bg-white/5 disabled:opacity-50"
+            >
+              {loadingOlder ? "Loading..." : "Load older"}
+            </button>
+          )}
           {newestRunId && (
             <p className="mt-3 text-xs text-[var(--color-text-muted)]">
               Most recent run: <span className="font-mono">{newestRunId}</span>
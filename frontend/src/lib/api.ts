@@ -9,7 +9,9 @@ export interface Metrics {
   total_runs: number;
   current_equity: number;
   max_drawdown_pct: number;
+  // Downsampled (LTTB) to the server's point budget; history_points is the full row count.
   history: { date: string; equity: number }[];
+  history_points?: number;
 }
 
 export interface BanditArm {
@@ -20,6 +22,7 @@ export interface BanditArm {
 }
 
 export interface TradeHistoryItem {
+  id: number;
   symbol: string;
   side: string;
   qty: number;
@@ -29,6 +32,8 @@ export interface TradeHistoryItem {
   run_id: string;
   params_used: Record<string, number> | null;
   reward: number | null;
+  // Opaque keyset cursor: pass as `before` to fetch the trades older than this one.
+  cursor: string | null;
 }
 
 export interface BotRunResult {
@@ -39,6 +44,36 @@ export interface BotRunResult {
   orders_count?: number;
 }
 
+export interface Dashboard {
+  account: AccountInfo | null;
+  metrics: Metrics | null;
+  bandit_stats: BanditArm[] | null;
+  risk_status: RiskStatus | null;
+  trade_history: TradeHistoryItem[] | null;
+  errors: Record<string, string>;
+  generated_at: number;
+  refresh_sec: number;
+}
+
+// The backend rebuilds /bot/dashboard on its own cadence and tags it with an
+// ETag; cache: "no-cache" lets the browser revalidate (304) instead of
+// re-downloading. Components polling at the same moment share one request.
+let dashboardRequest: Promise<Dashboard> | null = null;
+
+export function fetchDashboard(): Promise<Dashboard> {
+  if (!dashboardRequest) {
+    dashboardRequest = fetch(`${BASE}/bot/dashboard`, { cache: "no-cache" })
+      .then((res) => {
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        return res.json() as Promise<Dashboard>;
+      })
+      .finally(() => {
+        dashboardRequest = null;
+      });
+  }
+  return dashboardRequest;
+}
+
 export async function fetchAccount(): Promise<AccountInfo> {
   const res = await fetch(`${BASE}/account`);
   return res.json();
@@ -54,8 +89,11 @@ export async function fetchBanditStats(): Promise<BanditArm[]> {
   return res.json();
 }
 
-export async function fetchTradeHistory(limit = 50): Promise<TradeHistoryItem[]> {
-  const res = await fetch(`${BASE}/bot/trade_history?limit=${limit}`);
+export async function fetchTradeHistory(limit = 50, before?: string): Promise<TradeHistoryItem[]> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (before) params.set("before", before);
+  const res = await fetch(`${BASE}/bot/trade_history?${params}`);
+  if (!res.ok) throw new Error(`trade_history ${res.status}`);
   return res.json();
 }
 
@@ -1,28 +1,71 @@
 from fastmcp import FastMCP
 import httpx
+import asyncio
+import importlib.util
 import json
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 API_URL = os.getenv("BOT_API_URL", "http://localhost:8000")
+# Read-only responses are reused for this long (seconds); 0 disables the cache.
+CACHE_TTL = float(os.getenv("BRAIN_CACHE_TTL_SEC", "2"))
+# HTTP/2 needs the optional `h2` package (httpx[http2]) and is only negotiated over https.
+HTTP2 = importlib.util.find_spec("h2") is not None
 
 mcp = FastMCP("PaperPilot Brain")
 
+# One keep-alive connection pool for every tool call, created on first use.
+_client: httpx.AsyncClient | None = None
+# (path, params) -> (expires_at, task); concurrent identical GETs share one task.
+_cache: dict[tuple, tuple[float, asyncio.Task]] = {}
+
+
+def _http() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=API_URL,
+            http2=HTTP2,
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+        )
+    return _client
+
+
+async def _fetch(path: str, params: dict | None) -> dict:
+    resp = await _http().get(path, params=params)
+    resp.raise_for_status()
+    return resp.json()
+
 
 async def _get(path: str, params: dict | None = None) -> dict:
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(f"{API_URL}{path}", params=params, timeout=15.0)
-        resp.raise_for_status()
-        return resp.json()
+    key = (path, tuple(sorted((params or {}).items())))
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit is not None and (not hit[1].done() or hit[0] > now):
+        task = hit[1]
+    else:
+        for stale in [k for k, (expires, t) in _cache.items() if t.done() and expires <= now]:
+            del _cache[stale]
+        task = asyncio.ensure_future(_fetch(path, params))
+        _cache[key] = (now + CACHE_TTL, task)
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if _cache.get(key, (None, None))[1] is task:
+            del _cache[key]
+        raise
 
 
 async def _post(path: str, body: dict | None = None) -> dict:
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{API_URL}{path}", json=body, timeout=30.0)
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _http().post(path, json=body, timeout=30.0)
+    # Actions change bot state; don't serve reads from before them.
+    _cache.clear()
+    resp.raise_for_status()
+    return resp.json()
 
 
 # ──────────────────────────────────────────────
@@ -38,13 +81,12 @@ async def get_portfolio_snapshot() -> str:
     Use this as the first tool call to understand the full picture.
     """
     try:
-        account = await _get("/account")
-        risk = await _get("/bot/risk_status")
-        metrics = await _get("/bot/metrics")
+        dash = await _get("/bot/dashboard")
+        metrics = dash.get("metrics") or {}
 
         snapshot = {
-            "account": account,
-            "risk": risk,
+            "account": dash.get("account"),
+            "risk": dash.get("risk_status"),
             "performance": {
                 "total_runs": metrics.get("total_runs", 0),
                 "current_equity": metrics.get("current_equity", 0),
@@ -65,7 +107,7 @@ async def get_bandit_analysis() -> str:
     fast/slow MA periods and vol targets are working.
     """
     try:
-        stats = await _get("/bot/bandit_stats")
+        stats = (await _get("/bot/dashboard")).get("bandit_stats")
         if not stats:
             return "No bandit data available. Run a backtest or live cycle first."
 
@@ -92,21 +134,31 @@ async def get_risk_status() -> str:
     whether a manual override is active, and if trading is blocked (and why).
     """
     try:
-        data = await _get("/bot/risk_status")
+        data = (await _get("/bot/dashboard")).get("risk_status")
         return json.dumps(data, indent=2)
     except Exception as e:
         return f"Error fetching risk status: {e}"
 
 
 @mcp.tool()
-async def get_trade_history(limit: int = 15) -> str:
+async def get_trade_history(limit: int = 15, before: str | None = None) -> str:
     """
     Returns the most recent filled trades with entry price, PnL reward,
     which bandit parameters were used, and timestamps. Use this to
     evaluate recent bot performance and understand what trades were made.
+    To page further back, pass the `cursor` of the oldest trade returned
+    as `before`.
     """
     try:
-        data = await _get("/bot/trade_history", params={"limit": limit})
+        if before:
+            data = await _get("/bot/trade_history", params={"limit": limit, "before": before})
+        else:
+            # The dashboard carries the latest trades; only deeper history needs its own request.
+            data = (await _get("/bot/dashboard")).get("trade_history") or []
+            if len(data) >= limit:
+                data = data[:limit]
+            else:
+                data = await _get("/bot/trade_history", params={"limit": limit})
         if not data:
             return "No filled trades found yet."
         return json.dumps(data, indent=2)
@@ -5,7 +5,7 @@ import logging
 from datetime import datetime, timedelta
 from backend.backtest import run_backtest
 from backend.db import SessionLocal
-from backend.models import DailyEquity, Decision
+from backend.models import DailyEquity, Decision, EquityStats
 from backend.learning import EpsilonGreedyBandit
 
 def run_blind_test():
@@ -19,6 +19,7 @@ def run_blind_test():
     db = SessionLocal()
     logger.info("Cleaning up old simulation data...")
     db.query(DailyEquity).delete()
+    db.query(EquityStats).delete()
     db.query(Decision).delete()
     db.commit()
 
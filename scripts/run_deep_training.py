@@ -4,7 +4,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import logging
 import time
 from datetime import datetime, timedelta
-from backend.backtest import run_backtest
+from backend.backtest import run_backtest, run_batched_backtest
 from backend.services.optimizer import generate_parameter_grid, mutate_parameters
 from backend.db import SessionLocal
 from backend.learning import EpsilonGreedyBandit
@@ -22,13 +22,10 @@ def run_deep_training_session():
     grid = generate_parameter_grid()
     logger.info(f"Injecting {len(grid)} parameter sets into the Bandit...")
     
-    db = SessionLocal()
-    bandit = EpsilonGreedyBandit(db, epsilon=0.5) # High exploration
-    bandit.set_arms(grid)
-    db.close()
-    
-    # Run 5-year backtest (Train on wide grid)
-    run_backtest(days_to_sim=1260, reset_bandit=True, is_training=True, inject_arms=grid)
+    # Score the whole grid over 5 years in one batched pass and seed the
+    # Bandit with every arm's record (instead of one arm per simulated bar).
+    # One summary Decision per arm gives the Advisor something to analyze.
+    run_batched_backtest(grid, days_to_sim=1260, reset_bandit=True, record_decisions=True)
     
     logger.info("Waiting for AI Advisor to analyze Epoch 1...")
     subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), "run_advisor.py")])
@@ -5,4 +5,18 @@ from backend.services.monte_carlo import run_monte_carlo
 
 if __name__ == "__main__":
     print(" Starting Monte Carlo Robustness Verification...")
-    run_monte_carlo(iterations=1000)
+    report = run_monte_carlo(iterations=1000)
+    if report is None:
+        print("No trade history found. Run a backtest first.")
+        sys.exit(1)
+
+    print("\n--- MONTE CARLO SURVIVABILITY REPORT ---")
+    print(f"Universe Iterations: {report['iterations']}")
+    print(f"Average Final Equity: ${report['avg_final_equity']:,.2f}")
+    print(f"Median Final Equity: ${report['median_final_equity']:,.2f}")
+    for p, value in report["final_equity_percentiles"].items():
+        print(f"  P{p}: ${value:,.2f}")
+    print(f"Probability of Profit: {report['probability_of_profit_pct']:.1f}%")
+    print(f"Risk of Ruin (0$): {report['risk_of_ruin_pct']:.1f}%")
+    print(f"Verdict: {report['verdict']}")
+    print("----------------------------------------\n")
@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.agency import graph
+from backend.agency.executor import AgenticExecutor
+from backend.db import Base
+from backend.learning import EpsilonGreedyBandit
+from backend.models import BanditState
+
+
+class _FakeSentinel:
+    provider = None
+
+    def __init__(self):
+        self.calls = 0
+
+    @staticmethod
+    def analyze_vix_regime(vix):
+        return "SAFE"
+
+    async def analyze_sentiment(self, symbols, vix=None):
+        self.calls += 1
+        return 0.0
+
+
+@pytest.fixture
+def warm_graph(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'agent.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    loads = []
+
+    class _CountingBandit(EpsilonGreedyBandit):
+        def __init__(self, *args, **kwargs):
+            loads.append(1)
+            super().__init__(*args, **kwargs)
+
+    sentinel = _FakeSentinel()
+    monkeypatch.setattr(graph, "SessionLocal", Session)
+    monkeypatch.setattr(graph, "EpsilonGreedyBandit", _CountingBandit)
+    monkeypatch.setattr(graph, "_sentinel", sentinel)
+    monkeypatch.setattr(graph, "_bandit", None)
+    monkeypatch.setattr(graph, "_bandit_loaded_at", None)
+    return Session, sentinel, loads
+
+
+def _context(epsilon=0.0):
+    return {"vix_close": 15.0, "dry_run": False, "epsilon": epsilon, "risk_override": None}
+
+
+@pytest.mark.asyncio
+async def test_cycles_reuse_warm_bandit_and_sentinel(warm_graph):
+    _, sentinel, loads = warm_graph
+    agent = AgenticExecutor()
+    before = {name: h.count for name, h in graph.node_timings.items()}
+
+    await agent.warm()
+    for _ in range(3):
+        state = await agent.run(_context())
+        assert state["trade_proposal"]["action"] == "TRADE"
+
+    assert len(loads) == 1
+    assert sentinel.calls == 3
+    stats = agent.stats()
+    assert stats["runs"] == 3
+    assert stats["run_duration_sec"]["count"] == 3
+    assert stats["bandit"]["loaded"] is True
+    for name in ("sentinel", "strategy", "executor"):
+        assert stats["nodes"][name]["count"] - before[name] == 3
+
+
+@pytest.mark.asyncio
+async def test_recorded_rewards_steer_warm_bandit_without_writes(warm_graph):
+    Session, _, loads = warm_graph
+    agent = AgenticExecutor()
+    await agent.warm()
+    slow = {"fast": 100, "slow": 300, "vol_target": 0.15}
+
+    agent.record_reward(slow, 1.0)
+    state = await agent.run(_context(epsilon=0.0))
+
+    assert state["trade_proposal"]["params"] == slow
+    assert len(loads) == 1
+    db = Session()
+    try:
+        assert db.query(BanditState).count() == 0
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_bandit_is_reloaded(warm_graph, monkeypatch):
+    Session, _, loads = warm_graph
+    agent = AgenticExecutor()
+    await agent.warm()
+
+    # Another writer (e.g. a backtest) persists rewards the replica never saw.
+    db = Session()
+    try:
+        EpsilonGreedyBandit(db).update_arm({"fast": 50, "slow": 150, "vol_target": 0.3}, 2.0)
+    finally:
+        db.close()
+    monkeypatch.setattr(graph, "BANDIT_REFRESH_SEC", 0.0)
+    state = await agent.run(_context(epsilon=0.0))
+
+    assert len(loads) == 2
+    assert state["trade_proposal"]["params"] == {"fast": 50, "slow": 150, "vol_target": 0.3}
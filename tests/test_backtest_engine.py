@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import backend.backtest as backtest_module
+from backend.backtest_engine import VectorizedBacktest
+from backend.db import Base
+from backend.learning import EpsilonGreedyBandit
+from backend.models import BanditState, DailyEquity, Decision
+from backend.strategy.ts_mom import compute_signal
+from backend.strategy.risk import compute_volatility, size_position
+
+ARM = {"fast": 5, "slow": 20, "vol_target": 0.3, "sl_pct": 0.015, "tp_pct": 0.02, "threshold": 0.0005}
+
+
+def _make_history(n_days=160, symbols=("AAA", "BBB", "CCC"), seed=7):
+    """Random-walk daily OHLC bars plus a VIX series that crosses both regimes."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_days)
+    rows = []
+    for k, symbol in enumerate(symbols):
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.001 * (k - 1), 0.015, n_days)))
+        for j, ts in enumerate(dates):
+            c = closes[j]
+            rows.append({
+                "symbol": symbol, "timestamp": ts,
+                "open": c, "high": c * (1 + abs(rng.normal(0, 0.012))),
+                "low": c * (1 - abs(rng.normal(0, 0.012))), "close": c, "volume": 1000,
+            })
+    bars = pd.DataFrame(rows).set_index(["symbol", "timestamp"]).sort_index()
+    vix = pd.DataFrame({"close": np.linspace(15, 40, n_days)}, index=dates)
+    return bars, vix
+
+
+def _reference_curve(bars, vix_bars, params, sim_start, crash_every=None):
+    """The original per-bar prefix loop from run_backtest, kept as the parity oracle."""
+    equity = 100000.0
+    dates = bars.index.get_level_values("timestamp").unique().sort_values()
+    curve = []
+    for i in range(sim_start, len(dates) - 1):
+        current_date, next_date = dates[i], dates[i + 1]
+        current_data = bars.loc[bars.index.get_level_values("timestamp") <= current_date]
+        is_crash = crash_every is not None and (i - sim_start) > 10 and i % crash_every == 0
+
+        signals = compute_signal(current_data, fast_window=params["fast"], slow_window=params["slow"],
+                                 threshold=params.get("threshold", 0.0005))
+        current_vol = compute_volatility(current_data, timeframe="1d")
+        vix_today = 20.0
+        if current_date.normalize() in vix_bars.index:
+            vix_today = vix_bars.loc[current_date.normalize()]["close"]
+        targets = size_position(signals, current_vol, account_value=equity,
+                                vol_target=params["vol_target"], vix_value=vix_today)
+
+        daily_pnl = 0.0
+        sl_pct, tp_pct = params["sl_pct"], params["tp_pct"]
+        prices_t = bars.xs(current_date, level="timestamp")
+        prices_t1 = bars.xs(next_date, level="timestamp")
+        for symbol, target_usd in targets.items():
+            p0 = prices_t.loc[symbol]["close"]
+            final, high, low = prices_t1.loc[symbol]["close"], prices_t1.loc[symbol]["high"], prices_t1.loc[symbol]["low"]
+            if is_crash:
+                low, final = p0 * 0.97, p0 * 0.975
+            if (low - p0) / p0 < -sl_pct:
+                daily_pnl += (target_usd / p0) * (p0 * (1 - sl_pct) - p0)
+            elif (high - p0) / p0 > tp_pct:
+                daily_pnl += (target_usd / p0) * (p0 * (1 + tp_pct) - p0)
+            else:
+                daily_pnl += (target_usd / p0) * (final - p0)
+        equity += daily_pnl
+        curve.append(equity)
+    return np.array(curve)
+
+
+def test_engine_matches_per_bar_loop():
+    bars, vix = _make_history()
+    sim_start = 40
+    engine = VectorizedBacktest(bars, vix, timeframe="1d")
+    expected = _reference_curve(bars, vix, ARM, sim_start)
+    actual = engine.equity_curve(ARM, start_index=sim_start).to_numpy()
+    assert len(actual) == len(expected)
+    np.testing.assert_allclose(actual, expected, rtol=1e-9)
+
+
+def test_engine_matches_per_bar_loop_with_flash_crash():
+    bars, vix = _make_history()
+    sim_start = 40
+    n = len(vix)
+    idx = np.arange(n)
+    crash_mask = ((idx - sim_start) > 10) & (idx % 50 == 0)
+    engine = VectorizedBacktest(bars, vix, timeframe="1d", crash_mask=crash_mask)
+    expected = _reference_curve(bars, vix, ARM, sim_start, crash_every=50)
+    actual = engine.equity_curve(ARM, start_index=sim_start).to_numpy()
+    np.testing.assert_allclose(actual, expected, rtol=1e-9)
+    assert engine.arm_path(ARM).stop_hit[crash_mask[:-1]].all()
+
+
+def test_weights_match_size_position_across_a_missing_bar():
+    bars, vix = _make_history()
+    dates = bars.index.get_level_values("timestamp").unique()
+    # CCC skips bar 45, so its vol is NaN for the next vol window while its
+    # signal stays defined: sizing must pair the current signal with the
+    # last valid vol, as size_position's groupby().last() does.
+    bars = bars.drop(("CCC", dates[45]))
+    engine = VectorizedBacktest(bars, vix, timeframe="1d")
+    batched = engine.evaluate_arms([ARM], start_index=0)
+
+    assert np.isfinite(engine.vol[50, engine.symbols.index("CCC")])
+    for i in range(30, 100):
+        current_data = bars.loc[bars.index.get_level_values("timestamp") <= dates[i]]
+        signals = compute_signal(current_data, fast_window=ARM["fast"], slow_window=ARM["slow"], threshold=ARM["threshold"])
+        expected = size_position(signals, compute_volatility(current_data, timeframe="1d"), account_value=1.0,
+                                 vol_target=ARM["vol_target"], vix_value=vix["close"].iloc[i])
+        _, weights = engine.row(i, ARM)
+        assert weights == pytest.approx({s: expected.get(s, 0.0) for s in weights}, abs=1e-12), i
+        np.testing.assert_allclose(engine.weights(ARM)[i], [weights[s] for s in engine.symbols], atol=1e-12)
+
+    # The batched path uses the same alignment as the per-arm path.
+    np.testing.assert_allclose(batched[0], 100000.0 * np.diff(np.concatenate([[1.0], np.cumprod(1 + engine.arm_path(ARM).returns)])),
+                               rtol=1e-9)
+
+
+def test_moving_averages_shared_across_arms():
+    bars, vix = _make_history()
+    engine = VectorizedBacktest(bars, vix)
+    engine.arm_path(ARM)
+    engine.arm_path({**ARM, "vol_target": 0.1, "sl_pct": 0.01})
+    assert sorted(engine._ma_cache) == [5, 20]
+
+
+@pytest.fixture
+def backtest_db(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(backtest_module, "SessionLocal", Session)
+    monkeypatch.setattr(backtest_module, "MarketDataProvider", lambda: None)
+    return Session
+
+
+def test_run_backtest_equity_curve_parity(monkeypatch, backtest_db):
+    bars, vix = _make_history()
+    days_to_sim = 100
+    monkeypatch.setattr(
+        backtest_module, "_load_history",
+        lambda provider, symbols, days, start, end, timeframe: (bars, vix, days),
+    )
+    # Two untried arms: validation mode always exploits the first one.
+    result = backtest_module.run_backtest(
+        days_to_sim=days_to_sim, is_training=False, inject_arms=[ARM, {**ARM, "fast": 8}],
+    )
+
+    expected = _reference_curve(bars, vix, ARM, len(vix) - days_to_sim)
+    np.testing.assert_allclose(result["equity_curve"].to_numpy(), expected, rtol=1e-9)
+
+    db = backtest_db()
+    rows = db.query(DailyEquity).order_by(DailyEquity.date).all()
+    assert len(rows) == days_to_sim - 1
+    assert rows[-1].equity == pytest.approx(expected[-1])
+    db.close()
+
+
+def test_evaluate_arms_matches_single_arm_paths():
+    bars, vix = _make_history()
+    engine = VectorizedBacktest(bars, vix)
+    arms = [ARM, {**ARM, "fast": 8, "slow": 30}, {**ARM, "vol_target": 0.1, "sl_pct": 0.01, "threshold": 0.001}]
+    start = 40
+
+    rewards = VectorizedBacktest(bars, vix).evaluate_arms(arms, start_index=start, chunk_size=2)
+
+    assert rewards.shape == (3, len(vix) - 1 - start)
+    for k, arm in enumerate(arms):
+        curve = engine.equity_curve(arm, start_index=start).to_numpy()
+        np.testing.assert_allclose(100000.0 + np.cumsum(rewards[k]), curve, rtol=1e-9)
+
+
+def test_run_batched_backtest_seeds_bandit(monkeypatch, backtest_db):
+    bars, vix = _make_history()
+    monkeypatch.setattr(
+        backtest_module, "_load_history",
+        lambda provider, symbols, days, start, end, timeframe: (bars, vix, days),
+    )
+    arms = [ARM, {**ARM, "fast": 8, "slow": 30}]
+    result = backtest_module.run_batched_backtest(arms, days_to_sim=100)
+
+    db = backtest_db()
+    try:
+        bandit = EpsilonGreedyBandit(db)
+        states = {s.param_key: s for s in db.query(BanditState).all()}
+        for arm, arm_rewards in zip(arms, result["rewards"]):
+            state = states[bandit._get_arm_key(arm)]
+            assert state.trials == 99
+            assert state.total_reward == pytest.approx(arm_rewards.sum())
+        assert db.query(Decision).count() == 0
+    finally:
+        db.close()
+
+
+def test_run_batched_backtest_records_one_decision_per_arm(monkeypatch, backtest_db):
+    bars, vix = _make_history()
+    monkeypatch.setattr(
+        backtest_module, "_load_history",
+        lambda provider, symbols, days, start, end, timeframe: (bars, vix, days),
+    )
+    arms = [ARM, {**ARM, "fast": 8, "slow": 30}]
+    result = backtest_module.run_batched_backtest(arms, days_to_sim=100, record_decisions=True)
+
+    db = backtest_db()
+    try:
+        decisions = db.query(Decision).order_by(Decision.id).all()
+        assert [d.params_used for d in decisions] == arms
+        totals = [d.signals["total_pnl"] for d in decisions]
+        assert totals == pytest.approx(result["rewards"].sum(axis=1).tolist())
+        assert all(d.reward is None for d in decisions)
+        assert {d.run_id[:len(backtest_module.BATCH_RUN_PREFIX)] for d in decisions} == {backtest_module.BATCH_RUN_PREFIX}
+        assert len({d.run_id for d in decisions}) == 1
+        assert all("Win rate" in d.reasoning for d in decisions)
+    finally:
+        db.close()
+
+
+def test_monte_carlo_ignores_batched_summaries(monkeypatch, backtest_db):
+    import backend.services.monte_carlo as mc_module
+
+    bars, vix = _make_history()
+    monkeypatch.setattr(
+        backtest_module, "_load_history",
+        lambda provider, symbols, days, start, end, timeframe: (bars, vix, days),
+    )
+    monkeypatch.setattr(mc_module, "SessionLocal", backtest_db)
+    backtest_module.run_batched_backtest([ARM, {**ARM, "fast": 8}], days_to_sim=100, record_decisions=True)
+
+    # Summary rows alone are not a return stream.
+    assert mc_module.run_monte_carlo(iterations=10) is None
+
+    result = backtest_module.run_backtest(days_to_sim=60, is_training=True, inject_arms=[ARM], reset_bandit=False)
+    assert result is not None
+    report = mc_module.run_monte_carlo(iterations=200, seed=1)
+    assert report["n_returns"] == 59
+
+
+def test_run_backtest_buffered_writes(monkeypatch, backtest_db):
+    bars, vix = _make_history()
+    monkeypatch.setattr(
+        backtest_module, "_load_history",
+        lambda provider, symbols, days, start, end, timeframe: (bars, vix, days),
+    )
+    arms = [ARM, {**ARM, "fast": 8}]
+    result = backtest_module.run_backtest(days_to_sim=60, is_training=True, inject_arms=arms, flush_every=7)
+
+    db = backtest_db()
+    decisions = db.query(Decision).order_by(Decision.timestamp).all()
+    assert len(decisions) == 59
+    assert all(d.params_used in arms for d in decisions)
+    assert db.query(DailyEquity).count() == 59
+    states = db.query(BanditState).all()
+    assert sum(s.trials for s in states) == 59
+    assert sum(s.total_reward for s in states) == pytest.approx(result["final_equity"] - 100000.0)
+    db.close()
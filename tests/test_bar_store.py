@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from alpaca.data.timeframe import TimeFrame
+
+from backend.bar_store import BarStore
+from backend.market_data import MarketDataProvider
+
+
+def _minute_bars(symbols, start, end):
+    index = pd.date_range(pd.Timestamp(start).ceil("min"), end, freq="min")
+    frames = {}
+    for k, symbol in enumerate(symbols):
+        close = 100.0 + k + np.arange(len(index)) * 0.01
+        frames[symbol] = pd.DataFrame({
+            "open": close, "high": close + 0.05, "low": close - 0.05, "close": close,
+            "volume": 100.0, "trade_count": 10.0, "vwap": close,
+        }, index=index.rename("timestamp"))
+    return pd.concat(frames, names=["symbol"])
+
+
+class _FakeBarSet:
+    def __init__(self, df):
+        self.df = df
+
+
+class _FakeClient:
+    """Stands in for StockHistoricalDataClient and records every request."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_stock_bars(self, req):
+        symbols = req.symbol_or_symbols
+        self.requests.append((list(symbols), req.start, req.end))
+        return _FakeBarSet(_minute_bars(symbols, req.start, req.end))
+
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    monkeypatch.setenv("ALPACA_API_KEY", "test")
+    monkeypatch.setenv("ALPACA_API_SECRET", "test")
+    monkeypatch.delenv("BAR_CACHE_OFFLINE", raising=False)
+    p = MarketDataProvider(bar_store=BarStore(str(tmp_path)))
+    p.client = _FakeClient()
+    return p
+
+
+def _utc(dt):
+    return pd.Timestamp(dt).tz_localize("UTC")
+
+
+def test_store_round_trip_and_merge(tmp_path):
+    store = BarStore(str(tmp_path))
+    start = datetime(2024, 3, 4, 23, 0, tzinfo=timezone.utc)
+    end = start + timedelta(hours=2)
+    bars = _minute_bars(["AAA", "BBB"], start, end)
+
+    store.write(bars.iloc[:60], "1Min", ["AAA", "BBB"], start, end)
+    store.write(bars, "1Min", ["AAA", "BBB"], start, end)
+
+    # Spans two UTC day partitions.
+    assert len(list((tmp_path / "1Min" / "AAA").glob("*.parquet"))) == 2
+    out = store.read(["AAA", "BBB"], "1Min", start, end)
+    pd.testing.assert_frame_equal(out, bars, check_freq=False)
+
+
+def test_missing_ranges_head_and_tail(tmp_path):
+    store = BarStore(str(tmp_path))
+    start = datetime(2024, 3, 4)
+    store.write(None, "1Day", ["AAA", "BBB"], start, start + timedelta(days=10))
+
+    gaps = store.missing_ranges(["AAA", "BBB", "CCC"], "1Day", start - timedelta(days=5), start + timedelta(days=12))
+    assert gaps == {
+        (_utc(start - timedelta(days=5)), _utc(start)): ["AAA", "BBB"],
+        (_utc(start + timedelta(days=10)), _utc(start + timedelta(days=12))): ["AAA", "BBB"],
+        (_utc(start - timedelta(days=5)), _utc(start + timedelta(days=12))): ["CCC"],
+    }
+
+
+def test_partial_last_bar_is_refetched_and_overwritten(tmp_path):
+    store = BarStore(str(tmp_path))
+    start = datetime(2024, 3, 4, tzinfo=timezone.utc)
+    index = pd.bdate_range("2024-03-04", "2024-03-06", tz="UTC", name="timestamp") + pd.Timedelta(hours=5)
+    partial = pd.concat({"AAA": pd.DataFrame({"close": [1.0, 2.0, 3.0]}, index=index)}, names=["symbol"])
+    # Cached mid-session on the 6th: that day's bar (05:00) was still forming.
+    cached_at = datetime(2024, 3, 6, 18, 0, tzinfo=timezone.utc)
+    store.write(partial, "1Day", ["AAA"], start, cached_at)
+
+    later = datetime(2024, 3, 7, 18, 0, tzinfo=timezone.utc)
+    gaps = store.missing_ranges(["AAA"], "1Day", start, later)
+    assert gaps == {(index[-1], _utc(later.replace(tzinfo=None))): ["AAA"]}
+
+    final = pd.concat({"AAA": pd.DataFrame({"close": [3.5, 4.0]}, index=index[-1:].append(index[-1:] + pd.Timedelta(days=1)))},
+                      names=["symbol"])
+    store.write(final, "1Day", ["AAA"], index[-1], later)
+    assert store.read(["AAA"], "1Day", start, later)["close"].tolist() == [1.0, 2.0, 3.5, 4.0]
+
+
+def test_unreadable_files_are_a_cache_miss(tmp_path):
+    store = BarStore(str(tmp_path))
+    start = datetime(2024, 3, 4, 23, 0, tzinfo=timezone.utc)
+    end = start + timedelta(hours=2)
+    store.write(_minute_bars(["AAA"], start, end), "1Min", ["AAA"], start, end)
+    symbol_dir = tmp_path / "1Min" / "AAA"
+    newest = sorted(symbol_dir.glob("*.parquet"))[-1]
+    # A torn write: the newest partition is truncated.
+    newest.write_bytes(newest.read_bytes()[:100])
+
+    later = end + timedelta(hours=1)
+    assert store.missing_ranges(["AAA"], "1Min", start, later) == {(_utc(start.replace(tzinfo=None)), _utc(later.replace(tzinfo=None))): ["AAA"]}
+    assert len(store.read(["AAA"], "1Min", start, end)) == 60
+    assert store.coverage("AAA", "1Min") is None
+
+    store.write(_minute_bars(["AAA"], start, later), "1Min", ["AAA"], start, later)
+    assert len(store.read(["AAA"], "1Min", start, later)) == 181
+    assert store.coverage("AAA", "1Min") == (_utc(start.replace(tzinfo=None)), _utc(later.replace(tzinfo=None)))
+    assert not list(symbol_dir.glob("*.tmp"))
+
+    (symbol_dir / "_coverage.json").write_text('{"start": ')
+    assert store.coverage("AAA", "1Min") is None
+
+
+def test_get_bars_only_fetches_missing_tail(provider):
+    first = provider.get_bars(["AAA", "BBB"], lookback_days=2, timeframe=TimeFrame.Minute)
+    assert len(provider.client.requests) == 1
+
+    second = provider.get_bars(["AAA", "BBB"], lookback_days=2, timeframe=TimeFrame.Minute)
+    assert len(provider.client.requests) == 2
+    _, tail_start, tail_end = provider.client.requests[-1]
+    # Only the newest (possibly partial) bar onward, not another two days.
+    assert tail_end - tail_start < timedelta(minutes=2)
+
+    assert list(second.index.names) == ["symbol", "timestamp"]
+    assert set(second.index.get_level_values(0)) == {"AAA", "BBB"}
+    assert len(second) >= len(first) - 2
+
+
+def test_get_bars_offline_serves_from_disk(provider, monkeypatch):
+    provider.get_bars(["AAA"], lookback_days=1, timeframe=TimeFrame.Minute)
+    provider.client = None
+    provider.offline = True
+    bars = provider.get_bars(["AAA", "ZZZ"], lookback_days=1, timeframe=TimeFrame.Minute)
+    assert not bars.empty
+    assert set(bars.index.get_level_values(0)) == {"AAA"}
+
+
+def test_daily_bars_partitioned_by_year(tmp_path):
+    store = BarStore(str(tmp_path))
+    index = pd.bdate_range("2023-12-01", "2024-02-01", tz="UTC", name="timestamp")
+    bars = pd.concat({"AAA": pd.DataFrame({"close": np.arange(len(index), dtype=float)}, index=index)}, names=["symbol"])
+    store.write(bars, "1Day", ["AAA"], index[0], index[-1])
+
+    assert sorted(p.name for p in (tmp_path / "1Day" / "AAA").glob("*.parquet")) == ["2023.parquet", "2024.parquet"]
+    out = store.read(["AAA"], "1Day", index[5], index[-1])
+    assert out["close"].tolist() == list(range(5, len(index)))
@@ -1,3 +1,4 @@
+from dataclasses import FrozenInstanceError
 from types import SimpleNamespace
 
 import pandas as pd
@@ -85,6 +86,30 @@ class _FakeMarketProvider:
         return 17.0
 
 
+class _FakeSignalEngine:
+    def missing(self, symbols, windows=()):
+        _ = windows
+        return []
+
+    def update(self, bars, windows=()):
+        _ = (bars, windows)
+        return 0
+
+    def signals(self, fast_window, slow_window, threshold=0.0005, live_prices=None, now=None):
+        _ = (fast_window, slow_window, threshold, live_prices, now)
+        return pd.DataFrame(
+            {"signal": [0.0]},
+            index=pd.MultiIndex.from_tuples([("NVDA", pd.Timestamp("2026-01-01"))], names=["symbol", "timestamp"]),
+        )
+
+    def volatility(self, live_prices=None, now=None):
+        _ = (live_prices, now)
+        return pd.DataFrame(
+            {"volatility": [0.01]},
+            index=pd.MultiIndex.from_tuples([("NVDA", pd.Timestamp("2026-01-01"))], names=["symbol", "timestamp"]),
+        )
+
+
 @pytest.fixture
 def patched_cycle_deps(monkeypatch):
     captured = {"market_contexts": []}
@@ -97,22 +122,7 @@ def patched_cycle_deps(monkeypatch):
     monkeypatch.setattr(app_module, "trading_client", trading)
     monkeypatch.setattr(app_module, "market_provider", _FakeMarketProvider())
 
-    monkeypatch.setattr(
-        app_module,
-        "compute_signal",
-        lambda *args, **kwargs: pd.DataFrame(
-            {"signal": [0.0]},
-            index=pd.MultiIndex.from_tuples([("NVDA", pd.Timestamp("2026-01-01"))], names=["symbol", "timestamp"]),
-        ),
-    )
-    monkeypatch.setattr(
-        app_module,
-        "compute_volatility",
-        lambda *args, **kwargs: pd.DataFrame(
-            {"volatility": [0.01]},
-            index=pd.MultiIndex.from_tuples([("NVDA", pd.Timestamp("2026-01-01"))], names=["symbol", "timestamp"]),
-        ),
-    )
+    monkeypatch.setattr(app_module, "signal_engine", _FakeSignalEngine())
     monkeypatch.setattr(app_module, "size_position", lambda *args, **kwargs: {})
     monkeypatch.setattr(app_module, "calculate_orders", lambda *args, **kwargs: [])
 
@@ -140,7 +150,7 @@ def patched_cycle_deps(monkeypatch):
                 "decision_reasoning": "hold",
             }
 
-    monkeypatch.setattr(app_module, "AgenticExecutor", _FakeAgenticExecutor)
+    monkeypatch.setattr(app_module, "agent", _FakeAgenticExecutor())
 
     original_override = app_module.risk_override
     original_epsilon = app_module.bandit_epsilon_override
@@ -172,3 +182,109 @@ async def test_dry_run_uses_fixed_params(patched_cycle_deps):
     assert result["params"] == {"fast": 20, "slow": 60, "vol_target": 0.10}
     assert captured["market_contexts"][-1]["dry_run"] is True
     assert trading.submit_called is False
+
+
+@pytest.mark.asyncio
+async def test_upstream_calls_run_concurrently_off_the_loop(patched_cycle_deps, monkeypatch):
+    import asyncio
+    import time
+
+    delay = 0.2
+
+    def slow(fn):
+        def wrapper(*args, **kwargs):
+            time.sleep(delay)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    trading = app_module.trading_client
+    provider = app_module.market_provider
+    for obj, name in [(trading, "get_account"), (trading, "get_all_positions"),
+                      (provider, "get_bars"), (provider, "get_latest_trades"), (provider, "get_vix")]:
+        monkeypatch.setattr(obj, name, slow(getattr(obj, name)))
+    app_module.risk_override = None
+
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    result = await app_module.execute_bot_cycle(dry_run=True)
+    elapsed = time.perf_counter() - start
+    beat.cancel()
+
+    assert result["status"] == "success"
+    # Five fetches in parallel, then the second positions read: ~2 delays, not ~6.
+    assert elapsed < 4 * delay
+    # The event loop kept running while the cycle waited on the network.
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_cycle_limited_to_dirty_symbols(patched_cycle_deps, monkeypatch):
+    _captured, _trading = patched_cycle_deps
+    app_module.risk_override = None
+    provider = app_module.market_provider
+    fetched = {}
+    get_bars = provider.get_bars
+
+    def recording_get_bars(symbols, **kwargs):
+        fetched["bars"] = list(symbols)
+        return get_bars(symbols, **kwargs)
+
+    monkeypatch.setattr(provider, "get_bars", recording_get_bars)
+    order_scope = {}
+
+    def fake_calculate_orders(positions, targets, prices, only_allow_symbols=None):
+        order_scope["symbols"] = only_allow_symbols
+        return []
+
+    monkeypatch.setattr(app_module, "calculate_orders", fake_calculate_orders)
+    universe = app_module.TRADED_SYMBOLS
+    dirty = [universe[3], universe[1], "NOT_TRADED"]
+
+    result = await app_module.execute_bot_cycle(dry_run=True, symbols=dirty)
+
+    assert result["status"] == "success"
+    assert result["symbols"] == [universe[1], universe[3]]
+    assert fetched["bars"] == [universe[1], universe[3]]
+    assert order_scope["symbols"] == [universe[1], universe[3]]
+
+
+@pytest.mark.asyncio
+async def test_cycle_reads_one_snapshot(patched_cycle_deps, monkeypatch):
+    captured, trading = patched_cycle_deps
+    app_module.risk_override = None
+    counts = {}
+
+    def counted(obj, name):
+        fn = getattr(obj, name)
+
+        def wrapper(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return fn(*args, **kwargs)
+        monkeypatch.setattr(obj, name, wrapper)
+
+    for name in ("get_account", "get_all_positions"):
+        counted(trading, name)
+    for name in ("get_bars", "get_latest_trades", "get_vix"):
+        counted(app_module.market_provider, name)
+
+    result = await app_module.execute_bot_cycle(dry_run=True)
+
+    assert counts == {name: 1 for name in counts} and len(counts) == 5
+    assert [c["name"] for c in result["upstream_calls"]] == [
+        "get_bars", "get_latest_trades", "get_account", "get_all_positions", "get_vix",
+    ]
+    snapshot = captured["market_contexts"][-1]["snapshot"]
+    assert snapshot.vix == 17.0
+    assert captured["market_contexts"][-1]["latest_prices"] == dict(snapshot.latest_prices)
+    with pytest.raises(FrozenInstanceError):
+        snapshot.vix = 99.0
+    with pytest.raises(TypeError):
+        snapshot.latest_prices["NVDA"] = 1.0
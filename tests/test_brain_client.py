@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from mcp_server import brain
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Routes brain's pooled client to an in-process handler that logs each request."""
+    seen = []
+
+    async def handler(request: httpx.Request):
+        seen.append((request.method, request.url.path))
+        await asyncio.sleep(0.05)
+        if request.url.path == "/bot/dashboard":
+            return httpx.Response(200, json={
+                "account": {"equity": 1000.0, "buying_power": 2000.0},
+                "metrics": {"total_runs": 3, "current_equity": 1000.0, "max_drawdown_pct": 1.5},
+                "risk_status": {"active_regime": "SAFE"},
+                "bandit_stats": [{"param_key": "20_60_0.1", "trials": 4, "total_reward": 1.0, "avg_reward": 0.25}],
+                "trade_history": [{"symbol": "AAA"}, {"symbol": "BBB"}],
+            })
+        return httpx.Response(200, json=[{"path": request.url.path}])
+
+    client = httpx.AsyncClient(base_url="http://bot", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(brain, "_client", client)
+    monkeypatch.setattr(brain, "_cache", {})
+    monkeypatch.setattr(brain, "CACHE_TTL", 60.0)
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_read_tools_share_one_dashboard_request(fake_api):
+    seen = fake_api
+    client = brain._client
+
+    snapshot, bandit, risk = await asyncio.gather(
+        brain.get_portfolio_snapshot(), brain.get_bandit_analysis(), brain.get_risk_status()
+    )
+
+    assert seen == [("GET", "/bot/dashboard")]
+    assert json.loads(snapshot)["performance"]["total_runs"] == 3
+    assert json.loads(bandit)["total_trials"] == 4
+    assert json.loads(risk) == {"active_regime": "SAFE"}
+    # The pooled client is reused, not replaced per request.
+    assert brain._http() is client
+
+
+@pytest.mark.asyncio
+async def test_reads_are_cached_and_actions_invalidate(fake_api):
+    seen = fake_api
+
+    await brain.get_risk_status()
+    await brain.get_portfolio_snapshot()
+    assert seen.count(("GET", "/bot/dashboard")) == 1
+
+    assert [t["symbol"] for t in json.loads(await brain.get_trade_history(limit=1))] == ["AAA"]
+    await brain.get_trade_history(limit=10)
+    assert seen.count(("GET", "/bot/trade_history")) == 1
+
+    await brain.set_risk_override("clear")
+    await brain.get_risk_status()
+    assert seen.count(("GET", "/bot/dashboard")) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_reads_are_not_cached(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        return httpx.Response(503 if len(calls) == 1 else 200, json={"risk_status": {"ok": len(calls) > 1}})
+
+    monkeypatch.setattr(brain, "_client", httpx.AsyncClient(base_url="http://bot", transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(brain, "_cache", {})
+    monkeypatch.setattr(brain, "CACHE_TTL", 60.0)
+
+    assert (await brain.get_risk_status()).startswith("Error")
+    assert json.loads(await brain.get_risk_status()) == {"ok": True}
+    assert len(calls) == 2
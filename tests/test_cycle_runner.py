@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from backend.services.cycle_runner import CycleRunner, Histogram
+
+
+class _FakeCycle:
+    def __init__(self, duration=0.1, fail=False):
+        self.duration = duration
+        self.fail = fail
+        self.calls = []
+        self.running = 0
+        self.overlapped = False
+
+    async def __call__(self, dry_run=False, symbols=None):
+        self.running += 1
+        self.overlapped = self.overlapped or self.running > 1
+        self.calls.append((dry_run, symbols))
+        try:
+            await asyncio.sleep(self.duration)
+            if self.fail:
+                raise RuntimeError("broker down")
+            return {"run": len(self.calls), "symbols": symbols}
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_the_running_cycle():
+    cycle = _FakeCycle()
+    runner = CycleRunner(cycle, min_interval=0)
+
+    burst = [runner.run(dry_run=True) for _ in range(3)]
+    first = asyncio.gather(*burst)
+    await asyncio.sleep(0.02)
+    # Arrive while it is running and ask for nothing more: join it.
+    late = [runner.run(dry_run=True, symbols=["AAA"]) for _ in range(2)]
+    results = await asyncio.gather(first, *late)
+
+    assert len(cycle.calls) == 1
+    assert results[0][0] is results[0][2] is results[1] is results[2]
+    assert not cycle.overlapped
+    stats = runner.stats()
+    assert stats["requests_coalesced"] == 2 and stats["requests_shared"] == 2
+    assert stats["cycle_duration_sec"]["count"] == len(cycle.calls)
+    assert stats["queue_depth"] == 0 and not stats["running"]
+
+
+@pytest.mark.asyncio
+async def test_fresh_triggers_collapse_into_one_follow_up():
+    cycle = _FakeCycle(duration=0.1)
+    runner = CycleRunner(cycle, min_interval=0.05)
+
+    first = asyncio.create_task(runner.run(symbols=["AAA"], fresh=True))
+    await asyncio.sleep(0.02)
+    assert runner.running
+    # Fired mid-cycle: cannot reuse the running cycle's (older) data.
+    followers = [asyncio.create_task(runner.run(symbols=[s], fresh=True)) for s in ("BBB", "CCC", "BBB")]
+    await asyncio.sleep(0)
+    assert runner.depth() == 3
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = await asyncio.gather(first, *followers)
+    assert cycle.calls == [(False, ["AAA"]), (False, ["BBB", "CCC"])]
+    assert results[1] is results[2] is results[3]
+    assert not cycle.overlapped
+    # Second cycle waited out the minimum interval after the first finished.
+    assert loop.time() - start >= 0.05 + 0.1 - 0.02 - 0.01
+    assert runner.stats()["queue_wait_sec"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_live_and_dry_runs_never_share_and_errors_propagate():
+    cycle = _FakeCycle(duration=0.05, fail=True)
+    runner = CycleRunner(cycle, min_interval=0)
+
+    outcomes = await asyncio.gather(runner.run(dry_run=False), runner.run(dry_run=True), return_exceptions=True)
+
+    assert [c[0] for c in cycle.calls] == [False, True]
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert not cycle.overlapped
+
+
+def test_histogram_buckets_and_quantiles():
+    h = Histogram((1, 5, 10))
+    for v in (0.5, 2, 3, 7, 50):
+        h.observe(v)
+    snap = h.snapshot()
+    assert snap["buckets"] == {"1": 1, "5": 2, "10": 1, "+Inf": 1}
+    assert snap["count"] == 5 and snap["max"] == 50
+    assert snap["p50"] == 5
+    assert snap["p95"] is None  # falls in +Inf
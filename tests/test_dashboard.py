@@ -0,0 +1,156 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import backend.app as app_module
+from backend.services.broker import AsyncBroker
+from backend.services.dashboard import DashboardService, etag_matches
+
+
+class _Sections:
+    """Blocking section callables that count how often each is computed."""
+
+    def __init__(self):
+        self.calls = {"account": 0, "risk_status": 0}
+        self.equity = 1000.0
+        self.risk_fails = False
+
+    def account(self):
+        self.calls["account"] += 1
+        return {"equity": self.equity}
+
+    def risk_status(self):
+        self.calls["risk_status"] += 1
+        if self.risk_fails:
+            raise RuntimeError("vix feed down")
+        return {"active_regime": "SAFE"}
+
+    def as_dict(self):
+        return {"account": self.account, "risk_status": self.risk_status}
+
+
+@pytest.fixture
+def broker():
+    b = AsyncBroker(max_workers=4)
+    yield b
+    b.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_readers_share_one_build_and_etag_tracks_content(broker):
+    sections = _Sections()
+    dash = DashboardService(broker, sections.as_dict(), interval=60)
+
+    snaps = await asyncio.gather(*(dash.current() for _ in range(20)))
+    assert sections.calls == {"account": 1, "risk_status": 1}
+    assert len({s.etag for s in snaps}) == 1
+
+    first = snaps[0]
+    same = await dash.refresh()
+    assert same.etag == first.etag          # unchanged data keeps its ETag
+
+    sections.equity = 1100.0
+    changed = await dash.refresh()
+    assert changed.etag != first.etag
+
+    sections.risk_fails = True
+    degraded = await dash.refresh()
+    assert degraded.errors == {"risk_status": "vix feed down"}
+    assert b'"active_regime": "SAFE"' in degraded.body   # last good value kept
+    assert degraded.etag != changed.etag    # a cached 200 must not hide the error
+    assert (await dash.refresh()).etag == degraded.etag
+
+    sections.risk_fails = False
+    recovered = await dash.refresh()
+    assert recovered.errors == {}
+    assert recovered.etag == changed.etag
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_and_threadsafe_invalidate(broker):
+    sections = _Sections()
+    dash = DashboardService(broker, sections.as_dict(), interval=60)
+    dash.start()
+    await asyncio.sleep(0.05)
+    assert dash.builds == 1
+    await dash.current()                    # a reader keeps the loop building
+
+    # Sync endpoints run in a worker thread.
+    threading.Thread(target=dash.invalidate).start()
+    await asyncio.sleep(0.1)
+    await dash.stop()
+
+    assert dash.builds == 2
+    assert sections.calls["account"] == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_dashboard_stops_rebuilding_until_read(broker):
+    sections = _Sections()
+    dash = DashboardService(broker, sections.as_dict(), interval=0.02)
+    dash.start()
+    await dash.current()
+    await asyncio.sleep(0.3)
+    idle_builds = dash.builds
+    # Building stops a few intervals after the last read.
+    assert idle_builds < 10
+    assert dash.idle_skips > 0
+    await asyncio.sleep(0.1)
+    assert dash.builds == idle_builds
+
+    sections.equity = 1200.0
+    snap = await dash.current()             # rebuilt on demand
+    await dash.stop()
+    assert dash.builds == idle_builds + 1
+    assert b'"equity": 1200.0' in snap.body
+
+
+@pytest.mark.asyncio
+async def test_build_uses_at_most_max_workers_broker_threads(broker):
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def slow():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        threading.Event().wait(0.05)
+        with lock:
+            running -= 1
+        return 1
+
+    dash = DashboardService(broker, {f"s{k}": slow for k in range(6)}, interval=60, max_workers=2)
+    await dash.refresh()
+    assert peak == 2
+
+
+def test_etag_matching():
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"xyz", "abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('"xyz"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+
+@pytest.mark.asyncio
+async def test_dashboard_endpoint_revalidates_with_304(monkeypatch, broker):
+    sections = _Sections()
+    monkeypatch.setattr(app_module, "dashboard", DashboardService(broker, sections.as_dict(), interval=60))
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/bot/dashboard")
+        assert first.status_code == 200
+        assert first.json()["account"] == {"equity": 1000.0}
+        etag = first.headers["etag"]
+
+        again = await client.get("/bot/dashboard", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+    assert sections.calls["account"] == 1
+    assert app_module.dashboard.stats()["not_modified"] == 1
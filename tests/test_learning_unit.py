@@ -1,3 +1,10 @@
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.db import Base
 from backend.learning import EpsilonGreedyBandit
 from backend.models import BanditState
 
@@ -64,3 +71,89 @@ class TestBanditUpdateAndChoose:
         state = bandit.get_state()
         assert isinstance(state, list)
         assert len(state) == 1
+
+
+class TestBanditWriteBehind:
+    def test_updates_stay_in_memory_until_flush(self, db_session):
+        bandit = EpsilonGreedyBandit(db_session, flush_every=0)
+        params = {"fast": 30, "slow": 70, "vol_target": 0.4}
+        for reward in (10.0, 20.0, 30.0):
+            bandit.update_arm(params, reward)
+        assert db_session.query(BanditState).count() == 0
+        assert bandit.get_best_arm() == params
+
+        bandit.flush()
+        state = db_session.query(BanditState).one()
+        assert state.trials == 3
+        assert state.avg_reward == 20.0
+
+    def test_flush_every_n_updates(self, db_session):
+        bandit = EpsilonGreedyBandit(db_session, flush_every=3)
+        params = {"fast": 10, "slow": 30, "vol_target": 0.25}
+        bandit.update_arm(params, 1.0)
+        bandit.update_arm(params, 1.0)
+        assert db_session.query(BanditState).count() == 0
+        bandit.update_arm(params, 1.0)
+        assert db_session.query(BanditState).one().trials == 3
+
+    def test_flush_adds_deltas_to_concurrent_writers(self, db_session):
+        params = {"fast": 10, "slow": 30, "vol_target": 0.25}
+        a = EpsilonGreedyBandit(db_session, flush_every=0)
+        b = EpsilonGreedyBandit(db_session, flush_every=0)
+        a.update_arm(params, 5.0)
+        b.update_arm(params, 7.0)
+        a.flush()
+        b.flush()
+        state = db_session.query(BanditState).one()
+        assert state.trials == 2
+        assert state.total_reward == 12.0
+
+    def test_flush_does_not_lose_updates_from_other_sessions(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'bandit.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        params = {"fast": 10, "slow": 30, "vol_target": 0.25}
+        first, second = Session(), Session()
+        try:
+            EpsilonGreedyBandit(first).update_arm(params, 1.0)
+            # Both bandits load trials=1, then write their deltas one after the other
+            # while `first` still holds the row it read (as after get_state()).
+            a = EpsilonGreedyBandit(first, flush_every=0)
+            b = EpsilonGreedyBandit(second, flush_every=0)
+            state = a.get_state()[0]
+            a.update_arm(params, 5.0)
+            b.update_arm(params, 7.0)
+            b.flush()
+            a.flush()
+            assert (state.trials, state.total_reward, state.avg_reward) == (3, 13.0, 13.0 / 3)
+        finally:
+            first.close()
+            second.close()
+
+    def test_add_reward_updates_one_arm_without_loading_the_table(self, db_session, monkeypatch):
+        params = {"fast": 10, "slow": 30, "vol_target": 0.25}
+        EpsilonGreedyBandit(db_session).update_arm(params, 4.0)
+        monkeypatch.setattr(EpsilonGreedyBandit, "_load_arms_from_db", lambda self: pytest.fail("arm table loaded"))
+
+        EpsilonGreedyBandit.add_reward(db_session, params, 2.0)
+        EpsilonGreedyBandit.add_reward(db_session, {"fast": 8, "slow": 30, "vol_target": 0.25}, -1.0)
+        db_session.commit()
+        states = {s.param_key: s for s in db_session.query(BanditState).all()}
+        assert (states["10_30_0.25"].trials, states["10_30_0.25"].avg_reward) == (2, 3.0)
+        assert (states["8_30_0.25"].trials, states["8_30_0.25"].total_reward) == (1, -1.0)
+
+    def test_best_arm_matches_linear_scan(self, db_session):
+        rng = random.Random(3)
+        arms = [{"fast": f, "slow": 3 * f, "vol_target": 0.2} for f in range(5, 45)]
+        bandit = EpsilonGreedyBandit(db_session, flush_every=0)
+        bandit.set_arms(arms)
+        totals, trials = {}, {}
+        for _ in range(2000):
+            arm = rng.choice(arms)
+            reward = rng.gauss(0.0, 1.0)
+            bandit.update_arm(arm, reward)
+            totals[arm["fast"]] = totals.get(arm["fast"], 0.0) + reward
+            trials[arm["fast"]] = trials.get(arm["fast"], 0) + 1
+
+            expected = max(arms, key=lambda a: totals[a["fast"]] / trials[a["fast"]] if a["fast"] in trials else 0.0)
+            assert bandit.get_best_arm() == expected
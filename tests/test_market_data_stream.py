@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+import websockets
+
+from backend.services.streaming import AlpacaStreamingService
+
+
+async def _noop_trade(_data):
+    return None
+
+
+def _service(callback, **attrs):
+    svc = AlpacaStreamingService(callback, _noop_trade)
+    svc.symbols = ["AAA", "BBB"]
+    svc.last_prices = {s: 0.0 for s in svc.symbols}
+    svc.ref_prices = {s: 0.0 for s in svc.symbols}
+    # Recently triggered, so only real moves (not the heartbeat) fire.
+    now = asyncio.get_running_loop().time()
+    svc.last_trigger_times = {s: now for s in svc.symbols}
+    svc.global_last_trigger = now - 3600
+    for k, v in attrs.items():
+        setattr(svc, k, v)
+    return svc
+
+
+async def _fake_alpaca(ws, trades, received):
+    """Speaks the Alpaca market-data handshake, then streams `trades`."""
+    await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+    received.append(json.loads(await ws.recv()))
+    await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+    received.append(json.loads(await ws.recv()))
+    await ws.send(json.dumps([{"T": "subscription", "trades": ["AAA", "BBB"]}]))
+    for batch in trades:
+        await ws.send(json.dumps(batch))
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_stream_moves_coalesce_into_one_cycle():
+    trades = [
+        [{"T": "t", "S": "AAA", "p": 100.0}, {"T": "t", "S": "BBB", "p": 50.0}],
+        [{"T": "t", "S": "AAA", "p": 100.05}],           # 0.05%: below threshold
+        [{"T": "t", "S": "AAA", "p": 100.5}],            # 0.45%: fires
+        [{"T": "t", "S": "BBB", "p": 51.0}],             # 2%: fires, same burst
+        [{"T": "q", "S": "AAA"}, {"T": "t", "S": "ZZZ", "p": 1.0}],  # ignored
+    ]
+    received, fired = [], []
+
+    async def on_data(symbols=None):
+        fired.append((symbols, dict(svc.last_prices)))
+
+    async with websockets.serve(lambda ws: _fake_alpaca(ws, trades, received), "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        svc = _service(on_data, data_stream_url=f"ws://127.0.0.1:{port}", _api_key="k", _secret_key="s",
+                       coalesce_sec=0.02)
+        trigger_loop = asyncio.create_task(svc._run_trigger_loop())
+        await asyncio.wait_for(svc._run_data_stream(), timeout=5)
+        await asyncio.sleep(0.05)
+        await svc.stop()
+        await trigger_loop
+
+    assert received[0] == {"action": "auth", "key": "k", "secret": "s"}
+    assert received[1] == {"action": "subscribe", "trades": ["AAA", "BBB"]}
+    assert len(fired) == 1
+    symbols, prices = fired[0]
+    assert symbols == ["AAA", "BBB"]
+    assert prices == {"AAA": 100.5, "BBB": 51.0}
+
+
+@pytest.mark.asyncio
+async def test_small_ticks_accumulate_against_last_trigger_price():
+    # Each tick moves ~0.03%, but together they drift 0.15% from the reference.
+    ticks = [100.0, 100.03, 100.06, 100.09, 100.12, 100.15]
+    trades = [[{"T": "t", "S": "AAA", "p": p}] for p in ticks]
+    received, fired = [], []
+
+    async def on_data(symbols=None):
+        fired.append(symbols)
+
+    async with websockets.serve(lambda ws: _fake_alpaca(ws, trades, received), "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        svc = _service(on_data, data_stream_url=f"ws://127.0.0.1:{port}", coalesce_sec=0.01)
+        trigger_loop = asyncio.create_task(svc._run_trigger_loop())
+        await asyncio.wait_for(svc._run_data_stream(), timeout=5)
+        await asyncio.sleep(0.05)
+        await svc.stop()
+        await trigger_loop
+
+    assert fired == [["AAA"]]
+    assert svc.triggers_received == 1
+    # Fired at 100.12 (0.12% from 100.0); the next tick is measured from there.
+    assert svc.ref_prices["AAA"] == 100.12
+    assert svc.last_prices["AAA"] == 100.15
+
+
+@pytest.mark.asyncio
+async def test_slow_cycles_never_pile_up_triggers():
+    running, batches = 0, []
+    overlap = False
+
+    async def slow_cycle(symbols=None):
+        nonlocal running, overlap
+        running += 1
+        overlap = overlap or running > 1
+        batches.append(symbols)
+        await asyncio.sleep(0.1)
+        running -= 1
+
+    svc = _service(slow_cycle, symbols=["AAA", "BBB", "CCC"], coalesce_sec=0.01, min_cooldown_sec=0, threshold=0.001)
+    svc.last_prices = {"AAA": 100.0, "BBB": 100.0, "CCC": 100.0}
+    svc.ref_prices = dict(svc.last_prices)
+    trigger_loop = asyncio.create_task(svc._run_trigger_loop())
+    loop = asyncio.get_running_loop()
+
+    # 60 moves over ~0.3s: 20 per symbol, far more than 3 slow cycles can absorb one by one.
+    for k in range(60):
+        symbol = ["AAA", "BBB", "CCC"][k % 3]
+        svc._on_price(symbol, svc.last_prices[symbol] * 1.01, loop.time())
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.3)
+    await svc.stop()
+    await trigger_loop
+
+    assert svc.triggers_received == 60
+    assert not overlap
+    assert 2 <= len(batches) <= 6
+    assert batches[-1] == ["AAA", "BBB", "CCC"]
+    assert all(b == sorted(b, key=["AAA", "BBB", "CCC"].index) for b in batches)
+    assert not svc._dirty
+
+
+@pytest.mark.asyncio
+async def test_stream_auth_error_raises():
+    async def reject(ws):
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        await ws.recv()
+        await ws.send(json.dumps([{"T": "error", "code": 406, "msg": "connection limit exceeded"}]))
+        await asyncio.sleep(0.05)
+
+    async def on_data():
+        return None
+
+    async with websockets.serve(reject, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        svc = _service(on_data, data_stream_url=f"ws://127.0.0.1:{port}")
+        with pytest.raises(ConnectionError, match="406"):
+            await asyncio.wait_for(svc._run_data_stream(), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_adaptive_polling_when_stream_is_down():
+    prices = iter([100.0, 100.0, 100.0, 100.3, 100.3])
+    polls = []
+
+    class _FakeDataClient:
+        def get_stock_latest_trade(self, req):
+            polls.append(time.monotonic())
+            price = next(prices, 100.3)
+            return {"AAA": SimpleNamespace(price=price)}
+
+    fired = []
+
+    async def on_data(symbols=None):
+        fired.append((symbols, svc.last_prices["AAA"]))
+        await svc.stop()
+
+    svc = _service(on_data, data_stream_url="ws://127.0.0.1:1", _data_client=_FakeDataClient(),
+                   poll_min_sec=0.01, heartbeat_sec=30, min_cooldown_sec=0, coalesce_sec=0)
+    trigger_loop = asyncio.create_task(svc._run_trigger_loop())
+    await asyncio.wait_for(svc._run_market_data(), timeout=5)
+    await trigger_loop
+
+    assert fired == [(["AAA"], 100.3)]
+    gaps = [b - a for a, b in zip(polls, polls[1:])]
+    # Quiet polls back off (0.02s, 0.04s, 0.08s...) instead of waiting a fixed heartbeat.
+    assert gaps[1] > gaps[0]
+    assert svc.poll_interval == svc.poll_min_sec
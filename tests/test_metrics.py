@@ -1,5 +1,14 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.db import Base
+from backend.services.downsample import lttb
 from backend.services.metrics import MetricsService
-from backend.models import DailyEquity
+from backend.models import DailyEquity, EquityStats, EquityRollup
 
 
 class TestDrawdownCalculation:
@@ -42,3 +51,214 @@ class TestDrawdownCalculation:
         metrics = svc.get_metrics()
         assert metrics["total_runs"] == 0
         assert metrics["current_equity"] == 0
+
+
+class TestEquityStats:
+    def _insert_live(self, db_session, values, start=datetime(2026, 1, 5, 14, 30)):
+        for i, equity in enumerate(values):
+            db_session.add(DailyEquity(date=start + timedelta(minutes=i), equity=equity, drawdown_pct=0.0, source="live"))
+        db_session.commit()
+
+    def test_existing_history_is_folded_into_stats_once(self, db_session):
+        self._insert_live(db_session, [100_000, 80_000, 120_000, 90_000])
+        db_session.add(DailyEquity(equity=1.0, drawdown_pct=0.0, source="backtest"))
+        db_session.commit()
+
+        svc = MetricsService(db_session)
+        metrics = svc.get_metrics()
+        stats = db_session.get(EquityStats, "live")
+
+        assert stats.count == 4
+        assert stats.high_water_mark == 120_000
+        assert metrics["current_equity"] == 90_000
+        assert metrics["max_drawdown_pct"] == 25.0
+
+    def test_record_updates_stats_without_rescanning(self, db_session):
+        svc = MetricsService(db_session)
+        svc.record_daily_equity(100_000)
+
+        statements = []
+
+        def listen(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", listen)
+        try:
+            svc.record_daily_equity(90_000)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listen)
+
+        reads = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert not any("daily_equity" in s or "max(" in s.lower() for s in reads)
+        stats = db_session.get(EquityStats, "live")
+        assert (stats.count, stats.last_equity, stats.max_drawdown_pct) == (2, 90_000, 10.0)
+
+    def test_history_is_downsampled_and_extended_incrementally(self, db_session):
+        values = [100_000 + 1_000 * np.sin(i / 40) for i in range(3_000)]
+        values[1_234] = 50_000  # a crash must survive downsampling
+        self._insert_live(db_session, values)
+
+        svc = MetricsService(db_session)
+        history = svc.get_metrics(max_points=200)["history"]
+        assert len(history) == 200
+        assert history[0]["equity"] == round(values[0], 2)
+        assert history[-1]["equity"] == round(values[-1], 2)
+        assert min(p["equity"] for p in history) == 50_000
+
+        svc.record_daily_equity(123_456)
+        metrics = svc.get_metrics(max_points=200)
+        assert metrics["history_points"] == 3_001
+        assert metrics["history"][-1]["equity"] == 123_456
+
+    def test_rebuild_matches_incremental_stats(self, db_session):
+        svc = MetricsService(db_session)
+        for equity in (100_000, 104_000, 97_000, 110_000, 99_000):
+            svc.record_daily_equity(equity)
+        incremental = db_session.get(EquityStats, "live")
+        snapshot = (incremental.count, incremental.high_water_mark, incremental.max_drawdown_pct, incremental.last_equity)
+
+        rebuilt = svc.rebuild_stats("live")
+
+        assert (rebuilt.count, rebuilt.high_water_mark, rebuilt.max_drawdown_pct, rebuilt.last_equity) == snapshot
+
+
+    def test_drifted_count_is_resynced_after_one_rescan(self, db_session):
+        svc = MetricsService(db_session)
+        for i, equity in enumerate((100_000, 95_000, 98_000)):
+            svc.record_daily_equity(equity, at=datetime(2026, 1, 5, 14, 30) + timedelta(minutes=i))
+        assert len(svc.get_metrics()["history"]) == 3
+        # A row written without going through the stats row, then a normal one.
+        self._insert_live(db_session, [97_000], start=datetime(2026, 1, 6, 14, 30))
+        svc.record_daily_equity(99_000, at=datetime(2026, 1, 6, 14, 31))
+
+        assert len(svc.get_metrics()["history"]) == 5
+        assert db_session.get(EquityStats, "live").count == 5
+
+        statements = []
+
+        def listen(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", listen)
+        try:
+            assert len(svc.get_metrics()["history"]) == 5
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listen)
+        assert not any("daily_equity" in s for s in statements)
+
+    def test_concurrent_writers_do_not_lose_points(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'equity.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        first, second = Session(), Session()
+        try:
+            a, b = MetricsService(first), MetricsService(second)
+            a.record_daily_equity(100_000, at=datetime(2026, 1, 5, 14, 30))
+            held = first.get(EquityStats, "live")   # `first` holds the stats row it read
+            b.record_daily_equity(120_000, at=datetime(2026, 1, 5, 14, 31))
+            a.record_daily_equity(90_000, at=datetime(2026, 1, 5, 14, 32))
+
+            stats = first.get(EquityStats, "live")
+            assert stats is held
+            assert (stats.count, stats.high_water_mark, stats.max_drawdown_pct) == (3, 120_000, 25.0)
+            assert first.query(DailyEquity).order_by(DailyEquity.id.desc()).first().drawdown_pct == 25.0
+        finally:
+            first.close()
+            second.close()
+
+
+class TestEquityRollups:
+    START = datetime(2026, 3, 2, 14, 30)
+
+    def _record_days(self, svc, days):
+        # One point per minute from 14:30 to 16:29 (three hour buckets) for `days` days.
+        for d in range(days):
+            for m in range(120):
+                svc.record_daily_equity(100_000 + d * 1_000 + (m % 7) * 10, at=self.START + timedelta(days=d, minutes=m))
+
+    def test_rollups_are_maintained_on_write(self, db_session):
+        svc = MetricsService(db_session)
+        for i, equity in enumerate([100.0, 105.0, 95.0, 101.0]):
+            svc.record_daily_equity(equity, at=self.START + timedelta(seconds=10 * i))
+
+        rows = {r.resolution: r for r in db_session.query(EquityRollup).all()}
+        assert set(rows) == {"1m", "1h", "1d"}
+        day = rows["1d"]
+        assert (day.open, day.high, day.low, day.close, day.count) == (100.0, 105.0, 95.0, 101.0, 4)
+        assert round(day.drawdown_max, 4) == round((105 - 95) / 105 * 100, 4)
+        assert rows["1m"].bucket_start == self.START
+        assert rows["1d"].bucket_start == datetime(2026, 3, 2)
+
+    def test_auto_resolution_stays_within_budget(self, db_session):
+        svc = MetricsService(db_session)
+        self._record_days(svc, 3)
+
+        one_hour = svc.get_series(self.START, self.START + timedelta(minutes=59), max_points=100)
+        assert one_hour["resolution"] == "1m"
+        assert len(one_hour["series"]) == 60
+
+        everything = svc.get_series(max_points=100)
+        assert everything["resolution"] == "1h"
+        assert len(everything["series"]) == 3 * 3
+        assert everything["series"][0]["open"] == 100_000
+        assert everything["series"][-1]["close"] == svc.get_metrics(history=False)["current_equity"]
+
+        days = svc.get_series(max_points=2, resolution="1d")
+        assert days["resolution"] == "2x1d"
+        assert [p["count"] for p in days["series"]] == [240, 120]
+
+        with pytest.raises(ValueError):
+            svc.get_series(resolution="1m", max_points=100_000)  # 3 days of minutes > CACHE_POINTS
+
+    def test_rollups_rebuilt_from_existing_history(self, db_session):
+        svc = MetricsService(db_session)
+        self._record_days(svc, 2)
+        expected = svc.get_series(resolution="1h")["series"]
+
+        db_session.query(EquityStats).delete()
+        db_session.query(EquityRollup).delete()
+        db_session.commit()
+
+        assert svc.get_series(resolution="1h")["series"] == expected
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(1_000, dtype=float)
+    y = np.sin(x / 50)
+    y[500] = 5.0
+
+    keep = lttb(x, y, 50)
+
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+    assert 500 in keep
+    assert list(lttb(x[:10], y[:10], 50)) == list(range(10))
+
+
+def test_metrics_endpoint_range_query(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import backend.app as app_module
+    from backend.db import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(app_module, "SessionLocal", Session)
+    db = Session()
+    svc = MetricsService(db)
+    for m in range(90):
+        svc.record_daily_equity(100_000 + m, at=datetime(2026, 3, 2, 14, 30) + timedelta(minutes=m))
+    db.close()
+
+    client = TestClient(app_module.app)
+    ranged = client.get("/bot/metrics", params={"from": "2026-03-02T14:30:00Z", "to": "2026-03-02T15:29:00Z", "resolution": "auto"}).json()
+    assert ranged["resolution"] == "1m"
+    assert len(ranged["series"]) == 60
+    assert "history" not in ranged
+    assert ranged["current_equity"] == 100_089
+
+    assert len(client.get("/bot/metrics").json()["history"]) == 90
+    assert client.get("/bot/metrics", params={"resolution": "5m"}).status_code == 400
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import backend.services.monte_carlo as mc_module
+from backend.db import Base
+from backend.models import Decision
+from backend.services.monte_carlo import resample_indices, run_monte_carlo, simulate
+
+
+def _reference_paths(rewards, index_matrix, initial_equity=100000.0):
+    """The original per-path / per-step loop with its early-exit ruin check, plus max drawdown."""
+    finals, ruined, drawdowns = [], [], []
+    for row in index_matrix:
+        equity, hit = initial_equity, False
+        peak, max_dd = initial_equity, 0.0
+        for ret in np.asarray(rewards)[row]:
+            equity += ret
+            if equity <= 0:
+                equity, hit, max_dd = 0, True, 1.0
+                break
+            peak = max(peak, equity)
+            max_dd = max(max_dd, (peak - equity) / peak)
+        finals.append(equity)
+        ruined.append(hit)
+        drawdowns.append(max_dd)
+    return np.array(finals), np.array(ruined), np.array(drawdowns)
+
+
+def _first_stream(seed):
+    return np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+
+
+def test_simulate_matches_loop_and_chunking_is_invisible():
+    rng = np.random.default_rng(0)
+    rewards = rng.normal(50, 4000, 60)
+    rewards[7] = -90000.0  # makes ruin reachable
+
+    whole = simulate(rewards, iterations=500, seed=42, chunk_size=500, processes=1)
+    index_matrix = _first_stream(42).integers(0, len(rewards), size=(500, len(rewards)))
+    finals, ruined, drawdowns = _reference_paths(rewards, index_matrix)
+    np.testing.assert_allclose(whole["final_equity"], finals)
+    np.testing.assert_array_equal(whole["ruined"], ruined)
+    np.testing.assert_allclose(whole["max_drawdown"], drawdowns)
+    assert 0 < ruined.sum() < 500
+
+    chunked = simulate(rewards, iterations=500, seed=42, chunk_size=37, processes=1)
+    assert chunked["final_equity"].shape == (500,)
+    assert chunked["ruined"].mean() == pytest.approx(ruined.mean(), abs=0.1)
+
+
+def test_block_bootstraps_keep_runs_together():
+    rng = np.random.default_rng(5)
+    n, length = 50, 6
+
+    block = resample_indices(rng, 200, n, method="block", block_length=length)
+    assert block.shape == (200, n)
+    steps = np.diff(block, axis=1) % n
+    # Inside a block every step advances by one (circularly).
+    within = np.ones(n - 1, dtype=bool)
+    within[length - 1::length] = False
+    assert (steps[:, within] == 1).all()
+
+    stationary = resample_indices(rng, 2000, n, method="stationary", block_length=length)
+    assert stationary.min() >= 0 and stationary.max() < n
+    continue_rate = (np.diff(stationary, axis=1) % n == 1).mean()
+    assert continue_rate == pytest.approx(1 - 1 / length + 1 / n, abs=0.02)
+
+    with pytest.raises(ValueError):
+        simulate([1.0, 2.0], iterations=10, method="bogus")
+
+
+def test_seeded_results_do_not_depend_on_process_count():
+    rewards = np.random.default_rng(1).normal(20, 300, 40)
+    # Three seeded tasks, run inline and across two worker processes.
+    inline = simulate(rewards, iterations=120_000, seed=9, method="block", block_length=4, processes=1)
+    pooled = simulate(rewards, iterations=120_000, seed=9, method="block", block_length=4, processes=2)
+    for key in ("final_equity", "ruined", "max_drawdown"):
+        np.testing.assert_array_equal(inline[key], pooled[key])
+
+
+def test_run_monte_carlo_returns_report(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(mc_module, "SessionLocal", Session)
+
+    assert run_monte_carlo(iterations=10) is None
+
+    db = Session()
+    start = datetime(2024, 1, 1)
+    for k in range(30):
+        db.add(Decision(run_id=f"sim_{k}", timestamp=start + timedelta(days=k), reward=100.0 if k % 3 else -50.0))
+    db.add(Decision(run_id="no_reward", timestamp=start, reward=None))
+    db.commit()
+    db.close()
+
+    report = run_monte_carlo(iterations=2000, seed=1, method="stationary", block_length=3)
+    assert report["iterations"] == 2000
+    assert report == run_monte_carlo(iterations=2000, seed=1, method="stationary", block_length=3)
+    assert report["n_returns"] == 30
+    assert report["risk_of_ruin_pct"] == 0.0
+    pct = report["final_equity_percentiles"]
+    assert pct["5"] <= pct["50"] <= pct["95"]
+    assert report["verdict"] == "ROBUST"
+    lo, hi = report["confidence_bands"]["max_drawdown_pct"]["90"]
+    assert 0.0 <= lo <= hi < 100.0
+
+
+def test_monte_carlo_endpoint_is_capped_and_serialized(monkeypatch):
+    from fastapi import HTTPException
+    import backend.app as app_module
+
+    calls = []
+    monkeypatch.setattr(app_module, "run_monte_carlo", lambda **kw: calls.append(kw) or {"iterations": kw["iterations"]})
+
+    with pytest.raises(HTTPException) as exc:
+        app_module.get_monte_carlo(iterations=app_module.MONTE_CARLO_MAX_ITERATIONS + 1)
+    assert exc.value.status_code == 400
+
+    assert app_module.get_monte_carlo(iterations=500) == {"iterations": 500}
+    assert calls[-1]["processes"] == 1
+
+    with app_module._monte_carlo_lock:
+        with pytest.raises(HTTPException) as exc:
+            app_module.get_monte_carlo(iterations=500)
+    assert exc.value.status_code == 429
+    assert len(calls) == 1
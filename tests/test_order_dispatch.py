@@ -0,0 +1,241 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services.broker import AsyncBroker
+from backend.services.order_dispatch import OrderAckTracker, OrderDispatcher
+
+
+class _FakeTradingClient:
+    """Blocking client; cancels are acked on the 'trade stream' after `ack_delay`."""
+
+    def __init__(self, open_orders, acks, loop, ack_delay=0.05, latency=0.1, fail_cancel=(), fail_submit=()):
+        self.open_orders = open_orders
+        self.acks = acks
+        self.loop = loop
+        self.ack_delay = ack_delay
+        self.latency = latency
+        self.fail_cancel = set(fail_cancel)
+        self.fail_submit = set(fail_submit)
+        self.get_orders_calls = []
+        self.submitted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+
+    def get_orders(self, req):
+        self.get_orders_calls.append(req)
+        return [o for o in self.open_orders if o.symbol in req.symbols]
+
+    def cancel_order_by_id(self, order_id):
+        self._enter()
+        if order_id in self.fail_cancel:
+            raise RuntimeError("order is already filled")
+        if self.ack_delay is not None:
+            self.loop.call_soon_threadsafe(self.loop.call_later, self.ack_delay, self.acks.resolve, order_id, "canceled")
+
+    def submit_order(self, req):
+        self._enter()
+        if req.symbol in self.fail_submit:
+            raise RuntimeError("insufficient buying power")
+        self.submitted.append(req.symbol)
+        return SimpleNamespace(id=f"new-{req.symbol}")
+
+
+def _batch(symbols):
+    return [({"symbol": s, "side": "buy", "qty": 1}, SimpleNamespace(symbol=s)) for s in symbols]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_cancels_concurrently_and_waits_for_acks():
+    symbols = [f"S{k}" for k in range(6)]
+    open_orders = [SimpleNamespace(id=f"old-{s}-{j}", symbol=s) for s in symbols for j in range(2)]
+    acks = OrderAckTracker()
+    client = _FakeTradingClient(open_orders, acks, asyncio.get_running_loop(), fail_submit={"S5"})
+    broker = AsyncBroker(max_workers=16)
+    dispatcher = OrderDispatcher(broker, client, acks, max_concurrency=8, ack_timeout=2.0)
+
+    start = time.perf_counter()
+    results = await dispatcher.dispatch(_batch(symbols))
+    elapsed = time.perf_counter() - start
+    broker.shutdown()
+
+    # One open-orders query for the whole batch.
+    assert len(client.get_orders_calls) == 1
+    assert sorted(client.get_orders_calls[0].symbols) == symbols
+    # 12 cancels + 6 submits at 0.1s each would take ~1.8s sequentially.
+    assert elapsed < 0.8
+    assert client.max_in_flight <= 8
+    assert acks.pending() == 0
+
+    by_symbol = {r["symbol"]: r for r in results}
+    assert by_symbol["S0"]["status"] == "submitted" and by_symbol["S0"]["order_id"] == "new-S0"
+    assert by_symbol["S5"]["status"] == "failed" and "buying power" in by_symbol["S5"]["error"]
+    for r in results:
+        assert r["cancelled"] == 2 and r["acked"] == 2
+        assert r["ack_wait_ms"] >= 0 and r["submit_ms"] > 0
+        assert r["latency_ms"] >= r["cancel_ms"] + r["submit_ms"]
+
+
+@pytest.mark.asyncio
+async def test_missing_or_failed_acks_do_not_block_submission():
+    open_orders = [SimpleNamespace(id="a", symbol="AAA"), SimpleNamespace(id="b", symbol="BBB")]
+    acks = OrderAckTracker()
+    client = _FakeTradingClient(open_orders, acks, asyncio.get_running_loop(),
+                                ack_delay=None, latency=0.01, fail_cancel={"b"})
+    broker = AsyncBroker(max_workers=4)
+    dispatcher = OrderDispatcher(broker, client, acks, ack_timeout=0.2)
+
+    results = await dispatcher.dispatch(_batch(["AAA", "BBB"]))
+    broker.shutdown()
+
+    by_symbol = {r["symbol"]: r for r in results}
+    # AAA's cancel went out but no ack came: submitted after the timeout.
+    assert by_symbol["AAA"]["cancelled"] == 1 and by_symbol["AAA"]["acked"] == 0
+    assert by_symbol["AAA"]["ack_wait_ms"] >= 200
+    # BBB's cancel failed outright, so there was nothing to wait for.
+    assert by_symbol["BBB"]["cancelled"] == 0 and by_symbol["BBB"]["ack_wait_ms"] == 0
+    assert sorted(client.submitted) == ["AAA", "BBB"]
+    assert acks.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_ack_tracker_matches_events_and_enum_values():
+    from alpaca.trading.enums import TradeEvent
+
+    acks = OrderAckTracker()
+    fut = acks.expect("x", events={"canceled"})
+    assert acks.resolve("x", "new") is False
+    assert acks.resolve("x", TradeEvent.CANCELED) is True
+    assert await asyncio.wait_for(fut, 1) == "canceled"
+    assert acks.resolve("x", "canceled") is False
+
+
+@pytest.mark.asyncio
+async def test_liquidate_releases_shares_then_closes_in_parallel():
+    symbols = ["AAA", "BBB", "CCC", "DDD"]
+    open_orders = [SimpleNamespace(id=f"old-{s}", symbol=s) for s in ("AAA", "BBB", "CCC")]
+    acks = OrderAckTracker()
+    loop = asyncio.get_running_loop()
+    client = _FakeTradingClient(open_orders, acks, loop, fail_submit={"CCC"})
+    client.get_all_positions = lambda: [
+        SimpleNamespace(symbol="AAA", qty="10"),
+        SimpleNamespace(symbol="BBB", qty="-5"),
+        SimpleNamespace(symbol="CCC", qty="3"),
+        SimpleNamespace(symbol="ZZZ", qty="7"),  # not managed by the bot
+    ]
+    submit = client.submit_order
+
+    def submit_and_fill(req):
+        tx = submit(req)
+        # AAA's fill reaches the stream before submit_order returns; BBB never fills.
+        if req.symbol == "AAA":
+            acks.resolve(tx.id, "fill")
+        return tx
+
+    client.submit_order = submit_and_fill
+    broker = AsyncBroker(max_workers=8)
+    dispatcher = OrderDispatcher(broker, client, acks, ack_timeout=2.0)
+
+    start = time.perf_counter()
+    timeline = await dispatcher.liquidate(symbols, fill_timeout=0.3)
+    elapsed = time.perf_counter() - start
+    broker.shutdown()
+
+    assert len(client.get_orders_calls) == 1
+    # Cancel (0.1s) + submit (0.1s) + fill wait (0.3s), overlapped across symbols.
+    assert elapsed < 0.9
+    steps = {t["symbol"]: t for t in timeline}
+    assert [t["symbol"] for t in timeline] == symbols
+
+    aaa = steps["AAA"]
+    assert aaa["status"] == "closed" and aaa["side"] == "sell" and aaa["qty"] == 10
+    assert aaa["acked"] == 1
+    assert aaa["released_ms"] <= aaa["submitted_ms"] <= aaa["filled_ms"]
+    assert steps["BBB"]["status"] == "submitted" and steps["BBB"]["side"] == "buy"
+    assert steps["BBB"]["filled_ms"] is None
+    assert steps["CCC"]["status"] == "failed"
+    assert steps["DDD"]["status"] == "no_position" and steps["DDD"]["cancelled"] == 0
+    assert "ZZZ" not in client.submitted
+    assert acks.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_trade_update_survives_ack_resolve_failure(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import backend.app as app_module
+    from backend.db import Base
+    from backend.models import Order
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'acks.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(app_module, "SessionLocal", Session)
+    db = Session()
+    db.add(Order(run_id="r1", symbol="AAA", qty=1, side="buy", status="submitted", alpaca_id="ord-1"))
+    db.commit()
+    db.close()
+
+    class _BrokenAcks:
+        def resolve(self, order_id, event):
+            raise RuntimeError("waiter blew up")
+
+    monkeypatch.setattr(app_module, "order_acks", _BrokenAcks())
+    update = SimpleNamespace(event="canceled", order=SimpleNamespace(id="ord-1", symbol="AAA", parent_id=None))
+    await app_module.handle_trade_update(update)
+
+    db = Session()
+    assert db.query(Order).one().status == "canceled"
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_exit_fill_updates_one_bandit_arm(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import backend.app as app_module
+    from backend.db import Base
+    from backend.learning import EpsilonGreedyBandit
+    from backend.models import BanditState, Decision, Order
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'fills.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(app_module, "SessionLocal", Session)
+    params = {"fast": 10, "slow": 30, "vol_target": 0.25}
+    db = Session()
+    db.add(Decision(run_id="r1", params_used=params))
+    db.add(BanditState(param_key="10_30_0.25", trials=4, total_reward=0.2, avg_reward=0.05))
+    db.add(Order(run_id="r1", symbol="AAA", qty=1, side="buy", status="fill", alpaca_id="ord-1", entry_price=100.0))
+    db.commit()
+    db.close()
+
+    # The fill handler must not load the whole arm table per fill.
+    monkeypatch.setattr(EpsilonGreedyBandit, "__init__", lambda self, *a, **k: pytest.fail("bandit constructed"))
+    rewards = []
+    monkeypatch.setattr(app_module.agent, "record_reward", lambda p, r: rewards.append((p, r)))
+    update = SimpleNamespace(event="fill", order=SimpleNamespace(
+        id="leg-1", symbol="AAA", parent_id="ord-1", filled_avg_price="110.0"))
+    await app_module.handle_trade_update(update)
+
+    db = Session()
+    state = db.query(BanditState).one()
+    assert state.trials == 5
+    assert state.total_reward == pytest.approx(0.3)
+    assert db.query(Decision).one().reward == pytest.approx(0.1)
+    db.close()
+    assert rewards == [(params, pytest.approx(0.1))]
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.agency import sentinel as sentinel_module
+from backend.db import Base
+from backend.models import SentimentCacheEntry
+from backend.services.sentiment_cache import SentimentStore, headline_hash
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_store_keys_by_headline_set_and_vix_bucket(session_factory):
+    store = SentimentStore(ttl_seconds=60, vix_bucket_width=5, session_factory=session_factory)
+    ids = {"AAA:1", "BBB:2"}
+
+    assert store.get(ids, 18.0) is None
+    store.put(ids, 18.0, 0.4)
+    assert headline_hash(["BBB:2", "AAA:1"]) == headline_hash(ids)
+    assert store.get({"BBB:2", "AAA:1"}, 16.2) == 0.4   # same 15-20 bucket
+    assert store.get(ids, 21.0) is None                  # next bucket
+    assert store.get({"AAA:1"}, 18.0) is None            # different headlines
+
+    store.put(ids, 18.0, -0.2)                           # upsert
+    assert store.get(ids, 18.0) == -0.2
+
+
+def test_expired_entries_miss_and_are_purged(session_factory):
+    store = SentimentStore(ttl_seconds=60, session_factory=session_factory)
+    store.put({"old"}, 15.0, 0.1)
+    db = session_factory()
+    db.query(SentimentCacheEntry).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+
+    assert store.get({"old"}, 15.0) is None
+    store.put({"new"}, 15.0, 0.2)
+    db = session_factory()
+    assert [e.score for e in db.query(SentimentCacheEntry)] == [0.2]
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_second_sentinel_reuses_shared_verdict(session_factory, monkeypatch):
+    llm_calls = []
+
+    class _Prompt:
+        def __or__(self, _llm):
+            class _Chain:
+                async def ainvoke(self, payload):
+                    llm_calls.append(payload)
+                    return type("Resp", (), {"content": "-0.6"})()
+            return _Chain()
+
+    class _Provider:
+        def get_news(self, symbols, limit=5):
+            return {"news": [{"id": 7, "headline": f"{symbols[0]} recalls product"}]}
+
+    monkeypatch.setattr(sentinel_module.PromptTemplate, "from_template", lambda _t: _Prompt())
+    store = SentimentStore(session_factory=session_factory)
+
+    def make():
+        s = sentinel_module.SentinelShield.__new__(sentinel_module.SentinelShield)
+        s.provider, s.llm, s.store = _Provider(), object(), store
+        s._init_cache()
+        return s
+
+    # e.g. a uvicorn worker, then a restarted process or a script
+    assert await make().analyze_sentiment(["AAA", "BBB"], vix=22.0) == -0.6
+    assert await make().analyze_sentiment(["BBB", "AAA"], vix=23.0) == -0.6
+    assert len(llm_calls) == 1
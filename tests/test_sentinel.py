@@ -78,3 +78,81 @@ async def test_sentiment_parser_handles_list_content(monkeypatch):
     s = _make_sentinel(_Provider(_NewsSet(["TSLA launches new model"])))
     score = await s.analyze_sentiment(["TSLA"])
     assert score == 0.42
+
+
+class _SlowNewsProvider:
+    """Per-symbol headlines with a blocking delay, like the sync NewsClient."""
+
+    def __init__(self, headlines_by_symbol, delay=0.1):
+        self.headlines_by_symbol = headlines_by_symbol
+        self.delay = delay
+
+    def get_news(self, symbols, limit=5):
+        import time
+        time.sleep(self.delay)
+        symbol = symbols[0]
+        return {"news": [{"id": f"{symbol}-{k}", "headline": h}
+                         for k, h in enumerate(self.headlines_by_symbol.get(symbol, [])[:limit])]}
+
+
+@pytest.mark.asyncio
+async def test_news_fetched_concurrently_and_llm_only_on_new_headlines(monkeypatch):
+    import time
+
+    llm_calls = []
+
+    class _CountingPrompt(_FakePrompt):
+        def __or__(self, llm):
+            chain = super().__or__(llm)
+            original = chain.ainvoke
+
+            async def ainvoke(payload):
+                llm_calls.append(payload["headlines"])
+                return await original(payload)
+            chain.ainvoke = ainvoke
+            return chain
+
+    monkeypatch.setattr(sentinel_module.PromptTemplate, "from_template", lambda _t: _CountingPrompt("0.3"))
+    monkeypatch.setattr(sentinel_module, "_SENTIMENT_TTL", 0)  # every call refreshes
+    provider = _SlowNewsProvider({"AAA": ["AAA beats"], "BBB": ["BBB guides up"], "CCC": ["CCC misses"]})
+    s = _make_sentinel(provider)
+
+    start = time.perf_counter()
+    assert await s.analyze_sentiment(["AAA", "BBB", "CCC"], vix=15.0) == 0.3
+    assert time.perf_counter() - start < 0.25  # three 0.1s fetches overlapped
+    assert len(llm_calls) == 1
+    assert "[BBB] BBB guides up" in llm_calls[0]
+
+    # TTL expired and VIX moved, but the headlines are the same: no LLM call.
+    assert await s.analyze_sentiment(["AAA", "BBB", "CCC"], vix=25.0) == 0.3
+    assert len(llm_calls) == 1
+
+    provider.headlines_by_symbol["CCC"].insert(0, "CCC cuts jobs")
+    await s.analyze_sentiment(["AAA", "BBB", "CCC"], vix=25.0)
+    assert len(llm_calls) == 2
+
+
+class _FailingProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def get_news(self, _symbols, limit=5):
+        self.calls += 1
+        raise ConnectionError("news API down")
+
+
+@pytest.mark.asyncio
+async def test_total_news_outage_keeps_stale_bearish_score(monkeypatch):
+    monkeypatch.setattr(sentinel_module, "_SENTIMENT_TTL", 0)
+    provider = _FailingProvider()
+    s = _make_sentinel(provider)
+    s._init_cache()
+    s._update_cache(-0.8, 25.0)
+    s._headline_ids = frozenset({"AAA:1"})
+    last_called = s._last_called
+
+    assert await s.analyze_sentiment(["AAA", "BBB"], vix=25.0) == -0.8
+    assert provider.calls == 2
+    assert s._cached_score == -0.8
+    assert s._last_called == last_called           # not refreshed: next call retries
+    assert s._headline_ids == frozenset({"AAA:1"})
@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
+import pytest
 from backend.strategy.ts_mom import compute_signal
 from backend.strategy.risk import compute_volatility
+from backend.strategy.incremental import IncrementalSignalEngine, RollingWindow
 
 
 def _make_bars(prices_by_symbol: dict, freq="1min") -> pd.DataFrame:
@@ -58,3 +60,76 @@ class TestComputeVolatility:
         vol = compute_volatility(bars, window=10, timeframe="1d")
         last_vol = vol.xs("SPY", level=0)["volatility"].dropna().iloc[-1]
         assert last_vol > 0
+
+
+class TestIncrementalSignalEngine:
+    def _random_bars(self, n=120, seed=3):
+        rng = np.random.default_rng(seed)
+        return _make_bars({
+            "AAPL": (100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))).tolist(),
+            "TSLA": (200 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))).tolist(),
+        })
+
+    def test_rolling_window_matches_pandas(self):
+        values = np.random.default_rng(0).normal(size=200)
+        window = RollingWindow(15)
+        for v in values:
+            window.push(v)
+        assert window.mean() == pytest.approx(pd.Series(values).rolling(15).mean().iloc[-1])
+        assert window.std() == pytest.approx(pd.Series(values).rolling(15).std().iloc[-1])
+
+    def test_matches_full_recompute_after_incremental_updates(self):
+        bars = self._random_bars()
+        engine = IncrementalSignalEngine(timeframe="1m")
+        ts = bars.index.get_level_values(1)
+        dates = ts.unique().sort_values()
+        # First cycle sees part of the history, later cycles only push the tail.
+        for cutoff in (60, 90, 120):
+            engine.update(bars[ts <= dates[cutoff - 1]], windows=(5, 20))
+
+        expected_sig = compute_signal(bars, fast_window=5, slow_window=20, threshold=0.0)
+        expected_vol = compute_volatility(bars, timeframe="1m")
+        sig = engine.signals(5, 20, threshold=0.0)
+        vol = engine.volatility()
+        for symbol in ("AAPL", "TSLA"):
+            assert sig.xs(symbol, level=0)["signal"].iloc[-1] == expected_sig.xs(symbol, level=0)["signal"].iloc[-1]
+            assert vol.xs(symbol, level=0)["volatility"].iloc[-1] == pytest.approx(
+                expected_vol.xs(symbol, level=0)["volatility"].iloc[-1]
+            )
+
+    def test_live_price_matches_appended_partial_bar(self):
+        bars = self._random_bars()
+        engine = IncrementalSignalEngine(timeframe="1m")
+        engine.update(bars, windows=(5, 20))
+
+        now = pd.Timestamp("2025-01-02")
+        live = {"AAPL": 90.0, "TSLA": 250.0}
+        live_rows = pd.DataFrame([
+            {"symbol": s, "timestamp": now, "open": p, "high": p, "low": p, "close": p, "volume": 0}
+            for s, p in live.items()
+        ]).set_index(["symbol", "timestamp"])
+        appended = pd.concat([bars, live_rows]).sort_index()
+
+        vol = engine.volatility(live_prices=live, now=now)
+        expected_vol = compute_volatility(appended, timeframe="1m")
+        assert vol.loc[("TSLA", now), "volatility"] == pytest.approx(expected_vol.loc[("TSLA", now), "volatility"])
+        # The live bar is provisional: it is not committed to the rolling state.
+        assert engine.last_timestamp("TSLA") == bars.index.get_level_values(1).max()
+
+    def test_new_window_backfills_from_history(self):
+        bars = self._random_bars()
+        engine = IncrementalSignalEngine(timeframe="1m")
+        engine.update(bars, windows=(5, 20))
+        assert engine.update(bars, windows=(10, 40)) == 0  # nothing new to push
+        expected = compute_signal(bars, fast_window=10, slow_window=40, threshold=0.0)
+        sig = engine.signals(10, 40, threshold=0.0)
+        assert sig.xs("AAPL", level=0)["signal"].iloc[-1] == expected.xs("AAPL", level=0)["signal"].iloc[-1]
+
+    def test_missing_reports_unseen_symbols_and_windows(self):
+        bars = self._random_bars()
+        engine = IncrementalSignalEngine(timeframe="1m")
+        engine.update(bars, windows=(5, 20))
+        assert engine.missing(["AAPL", "TSLA", "NVDA"], windows=(5, 20)) == ["NVDA"]
+        # A subset update adds a window only for the symbols it saw.
+        engine.update(bars.loc[["AAPL"]], windows=(10, 40))
+        assert engine.missing(["AAPL", "TSLA"], windows=(10, 40)) == ["TSLA"]
@@ -9,7 +9,7 @@ pytestmark = pytest.mark.integration
 if os.getenv("RUN_STREAMING_TESTS", "0") != "1":
     pytestmark = [pytest.mark.integration, pytest.mark.skip(reason="Set RUN_STREAMING_TESTS=1 to run live streaming connectivity test")]
 
-async def mock_data_callback():
+async def mock_data_callback(symbols=None):
     print(" Data Callback Triggered! The bot would now execute its cycle.")
 
 async def mock_trade_callback(data):
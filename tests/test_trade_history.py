@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+import backend.app as app_module
+from backend.db import Base
+from backend.models import Decision, Order
+
+
+T0 = datetime(2026, 3, 2, 14, 30)
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(app_module, "SessionLocal", sessionmaker(bind=engine))
+    db = sessionmaker(bind=engine)()
+    for run in range(5):
+        run_id = f"run-{run}"
+        # Two decisions per run: the first one is the run's bandit pick.
+        db.add(Decision(run_id=run_id, params_used={"fast": 10 + run}, reward=run / 100))
+        db.add(Decision(run_id=run_id, params_used={"fast": 99}, reward=None))
+        for leg in range(3):
+            # Legs of a run share a timestamp, so paging must tie-break on id.
+            db.add(Order(run_id=run_id, timestamp=T0 + timedelta(minutes=run), symbol=f"S{leg}",
+                         qty=1, side="buy", status="fill", entry_price=100.0 + leg))
+        db.add(Order(run_id=run_id, timestamp=T0 + timedelta(minutes=run), symbol="X", qty=1, side="buy", status="planned"))
+    db.add(Order(run_id="orphan", timestamp=T0 - timedelta(minutes=1), symbol="Y", qty=1, side="sell", status="fill"))
+    db.commit()
+    db.close()
+    return engine
+
+
+def test_trade_history_is_one_query_with_first_decision(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+
+    trades = app_module.get_trade_history(limit=100)
+
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+    assert len(trades) == 16
+    assert [t["run_id"] for t in trades[:3]] == ["run-4"] * 3
+    assert trades[0]["params_used"] == {"fast": 14}
+    assert trades[0]["reward"] == 0.04
+    assert trades[-1]["run_id"] == "orphan"
+    assert trades[-1]["params_used"] is None and trades[-1]["reward"] is None
+
+
+def test_keyset_pages_cover_history_without_gaps(engine):
+    seen, before = [], None
+    while True:
+        page = app_module.get_trade_history(limit=4, before=before)
+        seen.extend(t["id"] for t in page)
+        if len(page) < 4:
+            break
+        before = page[-1]["cursor"]
+
+    assert seen == [t["id"] for t in app_module.get_trade_history(limit=100)]
+    assert len(set(seen)) == 16
+
+
+def test_trade_history_rejects_bad_input(engine):
+    with pytest.raises(HTTPException) as exc:
+        app_module.get_trade_history(before="not-a-cursor")
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        app_module.get_trade_history(limit=0)
+    assert exc.value.status_code == 400
+
+
+def test_trade_history_query_uses_status_timestamp_index(engine):
+    with engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM orders WHERE status = 'fill' ORDER BY timestamp DESC, id DESC"
+        )).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_orders_status_timestamp" in detail
+    assert "TEMP B-TREE" not in detail
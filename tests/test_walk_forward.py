@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backend.backtest as backtest_module
+import backend.walk_forward as walk_forward_module
+from backend import db as db_module
+from backend.walk_forward import make_folds, run_walk_forward
+from backend.yf_cache import YFinanceCache
+
+ARMS = [
+    {"fast": 5, "slow": 20, "vol_target": 0.3, "sl_pct": 0.015, "tp_pct": 0.02, "threshold": 0.0005},
+    {"fast": 8, "slow": 30, "vol_target": 0.2, "sl_pct": 0.02, "tp_pct": 0.05, "threshold": 0.0005},
+]
+
+
+def _history(n_days=200, symbols=("AAA", "BBB"), seed=11):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_days)
+    frames = {}
+    for k, symbol in enumerate(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0005 * k, 0.01, n_days)))
+        frames[symbol] = pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close}, index=dates)
+    bars = pd.concat(frames, names=["symbol", "timestamp"])
+    vix = pd.DataFrame({"close": np.full(n_days, 18.0)}, index=dates)
+    return bars, vix
+
+
+def test_make_folds_tile_the_test_period():
+    end = datetime(2025, 6, 30)
+    folds = make_folds(end, n_folds=4, train_days=365, test_days=60)
+    assert [f.index for f in folds] == [0, 1, 2, 3]
+    assert folds[-1].test_end == end
+    for prev, nxt in zip(folds, folds[1:]):
+        assert nxt.train_end == prev.test_end
+        assert nxt.test_end - prev.test_end == timedelta(days=60)
+
+
+def test_walk_forward_isolates_folds_and_merges_report(monkeypatch, tmp_path):
+    bars, vix = _history()
+    seen_binds = []
+
+    def fake_load_history(provider, symbols, days, start, end, timeframe):
+        seen_binds.append(str(db_module.SessionLocal.kw["bind"].url))
+        return bars, vix, days
+
+    monkeypatch.setattr(backtest_module, "_load_history", fake_load_history)
+    monkeypatch.setattr(backtest_module, "MarketDataProvider", lambda: None)
+    monkeypatch.setattr(walk_forward_module.yf_cache, "download", lambda *a, **k: None)
+    original_bind = db_module.SessionLocal.kw["bind"]
+
+    report = run_walk_forward(n_folds=3, train_days=120, test_days=40, inject_arms=ARMS,
+                              max_workers=1, db_dir=str(tmp_path))
+
+    # Train + test of one fold share a DB; every fold gets its own.
+    assert len(seen_binds) == 6
+    assert len(set(seen_binds)) == 3
+    assert all(seen_binds[2 * k] == seen_binds[2 * k + 1] for k in range(3))
+    assert db_module.SessionLocal.kw["bind"] is original_bind
+
+    assert report["summary"]["folds"] == 3
+    assert report["summary"]["failed_folds"] == 0
+    assert all(r["best_arm"] in ARMS for r in report["folds"])
+    assert report["oos_equity"].index.is_monotonic_increasing
+    assert report["summary"]["oos_return_pct"] == (report["oos_equity"].iloc[-1] / 100000.0 - 1) * 100
+
+
+
+def test_pool_workers_read_the_yfinance_cache_offline(monkeypatch, tmp_path):
+    # Recorded so the initializer's change is undone after the test.
+    monkeypatch.setenv("YF_CACHE_OFFLINE", "false")
+    pool_kwargs = {}
+
+    def fake_pool(**kwargs):
+        pool_kwargs.update(kwargs)
+        raise RuntimeError("stop before spawning")
+
+    monkeypatch.setattr(walk_forward_module, "ProcessPoolExecutor", fake_pool)
+    monkeypatch.setattr(walk_forward_module.yf_cache, "download", lambda *a, **k: None)
+    with pytest.raises(RuntimeError):
+        run_walk_forward(n_folds=2, train_days=120, test_days=40, max_workers=2, db_dir=str(tmp_path))
+    assert pool_kwargs["initializer"] is walk_forward_module._init_worker
+
+    assert not YFinanceCache(str(tmp_path)).offline
+    walk_forward_module._init_worker()
+    assert YFinanceCache(str(tmp_path)).offline
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backend.yf_cache as yf_cache_module
+from backend.yf_cache import YFinanceCache
+
+
+class _FakeYF:
+    """Stands in for the yfinance module: deterministic daily bars, calls recorded."""
+
+    def __init__(self):
+        self.calls = []
+
+    def download(self, tickers, start=None, end=None, interval="1d", progress=True):
+        self.calls.append((sorted(tickers), pd.Timestamp(start), pd.Timestamp(end)))
+        dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), name="Date")
+        frames = {}
+        for ticker in tickers:
+            base = sum(map(ord, ticker))
+            close = base + (dates - pd.Timestamp("2020-01-01")).days.to_numpy(dtype=float)
+            frames[ticker] = pd.DataFrame({
+                "Close": close, "High": close + 1, "Low": close - 1, "Open": close, "Volume": 1000.0,
+            }, index=dates)
+        raw = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+        raw.columns.names = ["Price", "Ticker"]
+        return raw
+
+
+@pytest.fixture
+def fake_yf(monkeypatch):
+    fake = _FakeYF()
+    monkeypatch.setattr(yf_cache_module, "yf", fake)
+    return fake
+
+
+def test_download_shape_matches_stacked_yfinance(tmp_path, fake_yf):
+    cache = YFinanceCache(str(tmp_path))
+    bars = cache.download(["AAA", "^VIX"], "2024-01-01", "2024-02-01")
+
+    assert list(bars.index.names) == ["symbol", "timestamp"]
+    assert {"open", "high", "low", "close", "volume"} <= set(bars.columns)
+    assert set(bars.index.get_level_values("symbol")) == {"AAA", "^VIX"}
+    assert bars.index.get_level_values("timestamp").max() < pd.Timestamp("2024-02-01")
+
+
+def test_overlapping_phases_download_each_history_once(tmp_path, fake_yf):
+    cache = YFinanceCache(str(tmp_path))
+    train = cache.download(["AAA", "BBB"], "2023-01-01", "2024-01-01")
+    assert len(fake_yf.calls) == 1
+
+    # A fresh cache instance (e.g. the next script) reads from disk.
+    test = YFinanceCache(str(tmp_path)).download(["AAA", "BBB"], "2023-06-01", "2024-03-01")
+    assert len(fake_yf.calls) == 2
+    tickers, start, end = fake_yf.calls[-1]
+    assert start == pd.Timestamp("2024-01-01") and end == pd.Timestamp("2024-03-01")
+
+    overlap = test.loc[pd.IndexSlice[:, :pd.Timestamp("2023-12-31")], :]
+    np.testing.assert_array_equal(
+        overlap["close"].to_numpy(),
+        train.loc[pd.IndexSlice[:, pd.Timestamp("2023-06-01"):], :]["close"].to_numpy(),
+    )
+
+    # Identical request within the same process is served from memory.
+    cache.download(["AAA", "BBB"], "2023-01-01", "2024-01-01")
+    assert len(fake_yf.calls) == 2
+
+
+def test_offline_mode_never_downloads(tmp_path, fake_yf):
+    YFinanceCache(str(tmp_path)).download(["AAA"], "2024-01-01", "2024-02-01")
+    offline = YFinanceCache(str(tmp_path), offline=True)
+
+    bars = offline.download(["AAA", "ZZZ"], "2023-12-01", "2024-02-01")
+    assert len(fake_yf.calls) == 1
+    assert set(bars.index.get_level_values("symbol")) == {"AAA"}
+
+
+def test_eviction_keeps_cache_under_budget(tmp_path, fake_yf):
+    cache = YFinanceCache(str(tmp_path), max_bytes=1)
+    cache.download(["AAA"], "2024-01-01", "2024-02-01")
+    cache.download(["BBB"], "2024-01-01", "2024-02-01")
+
+    manifest = cache._load_manifest()
+    assert [entry["symbol"] for entry in manifest.values()] == ["BBB"]
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+
+def test_memo_ignores_intraday_end_drift_and_is_bounded(tmp_path, fake_yf):
+    cache = YFinanceCache(str(tmp_path), memo_size=2)
+    first = cache.download(["AAA"], "2024-01-01", "2024-02-01 09:30")
+    # A later end=now() on the same day is the same daily history.
+    second = cache.download(["AAA"], "2024-01-01", "2024-02-01 15:45")
+    assert len(fake_yf.calls) == 1
+    assert second.equals(first)
+
+    cache.download(["AAA"], "2023-12-01", "2024-02-01")
+    cache.download(["AAA"], "2023-11-01", "2024-02-01")
+    assert len(cache._memo) == 2
+    assert (("AAA",), pd.Timestamp("2024-01-01"), pd.Timestamp("2024-02-02"), "1d") not in cache._memo
+
+
+def test_offline_readers_leave_the_cache_untouched(tmp_path, fake_yf):
+    YFinanceCache(str(tmp_path)).download(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    before = {p.name: p.stat().st_mtime_ns for p in tmp_path.iterdir()}
+
+    # A tiny budget would evict on a writer; offline readers never write or evict.
+    offline = YFinanceCache(str(tmp_path), max_bytes=1, offline=True)
+    bars = offline.download(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    assert set(bars.index.get_level_values("symbol")) == {"AAA", "BBB"}
+    assert {p.name: p.stat().st_mtime_ns for p in tmp_path.iterdir()} == before
+
+
+def test_missing_or_torn_history_file_is_a_miss(tmp_path, fake_yf):
+    cache = YFinanceCache(str(tmp_path))
+    cache.download(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    files = sorted(tmp_path.glob("*.parquet"))
+    files[0].write_bytes(files[0].read_bytes()[:50])
+    files[1].unlink()
+
+    bars = YFinanceCache(str(tmp_path), offline=True).download(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    assert bars.empty
+    assert len(fake_yf.calls) == 1
+
+    # Online, the deleted file is re-downloaded at once and the torn one on the next call.
+    cache = YFinanceCache(str(tmp_path))
+    cache.download(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    bars = YFinanceCache(str(tmp_path)).download(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    assert set(bars.index.get_level_values("symbol")) == {"AAA", "BBB"}
+    assert len(fake_yf.calls) == 3
+    assert not list(tmp_path.glob("*.tmp"))